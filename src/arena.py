@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+"""
+Arena da AST: representação "struct-of-arrays" para programas grandes.
+
+Em vez de um objeto Python por nó, todos os nós ficam em arrays paralelos
+tipados (kind, operador, primeiro filho, próximo irmão, payload inteiro e
+id de nome internado) dentro de uma única `AstArena`. A arena é somente
+leitura e pode ser percorrida por `check_semantics`, `print_ast_ascii`,
+`exec_program` e `codegen_python` através de visões (`root()`), que expõem
+os mesmos atributos dos nós de `ast_nodes.py` e a mesma tag `kind`. Cada
+acesso cria uma visão nova, então caches por nó usam `node.key` (o índice
+na arena junto com a identidade da arena), e não `id(node)`. As
+anotações de `check_semantics` (`ty`, `sym`, `dead`) e as posições dos
+statements (`pos`) ficam em tabelas laterais, fora da serialização.
+"""
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List
+
+from .ast_nodes import *
+
+
+# Operadores e nomes de tipo base, codificados no array `ops`
+OPS = ("", "+", "-", "*", "/", "<", "<=", "==", "!=", "||", "&&", "!", "int", "bool")
+_OP_CODE = {op: code for code, op in enumerate(OPS)}
+
+# Bits do payload de Decl / Block
+_F_ARRAY = 1
+_F_CONST = 2
+_F_INIT = 4
+_F_STMTS = 1      # Block com lista de statements (e não None)
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+_MAGIC = b"MLA1"
+_HEADER = struct.Struct("<4sBII")   # magic, byteorder (0=little), nós, tamanho dos nomes
+
+
+class AstArena:
+    """Nós da AST em arrays paralelos; o nó 0 é sempre o Program."""
+
+    __slots__ = ("kinds", "ops", "first", "next", "payload", "name_ids", "names", "big",
+                 "types", "syms", "deads", "positions")
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.ops = array("b")
+        self.first = array("i")
+        self.next = array("i")
+        self.payload = array("q")
+        self.name_ids = array("i")
+        self.names: List[str] = []
+        self.big: Dict[int, int] = {}   # literais que não cabem em 64 bits
+        # Anotações de check_semantics (ty / sym / dead), por índice de nó
+        self.types: Dict[int, str] = {}
+        self.syms: Dict[int, Any] = {}
+        self.deads: Dict[int, Any] = {}
+        # (linha, coluna) dos statements, copiadas da AST de origem
+        self.positions: Dict[int, Any] = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos arrays de nós."""
+        return sum(a.itemsize * len(a) for a in
+                   (self.kinds, self.ops, self.first, self.next, self.payload, self.name_ids))
+
+    def root(self):
+        """Visão somente leitura do nó Program."""
+        return self.node(0)
+
+    def node(self, i: int):
+        if i < 0:
+            return None
+        return _VIEWS[self.kinds[i]](self, i)
+
+    def children(self, i: int) -> List[int]:
+        out = []
+        c = self.first[i]
+        while c >= 0:
+            out.append(c)
+            c = self.next[c]
+        return out
+
+    def child(self, i: int, k: int) -> int:
+        c = self.first[i]
+        while k > 0 and c >= 0:
+            c = self.next[c]
+            k -= 1
+        return c
+
+    # ---- Serialização: cabeçalho + arrays brutos, em uma única escrita ----
+    def to_bytes(self) -> bytes:
+        names = "\0".join(self.names).encode("utf-8")
+        big = ";".join(f"{i}:{v}" for i, v in self.big.items()).encode("ascii")
+        parts = [_HEADER.pack(_MAGIC, 0 if sys.byteorder == "little" else 1, len(self), len(names))]
+        for a in (self.kinds, self.ops, self.first, self.next, self.payload, self.name_ids):
+            parts.append(a.tobytes())
+        parts.append(names)
+        parts.append(big)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AstArena":
+        magic, order, n, names_len = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            raise ValueError("Dados não são uma arena de AST MiniLang.")
+        arena = cls()
+        off = _HEADER.size
+        for a in (arena.kinds, arena.ops, arena.first, arena.next, arena.payload, arena.name_ids):
+            size = a.itemsize * n
+            a.frombytes(data[off:off + size])
+            if order != (0 if sys.byteorder == "little" else 1):
+                a.byteswap()
+            off += size
+        names = bytes(data[off:off + names_len]).decode("utf-8")
+        arena.names = names.split("\0") if names else []
+        off += names_len
+        big = bytes(data[off:]).decode("ascii")
+        for item in filter(None, big.split(";")):
+            i, v = item.split(":")
+            arena.big[int(i)] = int(v)
+        return arena
+
+
+def build_arena(prog: Program) -> AstArena:
+    """Converte uma AST de objetos (ast_nodes) em uma AstArena."""
+    arena = AstArena()
+    name_index: Dict[str, int] = {}
+    kinds, ops, first, nxt = arena.kinds, arena.ops, arena.first, arena.next
+    payload, name_ids = arena.payload, arena.name_ids
+
+    # Pré-ordem com pilha explícita (expressões geradas podem ter milhares
+    # de níveis); `last[p]` é o último filho já ligado ao nó p.
+    last: List[int] = []
+    stack: List[Any] = [(prog, -1)]
+    while stack:
+        node, parent = stack.pop()
+        i = len(kinds)
+        k = node.kind
+        kinds.append(k)
+        first.append(-1)
+        nxt.append(-1)
+        last.append(-1)
+        if parent >= 0:
+            if last[parent] < 0:
+                first[parent] = i
+            else:
+                nxt[last[parent]] = i
+            last[parent] = i
+        op = 0
+        pay = 0
+        name = -1
+        kids: List[Any] = []
+        if k == K_PROGRAM:
+            kids = [node.block]
+        elif k == K_BLOCK:
+            if node.stmts is not None:
+                pay = _F_STMTS
+                kids = node.stmts if isinstance(node.stmts, list) else [node.stmts]
+        elif k == K_DECL:
+            op = _OP_CODE[node.typ]
+            pay = ((_F_ARRAY if node.is_array else 0) | (_F_CONST if node.is_const else 0)
+                   | (_F_INIT if node.init is not None else 0))
+            kids = [node.id] if node.init is None else [node.id, node.init]
+        elif k == K_EVAL:
+            kids = [node.expr]
+        elif k == K_PRINT:
+            kids = node.args
+        elif k == K_IF:
+            kids = [node.cond, node.then_stmt]
+            if node.else_stmt is not None:
+                kids.append(node.else_stmt)
+        elif k == K_WHILE:
+            kids = [node.cond, node.body]
+        elif k == K_DO:
+            kids = [node.body, node.cond]
+        elif k == K_ASSIGN:
+            kids = [node.left, node.right]
+        elif k in (K_REL, K_EQ, K_LG, K_ARI):
+            op = _OP_CODE[node.op]
+            kids = [node.left, node.right]
+        elif k == K_UNARY:
+            op = _OP_CODE[node.op]
+            kids = [node.expr]
+        elif k == K_NEWARRAY:
+            op = _OP_CODE[node.base]
+            kids = [node.size]
+        elif k == K_ARRAYREF:
+            kids = [node.id, node.index]
+        elif k == K_NUM:
+            if _INT64_MIN <= node.value <= _INT64_MAX:
+                pay = node.value
+            else:
+                arena.big[i] = node.value
+        elif k == K_BOOL:
+            pay = 1 if node.value else 0
+        elif k == K_ID:
+            name = name_index.get(node.name)
+            if name is None:
+                name = name_index[node.name] = len(arena.names)
+                arena.names.append(node.name)
+        else:
+            raise ValueError(f"Nó não suportado na arena: {type(node).__name__}")
+        if k <= K_DO and node.pos is not None:
+            arena.positions[i] = node.pos
+        ops.append(op)
+        payload.append(pay)
+        name_ids.append(name)
+        stack.extend((kid, i) for kid in reversed(kids))
+    return arena
+
+
+# =========================================================
+# Visões somente leitura (mesmos atributos dos nós de ast_nodes)
+# =========================================================
+
+class ArenaNode:
+    """Visão de um nó da arena; criada sob demanda, sem copiar dados."""
+    __slots__ = ("_arena", "_i")
+    kind = -1
+
+    def __init__(self, arena: AstArena, i: int):
+        self._arena = arena
+        self._i = i
+
+    def __eq__(self, other):
+        return (isinstance(other, ArenaNode) and other._arena is self._arena
+                and other._i == self._i)
+
+    def __hash__(self):
+        return hash((id(self._arena), self._i))
+
+    def __repr__(self):
+        return f"{type(self).__name__}(#{self._i})"
+
+    @property
+    def key(self) -> int:
+        """
+        Identidade estável do nó (ver Node.key): o índice na arena nos bits
+        baixos e o id da arena acima, para visões de arenas diferentes (p.ex.
+        num mesmo `Profile`) não colidirem enquanto as arenas existem.
+        """
+        return id(self._arena) << 32 | self._i
+
+    # Anotações da análise semântica ficam em tabelas laterais da arena
+    @property
+    def ty(self):
+        return self._arena.types.get(self._i)
+
+    @ty.setter
+    def ty(self, value):
+        self._arena.types[self._i] = value
+
+    @property
+    def sym(self):
+        return self._arena.syms.get(self._i)
+
+    @sym.setter
+    def sym(self, value):
+        self._arena.syms[self._i] = value
+
+    @property
+    def dead(self):
+        return self._arena.deads.get(self._i)
+
+    @dead.setter
+    def dead(self, value):
+        self._arena.deads[self._i] = value
+
+    @property
+    def pos(self):
+        return self._arena.positions.get(self._i)
+
+    @pos.setter
+    def pos(self, value):
+        self._arena.positions[self._i] = value
+
+
+def _child(k: int):
+    return property(lambda self: self._arena.node(self._arena.child(self._i, k)))
+
+
+def _all_children(self):
+    a = self._arena
+    return [a.node(c) for c in a.children(self._i)]
+
+
+_op = property(lambda self: OPS[self._arena.ops[self._i]])
+
+
+class ProgramView(ArenaNode):
+    __slots__ = ()
+    kind = K_PROGRAM
+    block = _child(0)
+
+
+class BlockView(ArenaNode):
+    __slots__ = ()
+    kind = K_BLOCK
+
+    @property
+    def stmts(self):
+        if not self._arena.payload[self._i] & _F_STMTS:
+            return None
+        return _all_children(self)
+
+
+class DeclView(ArenaNode):
+    __slots__ = ()
+    kind = K_DECL
+    typ = _op
+    id = _child(0)
+    is_array = property(lambda self: bool(self._arena.payload[self._i] & _F_ARRAY))
+    is_const = property(lambda self: bool(self._arena.payload[self._i] & _F_CONST))
+
+    @property
+    def init(self):
+        if not self._arena.payload[self._i] & _F_INIT:
+            return None
+        return self._arena.node(self._arena.child(self._i, 1))
+
+
+class EvalView(ArenaNode):
+    __slots__ = ()
+    kind = K_EVAL
+    expr = _child(0)
+
+
+class PrintView(ArenaNode):
+    __slots__ = ()
+    kind = K_PRINT
+    args = property(_all_children)
+
+
+class IfView(ArenaNode):
+    __slots__ = ()
+    kind = K_IF
+    cond = _child(0)
+    then_stmt = _child(1)
+    else_stmt = _child(2)
+
+
+class WhileView(ArenaNode):
+    __slots__ = ()
+    kind = K_WHILE
+    cond = _child(0)
+    body = _child(1)
+
+
+class DoView(ArenaNode):
+    __slots__ = ()
+    kind = K_DO
+    body = _child(0)
+    cond = _child(1)
+
+
+class AssignView(ArenaNode):
+    __slots__ = ()
+    kind = K_ASSIGN
+    left = _child(0)
+    right = _child(1)
+
+
+class RelView(ArenaNode):
+    __slots__ = ()
+    kind = K_REL
+    op = _op
+    left = _child(0)
+    right = _child(1)
+
+
+class EqView(RelView):
+    __slots__ = ()
+    kind = K_EQ
+
+
+class LgView(RelView):
+    __slots__ = ()
+    kind = K_LG
+
+
+class AriView(RelView):
+    __slots__ = ()
+    kind = K_ARI
+
+
+class UnaryView(ArenaNode):
+    __slots__ = ()
+    kind = K_UNARY
+    op = _op
+    expr = _child(0)
+
+
+class NewArrayView(ArenaNode):
+    __slots__ = ()
+    kind = K_NEWARRAY
+    base = _op
+    size = _child(0)
+
+
+class ArrayRefView(ArenaNode):
+    __slots__ = ()
+    kind = K_ARRAYREF
+    id = _child(0)
+    index = _child(1)
+
+
+class NumView(ArenaNode):
+    __slots__ = ()
+    kind = K_NUM
+
+    @property
+    def value(self):
+        a = self._arena
+        big = a.big.get(self._i)
+        return a.payload[self._i] if big is None else big
+
+
+class BoolView(ArenaNode):
+    __slots__ = ()
+    kind = K_BOOL
+    value = property(lambda self: bool(self._arena.payload[self._i]))
+
+
+class IdView(ArenaNode):
+    __slots__ = ()
+    kind = K_ID
+    name = property(lambda self: self._arena.names[self._arena.name_ids[self._i]])
+    nid = property(lambda self: self._arena.name_ids[self._i])
+
+
+_VIEWS: List[Any] = [None] * N_KINDS
+for _cls in (ProgramView, BlockView, DeclView, EvalView, PrintView, IfView, WhileView,
+             DoView, AssignView, RelView, EqView, LgView, AriView, UnaryView,
+             NewArrayView, ArrayRefView, NumView, BoolView, IdView):
+    _VIEWS[_cls.kind] = _cls
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Armazenamento compacto dos arrays MiniLang, compartilhado pelos backends.
+
+`new int[n]` vira um `array('q')` (8 bytes por elemento, em vez de uma
+referência para um objeto int) e `new bool[n]` um `bytearray` (1 byte por
+elemento), alocados de uma vez já zerados.
+
+Os backends não usam o buffer direto: usam um `Array`, cujo campo `data`
+é o buffer. Ints MiniLang não têm limite, então gravar um valor que não
+cabe em 64 bits levanta OverflowError no `array('q')`; quem grava chama
+`promote()`, que troca `data` por uma lista Python com os mesmos valores.
+A troca é feita no próprio `Array`, então quem grava (inclusive dentro de
+uma expressão, como `x = (a[i] = v) + 1`) não precisa reatribuir a variável.
+
+Elementos de `bool[]` são lidos como 0/1; isso basta porque os backends
+usam o tipo estático para imprimir e 0/1 se comportam como False/True em
+condições e comparações (`0 == false`).
+"""
+from array import array
+from typing import Any, List, Union
+
+
+class Array:
+    """Array MiniLang: `data` é array('q'), bytearray, ndarray ou (após overflow) list."""
+    __slots__ = ("data",)
+
+    def __init__(self, data: Union[array, bytearray, List[Any]]):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i: int):
+        return self.data[i]
+
+    def __setitem__(self, i: int, value):
+        """Grava `value` em `i`, promovendo o armazenamento se não couber."""
+        try:
+            self.data[i] = value
+        except OverflowError:
+            self.promote()[i] = value
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __repr__(self):
+        return repr(list(self.data))
+
+    def promote(self) -> List[Any]:
+        """Troca o buffer compacto por uma lista de ints Python (sem limite)."""
+        if not isinstance(self.data, list):
+            # array('q') e ndarray (modo numpy) têm tolist(), que devolve ints Python
+            self.data = self.data.tolist() if hasattr(self.data, "tolist") else list(self.data)
+        return self.data
+
+
+def new_array(base: str, n: int) -> Array:
+    """Array zerado de `n` elementos do tipo `base` ("int" ou "bool")."""
+    if n < 0:
+        raise ValueError("Tamanho de array negativo.")
+    if base == "int":
+        return Array(array("q", [0]) * n)
+    return Array(bytearray(n))
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 """
 Construtor de AST: converte o parse tree do ANTLR para nossa AST.
+
+Cada statement recebe em `pos` a (linha, coluna) do seu primeiro token.
 """
 import sys
 import os
@@ -18,22 +20,58 @@ except ImportError:
     MiniLangVisitor = None
 
 from .ast_nodes import *
+from .interner import Interner
 
 
 class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
-    """Visitor que constrói a AST a partir do parse tree do ANTLR."""
+    """
+    Visitor que constrói a AST a partir do parse tree do ANTLR.
+    Com `exprs` (uma hashcons.ExprTable sobre o mesmo Interner), subexpressões
+    puras iguais viram o mesmo nó e a AST é um DAG.
+    """
+
+    def __init__(self, interner: Interner = None, exprs=None):
+        # Nomes e literais são internados por compilação
+        self.interner = interner if interner is not None else Interner()
+        self.exprs = exprs
+
+    def _mk(self, cls, *fields):
+        """Nó de expressão: o canônico da tabela de hash-consing, se houver."""
+        if self.exprs is None:
+            return cls(*fields)
+        return self.exprs.make(cls, *fields)
+
+    def _lit(self, node):
+        if self.exprs is not None:
+            self.exprs.literal(node)
+        return node
+
+    def _use(self, name: str) -> Id:
+        """Id de um uso do nome (compartilhado por declaração no modo DAG)."""
+        if self.exprs is None:
+            return self.interner.ident(name)
+        return self.exprs.ident(name)
 
     def visitProgram(self, ctx):
         """program: block;"""
         block = self.visit(ctx.block())
-        return Program(block)
+        prog = Program(block)
+        if self.exprs is not None:
+            prog.exprs = self.exprs
+        return prog
 
     def visitBlock(self, ctx):
         """block: LBRACE stmts RBRACE;"""
         stmts = None
+        if self.exprs is not None:
+            self.exprs.push()
         if ctx.stmts():
             stmts = self.visit(ctx.stmts())
-        return Block(stmts)
+        if self.exprs is not None:
+            self.exprs.pop()
+        block = Block(stmts)
+        block.pos = (ctx.start.line, ctx.start.column)
+        return block
 
     def visitStmts(self, ctx):
         """stmts: stmt+;"""
@@ -43,26 +81,31 @@ class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
         """stmt: block | decl | print_stmt | if_stmt | while_stmt | do_while_stmt | expr_stmt;"""
         if ctx.block():
             return self.visit(ctx.block())
+        node = None
         if ctx.decl():
-            return self.visit(ctx.decl())
-        if ctx.print_stmt():
-            return self.visit(ctx.print_stmt())
-        if ctx.if_stmt():
-            return self.visit(ctx.if_stmt())
-        if ctx.while_stmt():
-            return self.visit(ctx.while_stmt())
-        if ctx.do_while_stmt():
-            return self.visit(ctx.do_while_stmt())
-        if ctx.expr_stmt():
-            return self.visit(ctx.expr_stmt())
-        return None
+            node = self.visit(ctx.decl())
+        elif ctx.print_stmt():
+            node = self.visit(ctx.print_stmt())
+        elif ctx.if_stmt():
+            node = self.visit(ctx.if_stmt())
+        elif ctx.while_stmt():
+            node = self.visit(ctx.while_stmt())
+        elif ctx.do_while_stmt():
+            node = self.visit(ctx.do_while_stmt())
+        elif ctx.expr_stmt():
+            node = self.visit(ctx.expr_stmt())
+        if node is not None:
+            node.pos = (ctx.start.line, ctx.start.column)
+        return node
 
     def visitDecl(self, ctx):
         """decl: (CONST)? type_spec ID (LBRACK RBRACK)? (ASSIGN expr)? SEMI;"""
         is_const = ctx.CONST() is not None
         type_spec = ctx.type_spec().getText()
         is_array = ctx.LBRACK() is not None
-        id_node = Id(ctx.ID().getText())
+        id_node = self.interner.ident(ctx.ID().getText())
+        if self.exprs is not None:
+            self.exprs.declare(id_node.nid)   # o init já enxerga a declaração (como em sema)
         init_expr = None
         if ctx.expr():
             init_expr = self.visit(ctx.expr())
@@ -114,7 +157,7 @@ class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
         logicals = ctx.logical_and()
         node = self.visit(logicals[0])
         for i in range(1, len(logicals)):
-            node = Lg("||", node, self.visit(logicals[i]))
+            node = self._mk(Lg, "||", node, self.visit(logicals[i]))
         return node
 
     def visitLogical_and(self, ctx):
@@ -122,7 +165,7 @@ class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
         equalities = ctx.equality()
         node = self.visit(equalities[0])
         for i in range(1, len(equalities)):
-            node = Lg("&&", node, self.visit(equalities[i]))
+            node = self._mk(Lg, "&&", node, self.visit(equalities[i]))
         return node
 
     def visitEquality(self, ctx):
@@ -140,7 +183,7 @@ class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
                     ops.append(text)
         
         for i, op in enumerate(ops):
-            node = Eq(op, node, self.visit(relationals[i + 1]))
+            node = self._mk(Eq, op, node, self.visit(relationals[i + 1]))
         return node
 
     def visitRelational(self, ctx):
@@ -159,7 +202,7 @@ class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
         
         for i, op in enumerate(ops):
             # Mantém operador como está (não converte para ≤)
-            node = Rel(op, node, self.visit(additives[i + 1]))
+            node = self._mk(Rel, op, node, self.visit(additives[i + 1]))
         return node
 
     def visitAdditive(self, ctx):
@@ -177,7 +220,7 @@ class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
                     ops.append(text)
         
         for i, op in enumerate(ops):
-            node = Ari(op, node, self.visit(multiplicatives[i + 1]))
+            node = self._mk(Ari, op, node, self.visit(multiplicatives[i + 1]))
         return node
 
     def visitMultiplicative(self, ctx):
@@ -195,40 +238,40 @@ class ASTBuilder(MiniLangVisitor if MiniLangVisitor else object):
                     ops.append(text)
         
         for i, op in enumerate(ops):
-            node = Ari(op, node, self.visit(unaries[i + 1]))
+            node = self._mk(Ari, op, node, self.visit(unaries[i + 1]))
         return node
 
     def visitUnary(self, ctx):
         """unary: (NOT | MINUS) unary | primary;"""
         if ctx.NOT():
-            return Unary("!", self.visit(ctx.unary()))
+            return self._mk(Unary, "!", self.visit(ctx.unary()))
         if ctx.MINUS():
             unary_part = self.visit(ctx.unary())
             if isinstance(unary_part, Num):
-                return Num(-unary_part.value)
-            return Unary("-", unary_part)
+                return self._lit(self.interner.num(-unary_part.value))
+            return self._mk(Unary, "-", unary_part)
         return self.visit(ctx.primary())
 
     def visitPrimary(self, ctx):
         """primary: NUM | TRUE | FALSE | ID (LBRACK expr RBRACK)? | LPAREN expr RPAREN | NEW type_spec LBRACK expr RBRACK;"""
         if ctx.NUM():
-            return Num(int(ctx.NUM().getText()))
+            return self._lit(self.interner.num_text(ctx.NUM().getText()))
         if ctx.TRUE():
-            return Bool(True)
+            return self._lit(self.interner.boolean(True))
         if ctx.FALSE():
-            return Bool(False)
+            return self._lit(self.interner.boolean(False))
         if ctx.ID():
-            id_text = ctx.ID().getText()
+            ident = self._use(ctx.ID().getText())
             if ctx.LBRACK():
                 # ID[expr]
                 idx = self.visit(ctx.expr())
-                return ArrayRef(Id(id_text), idx)
-            return Id(id_text)
+                return self._mk(ArrayRef, ident, idx)
+            return ident
         if ctx.NEW():
             # new type_spec[expr]
             base = ctx.type_spec().getText()
             size = self.visit(ctx.expr())
-            return NewArray(base, size)
+            return self._mk(NewArray, base, size)
         # LPAREN expr RPAREN
         if ctx.expr():
             return self.visit(ctx.expr())
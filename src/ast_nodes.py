@@ -1,27 +1,99 @@
 # -*- coding: utf-8 -*-
 """
 Classes para representar a Árvore Sintática Abstrata (AST) da MiniLang.
+
+Todos os nós derivam de `Node`, usam `__slots__` (sem `__dict__` por
+instância) e carregam uma tag inteira `kind` (constantes K_*), que os
+backends usam para despachar por tabela em vez de cadeias de isinstance.
+
+Nós de expressão têm ainda slots de anotação preenchidos por
+`check_semantics` (`ty`: tipo resolvido, p.ex. "int" ou "bool[]"; `sym`:
+símbolo resolvido, só em `Id`). Statements têm o slot `dead`: arrays que
+deixam de ser usados logo após o statement (ver dataflow.mark_dead_arrays),
+e `pos`: (linha, coluna) do início do statement no texto, preenchido pelo
+front end (linha a partir de 1, coluna a partir de 0, como o ANTLR).
+Expressões não têm posição: literais e `Id`s são compartilhados.
+`Program.exprs` aponta para a `hashcons.ExprTable` quando as expressões
+foram construídas como DAG.
+Eles não fazem parte do construtor nem da comparação, e valem None
+enquanto a análise semântica não rodar.
 """
-from dataclasses import dataclass, is_dataclass
-from typing import Optional, List, Any
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Optional, List, Any, ClassVar, Dict, Tuple
 
 
 # =========================================================
-# AST Node Classes
+# Tags de tipo de nó
 # =========================================================
 
-@dataclass
-class Program:
+(K_PROGRAM, K_BLOCK, K_DECL, K_EVAL, K_PRINT, K_IF, K_WHILE, K_DO, K_ASSIGN,
+ K_REL, K_EQ, K_LG, K_UNARY, K_ARI, K_NEWARRAY, K_ARRAYREF, K_NUM, K_BOOL,
+ K_ID) = range(19)
+
+N_KINDS = 19
+
+
+# Slots de anotação (não são campos da dataclass)
+ANNOTATIONS = ("ty", "sym", "dead", "pos", "exprs")
+
+
+class Node:
+    """Base comum dos nós da AST."""
+    __slots__ = ()
+    kind: ClassVar[int] = -1
+
+    @property
+    def key(self) -> int:
+        """
+        Identidade do nó para caches por nó. Aqui é o próprio `id`; as visões
+        de arena.py são recriadas a cada acesso e devolvem o índice na arena
+        (combinado com a identidade da arena).
+        """
+        return id(self)
+
+    def __getattr__(self, attr):
+        # Só é chamado quando o slot ainda não foi atribuído
+        if attr in ANNOTATIONS:
+            return None
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{attr}'")
+
+
+def _node(kind: int, annotations=()):
+    """
+    Decorador: transforma a classe em dataclass com `__slots__` e tag `kind`.
+    (Equivalente a `dataclass(slots=True)`, que só existe a partir do Python 3.10.)
+    `annotations` são slots extras (ver ANNOTATIONS) fora dos campos.
+    """
+    def wrap(cls):
+        cls = dataclass(cls)
+        names = tuple(f.name for f in fields(cls))
+        ns = {k: v for k, v in cls.__dict__.items()
+              if k not in names and k not in ("__dict__", "__weakref__")}
+        ns["__slots__"] = names + tuple(annotations)
+        ns["kind"] = kind
+        new_cls = type(cls)(cls.__name__, cls.__bases__, ns)
+        new_cls.__qualname__ = cls.__qualname__
+        NODE_CLASSES[kind] = new_cls
+        return new_cls
+    return wrap
+
+
+# Classe de nó indexada pela tag `kind`
+NODE_CLASSES: List[Any] = [None] * N_KINDS
+
+
+@_node(K_PROGRAM, ("exprs",))
+class Program(Node):
     block: "Block"
 
 
-@dataclass
-class Block:
+@_node(K_BLOCK, ("dead", "pos"))
+class Block(Node):
     stmts: Optional[object]  # List[stmt] ou None
 
 
-@dataclass
-class Decl:
+@_node(K_DECL, ("dead", "pos"))
+class Decl(Node):
     typ: str               # "int" | "bool"
     is_array: bool
     is_const: bool
@@ -29,97 +101,174 @@ class Decl:
     init: Optional[object] = None  # expr ou NewArray
 
 
-@dataclass
-class Eval:
+@_node(K_EVAL, ("dead", "pos"))
+class Eval(Node):
     expr: object
 
 
-@dataclass
-class Print:
+@_node(K_PRINT, ("dead", "pos"))
+class Print(Node):
     args: List[object]     # List[expr]
 
 
-@dataclass
-class If:
+@_node(K_IF, ("dead", "pos"))
+class If(Node):
     cond: object           # expr
     then_stmt: object      # stmt
     else_stmt: Optional[object] = None  # stmt ou None
 
 
-@dataclass
-class While:
+@_node(K_WHILE, ("dead", "pos"))
+class While(Node):
     cond: object           # expr
     body: object           # stmt
 
 
-@dataclass
-class Do:
+@_node(K_DO, ("dead", "pos"))
+class Do(Node):
     body: object           # stmt
     cond: object           # expr
 
 
-@dataclass
-class Assign:
+@_node(K_ASSIGN, ("ty", "dead"))
+class Assign(Node):
     left: object           # Id | ArrayRef
     right: object          # expr
 
 
-@dataclass
-class Rel:
+@_node(K_REL, ("ty",))
+class Rel(Node):
     op: str                # '<' | '≤'
     left: object           # expr
     right: object          # expr
 
 
-@dataclass
-class Eq:
+@_node(K_EQ, ("ty",))
+class Eq(Node):
     op: str                # '==' | '!='
     left: object           # expr
     right: object          # expr
 
 
-@dataclass
-class Lg:
+@_node(K_LG, ("ty",))
+class Lg(Node):
     op: str                # '||' | '&&'
     left: object           # expr
     right: object          # expr
 
 
-@dataclass
-class Unary:
+@_node(K_UNARY, ("ty",))
+class Unary(Node):
     op: str                # '-' | '!'
     expr: object           # expr
 
 
-@dataclass
-class Ari:
+@_node(K_ARI, ("ty",))
+class Ari(Node):
     op: str                # '+' | '-' | '*' | '/'
     left: object           # expr
     right: object          # expr
 
 
-@dataclass
-class NewArray:
+@_node(K_NEWARRAY, ("ty",))
+class NewArray(Node):
     base: str              # 'int' | 'bool'
     size: object           # expr (deve ser int)
 
 
-@dataclass
-class ArrayRef:
+@_node(K_ARRAYREF, ("ty",))
+class ArrayRef(Node):
     id: "Id"
     index: object          # expr (deve ser int)
 
 
-@dataclass
-class Num:
+@_node(K_NUM, ("ty",))
+class Num(Node):
     value: int
 
 
-@dataclass
-class Bool:
+@_node(K_BOOL, ("ty",))
+class Bool(Node):
     value: bool
 
 
-@dataclass
-class Id:
+@_node(K_ID, ("ty", "sym"))
+class Id(Node):
     name: str
+    nid: int = -1          # id do nome no Interner (-1: não internado)
+
+
+# =========================================================
+# Percursos sem recursão
+# =========================================================
+
+def expr_kids(e) -> Tuple[Any, ...]:
+    """Subexpressões de `e` (o destino de uma atribuição não entra, só seu índice)."""
+    k = e.kind
+    if k in (K_ARI, K_REL, K_EQ, K_LG):
+        return (e.left, e.right)
+    if k == K_UNARY:
+        return (e.expr,)
+    if k == K_NEWARRAY:
+        return (e.size,)
+    if k == K_ARRAYREF:
+        return (e.index,)
+    if k == K_ASSIGN:
+        if e.left.kind == K_ID:
+            return (e.right,)
+        if e.left.kind == K_ARRAYREF:
+            return (e.left.index, e.right)
+        return (e.left, e.right)
+    return ()
+
+
+def expr_at_least(root, height: int) -> bool:
+    """
+    A expressão `root` tem altura >= `height`? Desce nível a nível e para
+    ao chegar lá: bem mais barato que `expr_height` para o caso comum, de
+    expressões rasas.
+    """
+    level = [root]
+    for _ in range(height - 1):
+        below = []
+        for e in level:
+            k = e.kind
+            if k >= K_NUM:              # folhas (Num, Bool, Id)
+                continue
+            if k == K_UNARY:
+                below.append(e.expr)
+            elif k == K_NEWARRAY:
+                below.append(e.size)
+            elif k == K_ARRAYREF:
+                below.append(e.index)
+            elif k == K_ASSIGN:
+                below.extend(expr_kids(e))
+            else:
+                below.append(e.left)
+                below.append(e.right)
+        if not below:
+            return False
+        level = below
+    return True
+
+
+def expr_height(root, heights: Dict[int, int]) -> int:
+    """
+    Altura da expressão `root` (folha: 1), calculada com pilha explícita.
+    `heights` recebe a altura de cada subexpressão (por `key`) e serve de
+    memo entre chamadas, o que também cobre nós compartilhados (DAG).
+    """
+    stack = [root]
+    while stack:
+        e = stack[-1]
+        if e.key in heights:
+            stack.pop()
+            continue
+        kids = expr_kids(e)
+        pending = [k for k in kids if k.key not in heights]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        heights[e.key] = 1 + max((heights[k.key] for k in kids), default=0)
+    return heights[root.key]
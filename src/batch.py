@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Verificação semântica em lote, para validar muitos arquivos .min.
+
+Cada arquivo é independente (parse ANTLR + `check_semantics`), então o
+trabalho é distribuído em um `ProcessPoolExecutor`, em pedaços de vários
+arquivos por tarefa para diluir o custo de enviar tarefas e resultados
+entre processos. Cada processo lê o próprio arquivo; só os caminhos e os
+resultados (`FileResult`) atravessam a fronteira.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .interner import Interner
+from .reparse import parse_antlr
+from .sema import SemanticError, check_semantics
+
+
+OK = "ok"
+SYNTAX = "syntax"
+SEMANTIC = "semantic"
+ERROR = "error"          # falha inesperada (arquivo ilegível, recursão, erro interno, ...)
+
+
+@dataclass
+class FileResult:
+    """
+    Resultado da verificação de um arquivo. As posições seguem o `pos` dos
+    statements: linha a partir de 1, coluna a partir de 0 (a do ANTLR).
+    """
+    path: str
+    status: str
+    message: str = ""                # primeiro erro
+    line: Optional[int] = None       # posição do primeiro erro (semântico: do statement)
+    column: Optional[int] = None
+    errors: List[Dict[str, Any]] = field(default_factory=list)   # todos: message/line/column
+    n_decls: int = 0
+    size: int = 0                    # bytes do arquivo
+    cpu_seconds: float = 0.0         # tempo de CPU do processo que verificou
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class BatchReport:
+    """Resultados por arquivo (na ordem de entrada) e vazão agregada."""
+    results: List[FileResult] = field(default_factory=list)
+    seconds: float = 0.0             # tempo de parede do lote
+    workers: int = 1
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        out = {OK: 0, SYNTAX: 0, SEMANTIC: 0, ERROR: 0}
+        for r in self.results:
+            out[r.status] += 1
+        return out
+
+    @property
+    def ok(self) -> bool:
+        return all(r.status == OK for r in self.results)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(r.size for r in self.results)
+
+    @property
+    def cpu_seconds(self) -> float:
+        """Soma dos tempos de CPU por arquivo (o que um processo só gastaria)."""
+        return sum(r.cpu_seconds for r in self.results)
+
+    def stats(self) -> Dict[str, Any]:
+        secs = self.seconds or 1e-9
+        return {
+            "files": len(self.results),
+            **self.counts,
+            "workers": self.workers,
+            "seconds": round(self.seconds, 3),
+            "files_per_second": round(len(self.results) / secs, 1),
+            "mb_per_second": round(self.total_bytes / secs / 1e6, 3),
+            # CPU útil / parede: ~processos se escala bem, < 1 com overhead
+            "parallelism": round(self.cpu_seconds / secs, 2),
+        }
+
+
+def check_file(path: str, all_errors: bool = False) -> FileResult:
+    """
+    Parseia e verifica um arquivo; nunca levanta exceção: qualquer falha
+    que não seja erro de sintaxe ou semântico vira status ERROR. Com
+    `all_errors`, coleta todos os erros semânticos em uma passada (ver
+    `check_semantics`).
+    """
+    t0 = time.process_time()
+    result = FileResult(str(path), OK)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+        result.size = len(source.encode("utf-8"))
+        prog, _ = parse_antlr(source, Interner())
+        errors: Optional[List[SemanticError]] = [] if all_errors else None
+        try:
+            result.n_decls = len(check_semantics(prog, errors))
+        except SemanticError as e:
+            errors = [e]
+        if errors:
+            for e in errors:
+                pos = e.node.pos if e.node is not None else None
+                line, col = pos if pos is not None else (None, None)
+                result.errors.append({"message": str(e), "line": line, "column": col})
+            result.status = SEMANTIC
+            first = result.errors[0]
+            result.message, result.line, result.column = first["message"], first["line"], first["column"]
+    except SyntaxError as e:
+        result.status = SYNTAX
+        col = e.offset - 1 if e.offset is not None else None    # offset: a partir de 1
+        result.line, result.column = e.lineno, col
+        prefix = f"linha {e.lineno}:{col} "
+        result.message = e.msg[len(prefix):] if e.msg.startswith(prefix) else e.msg
+        result.errors.append({"message": result.message, "line": e.lineno, "column": col})
+    except Exception as e:
+        result.status = ERROR
+        result.message = f"{type(e).__name__}: {e}"
+    result.cpu_seconds = time.process_time() - t0
+    return result
+
+
+def collect_files(paths: Iterable[str]) -> List[str]:
+    """Expande diretórios em seus arquivos .min (recursivo, em ordem)."""
+    out: List[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            out.extend(str(f) for f in sorted(Path(p).rglob("*.min")))
+        else:
+            out.append(str(p))
+    return out
+
+
+def check_files(paths: Iterable[str], workers: Optional[int] = None,
+                chunksize: Optional[int] = None, all_errors: bool = False) -> BatchReport:
+    """
+    Verifica `paths` em `workers` processos (padrão: um por CPU). Os
+    arquivos vão para os processos em pedaços de `chunksize` (padrão:
+    ~4 pedaços por processo). Com `workers=1` roda no próprio processo.
+    `all_errors`: todos os erros semânticos de cada arquivo, não só o primeiro.
+    """
+    check = partial(check_file, all_errors=all_errors)
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths) or 1))
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [check(p) for p in paths]
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(check, paths, chunksize=chunksize))
+    return BatchReport(results, time.perf_counter() - t0, workers)
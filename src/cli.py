@@ -8,19 +8,27 @@ Aceita um arquivo .min como argumento e executa o pipeline completo:
 3. AST Building
 4. Semantic Analysis
 5. Interpretation + Code Generation
+
+Subcomando `check`: só parse + análise semântica de muitos arquivos em
+paralelo (ver batch.py), com um resultado por arquivo e a vazão do lote.
 """
 
 import sys
 import os
 import argparse
 from pathlib import Path
+from typing import Optional
 
 # Imports locais
 from src.ast_nodes import Program, Block
 from src.pretty import print_ast_ascii
 from src.sema import check_semantics, print_symtab, SemanticError
 from src.interp import exec_program, RuntimeErrorLang
-from src.codegen import codegen_python, exec_generated_python
+from src.codegen import SourceMap, codegen_python, exec_generated_python
+from src.intmodel import BIGINT, INT_MODELS
+from src.limits import ExecLimits, LimitExceeded
+from src.output import DEFAULT_BUFFER_SIZE, OutputSink, TraceSink
+from src.profiler import Profile
 
 
 def generate_antlr_code():
@@ -54,9 +62,16 @@ def generate_antlr_code():
         return False
 
 
-def compile_and_run(input_file: str, trace: bool = False, codegen_mode: bool = False):
+def compile_and_run(input_file: str, trace: bool = False, codegen_mode: bool = False,
+                    dag: bool = False, vectorize: bool = False, int_model: str = BIGINT,
+                    out_buffer: int = DEFAULT_BUFFER_SIZE, trace_file: Optional[str] = None,
+                    limits: Optional[ExecLimits] = None, profile_top: Optional[int] = None,
+                    source_map_file: Optional[str] = None):
     """
-    Compila e executa um arquivo MiniLang.
+    Compila e executa um arquivo MiniLang. Com `profile_top`, o intérprete
+    roda com profiler e imprime os `profile_top` statements mais quentes.
+    O código gerado roda com as linhas do arquivo MiniLang (ver SourceMap);
+    `source_map_file` recebe o mapa em JSON.
     """
     input_path = Path(input_file)
 
@@ -92,7 +107,13 @@ def compile_and_run(input_file: str, trace: bool = False, codegen_mode: bool = F
 
         # ===== FASE 2: AST Building =====
         print("[2/5] Construção da AST...")
-        builder = ASTBuilder()
+        if dag:
+            from src.interner import Interner
+            from src.hashcons import ExprTable
+            interner = Interner()
+            builder = ASTBuilder(interner, ExprTable(interner, int_model))
+        else:
+            builder = ASTBuilder()
         ast = builder.visit(parse_tree)
 
         if ast is None:
@@ -102,7 +123,7 @@ def compile_and_run(input_file: str, trace: bool = False, codegen_mode: bool = F
         # ===== FASE 3: Análise Semântica =====
         print("[3/5] Análise Semântica...")
         try:
-            symtab = check_semantics(ast)
+            symtab = check_semantics(ast, int_model=int_model)
         except SemanticError as e:
             print(f"Erro Semântico: {e}")
             return False
@@ -119,14 +140,33 @@ def compile_and_run(input_file: str, trace: bool = False, codegen_mode: bool = F
         print("\n[4/5] Execução (Intérprete)...")
         print("--- Saída do Intérprete ---")
         try:
-            env_interp = exec_program(ast, trace=trace)
-        except RuntimeErrorLang as e:
+            sink = OutputSink(buffer_size=out_buffer)
+            profiler = Profile() if profile_top is not None else None
+            if trace_file:
+                # eventos do trace (JSON lines) no arquivo; a saída continua no stdout
+                with open(trace_file, "w", encoding="utf-8") as f:
+                    env_interp = exec_program(ast, vectorize=vectorize, int_model=int_model,
+                                              out=sink, tracer=TraceSink(OutputSink(f)),
+                                              limits=limits)
+            else:
+                env_interp = exec_program(ast, trace=trace, vectorize=vectorize,
+                                          int_model=int_model, out=sink, limits=limits,
+                                          profiler=profiler)
+        except (RuntimeErrorLang, LimitExceeded) as e:
             print(f"Erro em Tempo de Execução: {e}")
             return False
+        finally:
+            if profiler is not None:
+                print(f"\n--- Perfil do Intérprete ({profiler.elapsed * 1e3:.1f} ms) ---")
+                print(profiler.report(profile_top, source_code))
 
         # ===== FASE 5: Geração de Código e Execução =====
         print("\n[5/5] Geração de Código Python...")
-        py_code = codegen_python(ast)
+        srcmap = SourceMap()
+        py_code = codegen_python(ast, int_model, budget=limits is not None, srcmap=srcmap)
+        if source_map_file:
+            with open(source_map_file, "w", encoding="utf-8") as f:
+                f.write(srcmap.to_json(source=str(input_path)))
 
         if codegen_mode:
             print("\n--- Código Python Gerado ---")
@@ -134,9 +174,12 @@ def compile_and_run(input_file: str, trace: bool = False, codegen_mode: bool = F
 
         print("\n--- Saída do Código Gerado ---")
         try:
-            env_codegen = exec_generated_python(py_code)
+            env_codegen = exec_generated_python(py_code, out=OutputSink(buffer_size=out_buffer),
+                                                limits=limits, srcmap=srcmap, filename=str(input_path))
         except Exception as e:
-            print(f"Erro ao Executar Código Gerado: {e}")
+            line = _error_line(e, str(input_path))
+            where = f" (linha {line})" if line is not None else ""
+            print(f"Erro ao Executar Código Gerado{where}: {e}")
             return False
 
         print("\n=== COMPILAÇÃO BEM-SUCEDIDA ===")
@@ -149,7 +192,66 @@ def compile_and_run(input_file: str, trace: bool = False, codegen_mode: bool = F
         return False
 
 
+def _error_line(exc: BaseException, filename: str) -> Optional[int]:
+    """Linha MiniLang do frame mais interno do código gerado no traceback de `exc`."""
+    line = None
+    tb = exc.__traceback__
+    while tb is not None:
+        if tb.tb_frame.f_code.co_filename == filename:
+            line = tb.tb_lineno
+        tb = tb.tb_next
+    return line
+
+
+def check_batch(argv) -> int:
+    """Subcomando `check`: verifica arquivos/diretórios em lote. Retorna o exit code."""
+    import json
+    from src.batch import OK, SEMANTIC, SYNTAX, check_files, collect_files
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py check",
+        description="Verificação sintática e semântica em lote (sem executar)"
+    )
+    parser.add_argument("paths", nargs="+", help="Arquivos .min ou diretórios")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Processos (padrão: um por CPU)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Arquivos por tarefa enviada a cada processo")
+    parser.add_argument("--all-errors", action="store_true",
+                        help="Reporta todos os erros semânticos de cada arquivo")
+    parser.add_argument("--json", action="store_true",
+                        help="Imprime resultados e estatísticas em JSON")
+    args = parser.parse_args(argv)
+
+    report = check_files(collect_files(args.paths), workers=args.jobs,
+                         chunksize=args.chunksize, all_errors=args.all_errors)
+    if args.json:
+        print(json.dumps({"results": [r.to_dict() for r in report.results],
+                          "stats": report.stats()}, ensure_ascii=False, indent=2))
+    else:
+        for r in report.results:
+            if r.status == OK:
+                print(f"OK    {r.path}")
+            elif r.status == SYNTAX:
+                print(f"ERRO  {r.path}:{r.line}:{r.column}: Erro Sintático: {r.message}")
+            elif r.status == SEMANTIC:
+                for e in r.errors:
+                    print(f"ERRO  {r.path}:{e['line']}:{e['column']}: Erro Semântico: {e['message']}")
+            else:
+                print(f"ERRO  {r.path}: {r.message}")
+        s = report.stats()
+        print(f"\n{s['files']} arquivos: {s[OK]} ok, {s['syntax']} sintáticos, "
+              f"{s['semantic']} semânticos, {s['error']} outros")
+        print(f"{s['seconds']:.3f}s com {s['workers']} processo(s): "
+              f"{s['files_per_second']} arquivos/s, {s['mb_per_second']} MB/s, "
+              f"paralelismo efetivo {s['parallelism']}")
+    return 0 if report.ok else 1
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        sys.exit(check_batch(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(description="Compilador MiniLang")
     parser.add_argument(
         "input_file",
@@ -164,13 +266,67 @@ def main():
     parser.add_argument(
         "--trace",
         action="store_true",
-        help="Executa com trace (debug)"
+        help="Executa com trace (debug): eventos em JSON lines, entre as linhas da saída"
+    )
+    parser.add_argument(
+        "--trace-file",
+        metavar="ARQUIVO",
+        help="Grava os eventos do trace (JSON lines) em ARQUIVO em vez do stdout"
     )
     parser.add_argument(
         "--codegen",
         action="store_true",
         help="Imprime código Python gerado"
     )
+    parser.add_argument(
+        "--dag",
+        action="store_true",
+        help="Compartilha subexpressões iguais na AST (hash-consing)"
+    )
+    parser.add_argument(
+        "--numpy",
+        action="store_true",
+        help="Intérprete com arrays numpy e laços simples vetorizados (requer numpy)"
+    )
+    parser.add_argument(
+        "--int-model",
+        choices=INT_MODELS,
+        default=BIGINT,
+        help="Aritmética de int: sem limite (padrão), 64 bits com wraparound ou com erro no overflow"
+    )
+    parser.add_argument(
+        "--out-buffer",
+        type=int,
+        default=DEFAULT_BUFFER_SIZE,
+        metavar="N",
+        help=f"Buffer da saída dos print, em caracteres (padrão: {DEFAULT_BUFFER_SIZE}; 0: linha a linha)"
+    )
+
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        metavar="N",
+        help="Orçamento de iterações de laço por execução (erro ao passar de N)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SEG",
+        help="Prazo de cada execução, em segundos (verificado nas voltas de laço)"
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        nargs="?",
+        const=10,
+        metavar="N",
+        help="Profiler do intérprete: imprime os N statements com mais tempo (padrão: 10)"
+    )
+    parser.add_argument(
+        "--source-map",
+        metavar="ARQUIVO",
+        help="Grava em ARQUIVO (JSON) a linha/coluna MiniLang de cada linha do código gerado"
+    )
 
     args = parser.parse_args()
 
@@ -181,8 +337,17 @@ def main():
     if not args.input_file:
         parser.print_help()
         return
+    if args.profile is not None and (args.trace or args.trace_file):
+        parser.error("--profile não pode ser usado com --trace/--trace-file")
+
+    limits = None
+    if args.max_steps is not None or args.timeout is not None:
+        limits = ExecLimits(max_steps=args.max_steps, timeout=args.timeout)
 
-    compile_and_run(args.input_file, trace=args.trace, codegen_mode=args.codegen)
+    compile_and_run(args.input_file, trace=args.trace, codegen_mode=args.codegen,
+                    dag=args.dag, vectorize=args.numpy, int_model=args.int_model,
+                    out_buffer=args.out_buffer, trace_file=args.trace_file, limits=limits,
+                    profile_top=args.profile, source_map_file=args.source_map)
 
 
 if __name__ == "__main__":
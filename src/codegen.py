@@ -1,159 +1,506 @@
 # -*- coding: utf-8 -*-
 """
 Gerador de Código: converte AST para código Python.
+
+Requer a AST anotada por `check_semantics`: cada variável MiniLang vira
+uma variável local Python própria (nome + número do símbolo, o que já
+resolve sombreamento), e como os tipos são conhecidos estaticamente o
+código gerado não faz coerções (int()/bool()) nem buscas por nome.
+
+Arrays são `arrays.Array` (buffer compacto em `.data`), criados por
+`__ml_new_array`, que `exec_generated_python` põe no namespace do código.
+Nos modelos de int de 64 bits (ver intmodel.py) cada `+ - * /` e `-`
+unário passa por `__ml_wrap` ou `__ml_trap`, também postos lá. Os `print`
+viram chamadas a `__ml_print`, o `print` de um `output.OutputSink`.
+
+Com `budget=True`, cada volta de laço desconta um passo de `__ml_fuel`
+(local de `__ml_run`) e só chama `__ml_meter.refill` quando ele zera; o
+`limits.Meter` vem de `exec_generated_python(..., limits=...)`. Laços sem
+laço dentro rodam em fatias `for __ml_k in range(__ml_fuel)`, e o custo por
+volta é só o do `for`; os outros descontam um passo por volta (o corpo já
+custa pelo menos um laço interno).
+
+Com `srcmap`, a primeira linha do código de cada statement é marcada com o
+`pos` que o front end deixou nele, e `codegen_python` preenche um
+`SourceMap` (linha Python -> linha/coluna MiniLang do statement mais
+interno que gerou a linha); sem `srcmap` nada é marcado. E
+`exec_generated_python(..., srcmap=...)` compila o código com as linhas
+MiniLang no lugar das Python: tracebacks, cProfile e profilers por
+amostragem já apontam para o programa MiniLang.
 """
-from typing import Dict, Any, Optional
+import ast
+import gc
+import json
+from typing import Dict, Any, Optional, Tuple
 from .ast_nodes import *
+from .arrays import new_array
+from .intmodel import BIGINT, WRAP, check_model, trap64, wrap64
+from .limits import ExecLimits, Meter
+from .output import OutputSink
+
+
+class SourceMap:
+    """
+    Linha do código gerado (a partir de 1) -> (linha, coluna) MiniLang do
+    statement que a gerou. As linhas do cabeçalho de `__ml_run` não entram.
+    """
+
+    def __init__(self):
+        self.lines: Dict[int, Tuple[int, int]] = {}
+
+    def __len__(self):
+        return len(self.lines)
 
+    def lookup(self, py_line: int) -> Optional[Tuple[int, int]]:
+        return self.lines.get(py_line)
 
-def codegen_python(prog: Program) -> str:
-    """Gera código Python a partir da AST."""
+    def to_json(self, **extra: Any) -> str:
+        """{"lines": {"linha python": [linha, coluna], ...}, **extra}"""
+        lines = {str(n): list(pos) for n, pos in sorted(self.lines.items())}
+        return json.dumps({**extra, "lines": lines}, ensure_ascii=False)
+
+
+class _Line(str):
+    """
+    Primeira linha do código de um ou mais statements: `spans` tem (pos,
+    quantidade de linhas) de cada um, do mais externo para o mais interno.
+    """
+
+
+def codegen_python(prog: Program, int_model: str = BIGINT, budget: bool = False,
+                   srcmap: Optional[SourceMap] = None) -> str:
+    """
+    Gera código Python a partir da AST (com `budget`, contando as voltas de
+    laço). Com `srcmap`, registra nele a origem de cada linha gerada.
+    """
+    check_model(int_model)
     out = []
     out.append("def __ml_run(env=None):")
-    out.append("    frames = [env if isinstance(env, dict) else {}]")
-    out.append("    def push(): frames.append({})")
-    out.append("    def pop(): frames.pop()")
-    out.append("    def declare(name, val): frames[-1][name] = val")
-    out.append("    def get(name):")
-    out.append("        for d in reversed(frames):")
-    out.append("            if name in d: return d[name]")
-    out.append("        raise NameError(f'Variável não encontrada: {name}')")
-    out.append("    def setvar(name, val):")
-    out.append("        for d in reversed(frames):")
-    out.append("            if name in d: d[name]=val; return val")
-    out.append("        frames[-1][name]=val; return val")
-    out.extend(_cg_stmt(prog.block, indent="    "))
-    out.append("    return frames[0]")
+    out.append("    env = env if isinstance(env, dict) else {}")
+    if budget:
+        out.append("    __ml_fuel = __ml_meter.start()")
+    out.extend(_cg_stmt(prog.block, "    ", int_model, budget, srcmap is not None))
+    out.append("    return env")
+    if srcmap is not None:
+        _fill_srcmap(out, srcmap)
     return "\n".join(out)
 
 
-def _cg_stmt(node, indent=""):
+def _fill_srcmap(lines, srcmap: SourceMap):
+    """Cada linha fica com o statement mais interno cujo trecho a contém."""
+    open_spans = []         # (pos, índice depois da última linha), aninhados
+    for i, line in enumerate(lines):
+        while open_spans and open_spans[-1][1] <= i:
+            open_spans.pop()
+        if line.__class__ is _Line:
+            open_spans.extend((pos, i + n) for pos, n in line.spans)
+        if open_spans:
+            srcmap.lines[i + 1] = open_spans[-1][0]
+
+
+def _var(ident) -> str:
+    """Nome da variável Python que guarda o símbolo de `ident`."""
+    sym = ident.sym
+    if sym is None:
+        raise RuntimeError(f"Id '{ident.name}' sem símbolo: rode check_semantics antes do codegen.")
+    return f"{sym.name}_{sym.idx}"
+
+
+def _cg_body(node, indent, im, budget, mark):
+    """Corpo de if/while/do: nunca vazio (blocos vazios viram `pass`)."""
+    return _cg_stmt(node, indent, im, budget, mark) or [f"{indent}pass"]
+
+
+def _cg_back_edge(indent: str):
+    """Desconto de um passo na volta do laço."""
+    return [f"{indent}__ml_fuel -= 1",
+            f"{indent}if __ml_fuel <= 0:",
+            f"{indent}    __ml_fuel = __ml_meter.refill(__ml_fuel)"]
+
+
+def _cg_sliced_loop(head, body, tail, indent: str):
+    """
+    Laço em fatias de `__ml_fuel` voltas (só para corpos sem laço, que não
+    mexem em `__ml_fuel`): ao sair na volta `__ml_k`, foram `__ml_k` passos.
+    """
+    inner = indent + "        "
+    return ([f"{indent}while True:",
+             f"{indent}    for __ml_k in range(__ml_fuel):"]
+            + [inner + line for line in head] + body + [inner + line for line in tail]
+            + [f"{indent}    else:",
+               f"{indent}        __ml_fuel = __ml_meter.refill(0)",
+               f"{indent}        continue",
+               f"{indent}    __ml_fuel -= __ml_k",
+               f"{indent}    break"])
+
+
+def _has_loop(node) -> bool:
+    if node is None:
+        return False
+    if isinstance(node, list):
+        return any(_has_loop(s) for s in node)
+    k = node.kind
+    if k == K_WHILE or k == K_DO:
+        return True
+    if k == K_BLOCK:
+        return _has_loop(node.stmts)
+    if k == K_IF:
+        return _has_loop(node.then_stmt) or _has_loop(node.else_stmt)
+    return False
+
+
+def _cg_stmt(node, indent="", im=BIGINT, budget=False, mark=False):
+    out = _cg_stmt_lines(node, indent, im, budget, mark)
+    if not mark or not out or isinstance(node, list) or node.pos is None:
+        return out
+    pos = node.pos
+    first = out[0]
+    if first.__class__ is _Line:
+        first.spans.insert(0, (pos, len(out)))
+    else:
+        first = out[0] = _Line(first)
+        first.spans = [(pos, len(out))]
+    return out
+
+
+def _cg_stmt_lines(node, indent, im, budget, mark):
     out = []
 
     def emit(line):
         out.append(f"{indent}{line}")
 
-    if isinstance(node, Block):
-        emit("push()")
-        out.extend(_cg_stmts(node.stmts, indent))
-        emit("pop()")
-        return out
+    def expr(e):
+        """Código de `e`, com os temporários (se houver) já emitidos."""
+        pre = []
+        code = _cg_expr(e, im, pre)
+        for line in pre:
+            emit(line)
+        return code
+
+    def cond_lines(pre, code):
+        """Linhas que testam a condição do laço e saem dele quando falsa."""
+        return pre + [f"if not {code}:", "    break"]
+
     if isinstance(node, list):
-        out.extend(_cg_stmts(node, indent))
+        out.extend(_cg_stmts(node, indent, im, budget, mark))
         return out
-    if isinstance(node, Decl):
-        default = "None" if node.is_array else ("0" if node.typ == "int" else "False")
-        emit(f"declare('{node.id.name}', {default})")
+    if node.kind == K_BLOCK:
+        out.extend(_cg_stmts(node.stmts, indent, im, budget, mark))
+        return out
+    if node.kind == K_DECL:
         if node.init is not None:
-            emit(f"setvar('{node.id.name}', {_cg_expr(node.init)})")
+            emit(f"{_var(node.id)} = {expr(node.init)}")
+        else:
+            default = "None" if node.is_array else ("0" if node.typ == "int" else "False")
+            emit(f"{_var(node.id)} = {default}")
         return out
-    if isinstance(node, Eval):
-        emit(f"{_cg_expr(node.expr)}  # eval")
+    if node.kind == K_EVAL:
+        if node.expr.kind == K_ASSIGN:
+            out.extend(_cg_stmt(node.expr, indent, im, budget, mark))
+        else:
+            emit(f"{expr(node.expr)}  # eval")
         return out
-    if isinstance(node, Print):
-        # Converte cada argumento, convertendo booleanos para 0/1
+    if node.kind == K_PRINT:
+        # Cada argumento é avaliado uma vez; bool sai como 0/1 pelo tipo
+        # estático. Se falta anotação em algum, ou se algum precisa de
+        # temporários, todos vão para temporários (na ordem, como na chamada).
         args_code = []
-        for a in node.args:
-            arg_expr = _cg_expr(a)
-            # Wrapper para converter True/False para 1/0
-            args_code.append(f"(1 if ({arg_expr}) == True else (0 if ({arg_expr}) == False else ({arg_expr})))")
+        typed = all(a.ty in ("int", "bool") for a in node.args)
+        pres = [[] for _ in node.args]
+        codes = [_cg_expr(a, im, pre) for a, pre in zip(node.args, pres)]
+        spilled = any(pres)
+        for i, a in enumerate(node.args):
+            arg_expr = codes[i]
+            if spilled or not typed:
+                for line in pres[i]:
+                    emit(line)
+                emit(f"__p{i} = {arg_expr}")
+                arg_expr = f"__p{i}"
+            if typed and a.ty == "int":
+                args_code.append(arg_expr)
+            elif typed:
+                args_code.append(f"(1 if {arg_expr} else 0)")
+            else:
+                args_code.append(f"(int(__p{i}) if __p{i}.__class__ is bool else __p{i})")
         args = ", ".join(args_code)
-        emit(f"print({args})")
+        emit(f"__ml_print({args})")
         return out
-    if isinstance(node, If):
-        emit(f"if bool({_cg_expr(node.cond)}):")
-        out.extend(_cg_stmt(node.then_stmt, indent + "    "))
+    if node.kind == K_IF:
+        emit(f"if {expr(node.cond)}:")
+        out.extend(_cg_body(node.then_stmt, indent + "    ", im, budget, mark))
         if node.else_stmt is not None:
             emit("else:")
-            out.extend(_cg_stmt(node.else_stmt, indent + "    "))
+            out.extend(_cg_body(node.else_stmt, indent + "    ", im, budget, mark))
         return out
-    if isinstance(node, While):
-        emit(f"while bool({_cg_expr(node.cond)}):")
-        out.extend(_cg_stmt(node.body, indent + "    "))
+    if node.kind in (K_WHILE, K_DO):
+        # temporários da condição são recalculados a cada volta
+        pre = []
+        cond = _cg_expr(node.cond, im, pre)
+    if node.kind == K_WHILE and budget and not _has_loop(node.body):
+        body = _cg_stmt(node.body, indent + "        ", im, budget, mark)
+        return _cg_sliced_loop(cond_lines(pre, cond), body, [], indent)
+    if node.kind == K_DO and budget and not _has_loop(node.body):
+        body = _cg_stmt(node.body, indent + "        ", im, budget, mark)
+        return _cg_sliced_loop([], body, cond_lines(pre, cond), indent)
+    if node.kind == K_WHILE:
+        if not pre:
+            emit(f"while {cond}:")
+        else:
+            emit("while True:")
+            for line in cond_lines(pre, cond):
+                emit(f"    {line}")
+        out.extend(_cg_body(node.body, indent + "    ", im, budget, mark))
+        if budget:
+            out.extend(_cg_back_edge(indent + "    "))
         return out
-    if isinstance(node, Do):
+    if node.kind == K_DO:
         emit("while True:")
-        out.extend(_cg_stmt(node.body, indent + "    "))
-        emit(f"    if not bool({_cg_expr(node.cond)}):")
-        emit("        break")
+        out.extend(_cg_stmt(node.body, indent + "    ", im, budget, mark))
+        for line in cond_lines(pre, cond):
+            emit(f"    {line}")
+        if budget:
+            out.extend(_cg_back_edge(indent + "    "))
         return out
-    if isinstance(node, Assign):
-        if isinstance(node.left, Id):
-            emit(f"setvar('{node.left.name}', {_cg_expr(node.right)})")
+    if node.kind == K_ASSIGN:
+        if node.left.kind == K_ID:
+            emit(f"{_var(node.left)} = {expr(node.right)}")
         else:
-            name = node.left.id.name
-            idx = _cg_expr(node.left.index)
-            val = _cg_expr(node.right)
-            emit(f"__arr = get('{name}')")
-            emit(f"__idx = int({idx})")
-            emit(f"__n = len(__arr)")
-            emit(f"assert 0 <= __idx < __n, 'Índice fora dos limites: %r' % (__idx,)")
-            emit(f"__arr[__idx] = {val}")
+            arr = _var(node.left.id)
+            emit(f"__idx = {expr(node.left.index)}")
+            emit(f"assert 0 <= __idx < len({arr}.data), 'Índice fora dos limites: %r' % (__idx,)")
+            if node.left.id.sym.typ == "int":
+                # array('q'): valor fora de 64 bits promove o array para lista
+                emit(f"__val = {expr(node.right)}")
+                emit("try:")
+                emit(f"    {arr}.data[__idx] = __val")
+                emit("except OverflowError:")
+                emit(f"    {arr}.promote()[__idx] = __val")
+            else:
+                emit(f"{arr}.data[__idx] = {expr(node.right)}")
         return out
     raise RuntimeError(f"Stmt desconhecido no codegen: {type(node).__name__}")
 
 
-def _cg_stmts(node, indent=""):
+def _cg_stmts(node, indent="", im=BIGINT, budget=False, mark=False):
     out = []
     if node is None:
         return out
     if isinstance(node, list):
         for stmt in node:
-            out.extend(_cg_stmt(stmt, indent))
+            out.extend(_cg_stmt(stmt, indent, im, budget, mark))
+            # arrays mortos a partir daqui (liveness): solta a referência
+            for ident in stmt.dead or ():
+                out.append(f"{indent}{_var(ident)} = None")
         return out
-    out.extend(_cg_stmt(node, indent))
+    out.extend(_cg_stmt(node, indent, im, budget, mark))
     return out
 
 
-def _cg_expr(node):
-    if isinstance(node, Num):
+_SPILL_HEIGHT = 48     # o Python recusa mais de 200 parênteses aninhados
+
+
+def _cg_expr(node, im=BIGINT, pre=None):
+    """
+    Código Python da expressão `node`. Expressões rasas (o caso comum) são
+    montadas por recursão; a partir de _SPILL_HEIGHT, com pilha explícita.
+
+    Com `pre` (lista de linhas), subexpressões com altura a partir de
+    _SPILL_HEIGHT vão para temporários `__tN` atribuídos em `pre`, que quem
+    chama emite antes da linha que usa o resultado: o compilador do Python
+    não aceita expressões tão aninhadas. A ordem de avaliação se mantém:
+    operandos à esquerda de um operando com temporários também viram
+    temporários, e o lado direito de `&&`/`||` com temporários fica dentro
+    de um `if`.
+    """
+    try:
+        return _cg_flat(node, im, _SPILL_HEIGHT)
+    except _Tall:
+        pass
+    heights: Optional[Dict[int, int]] = None
+    if pre is not None:
+        heights = {}
+        expr_height(node, heights)
+
+    def tall(e) -> bool:
+        return heights is not None and heights[e.key] >= _SPILL_HEIGHT
+
+    codes = []          # código dos nós já montados
+    temps = 0
+    indent = ""         # dentro dos `if` de `&&`/`||` em `pre`
+    # (passo, nó, vai para temporário); empilhado em ordem inversa
+    todo = [(_VISIT, node, False)]
+    while todo:
+        op, n, spill = todo.pop()
+        if op == _VISIT:
+            kids = expr_kids(n)
+            if not kids:
+                code = _cg_leaf(n)
+            elif n.kind == K_LG and tall(n.right):
+                todo += ((_LG_END, n, spill), (_VISIT, n.right, False), (_LG_MID, n, False),
+                         (_VISIT, n.left, tall(n.left)))
+                continue
+            else:
+                todo.append((_BUILD, n, spill))
+                later_tall = False
+                for kid in reversed(kids):
+                    todo.append((_VISIT, kid, later_tall or tall(kid)))
+                    later_tall = later_tall or tall(kid)
+                continue
+        elif op == _BUILD:
+            k = len(expr_kids(n))
+            code = _cg_node(n, codes[len(codes) - k:], im)
+            del codes[len(codes) - k:]
+        elif op == _LG_MID:
+            temps += 1
+            name = f"__t{temps}"
+            pre.append(f"{indent}{name} = {codes.pop()}")
+            pre.append(f"{indent}if {name}:" if n.op == "&&" else f"{indent}if not {name}:")
+            indent += "    "
+            codes.append(name)
+            continue
+        else:   # _LG_END: o resultado já está no temporário
+            right = codes.pop()
+            pre.append(f"{indent}{codes[-1]} = {right}")
+            indent = indent[:-4]
+            continue
+        if spill and n.kind not in (K_NUM, K_BOOL):
+            temps += 1
+            pre.append(f"{indent}__t{temps} = {code}")
+            code = f"__t{temps}"
+        codes.append(code)
+    return codes[0]
+
+
+# Passos da pilha de `_cg_expr`
+(_VISIT, _BUILD, _LG_MID, _LG_END) = range(4)
+
+
+class _Tall(Exception):
+    """A expressão passou de _SPILL_HEIGHT: `_cg_expr` usa a pilha explícita."""
+
+
+def _cg_flat(node, im, room: int) -> str:
+    """Código da expressão por recursão, com no máximo `room` níveis."""
+    k = node.kind
+    if k == K_ID:
+        return _var(node)
+    if k >= K_NUM:
+        return _cg_leaf(node)
+    if room == 1:
+        raise _Tall
+    room -= 1
+    if k == K_ARI:
+        op = "//" if node.op == "/" else node.op
+        return _fit(f"({_cg_flat(node.left, im, room)} {op} {_cg_flat(node.right, im, room)})", im)
+    if k == K_REL or k == K_EQ:
+        return f"({_cg_flat(node.left, im, room)} {node.op} {_cg_flat(node.right, im, room)})"
+    return _cg_node(node, [_cg_flat(kid, im, room) for kid in expr_kids(node)], im)
+
+
+def _cg_leaf(node) -> str:
+    if node.kind == K_NUM:
         return str(node.value)
-    if isinstance(node, Bool):
+    if node.kind == K_BOOL:
         return ("True" if node.value else "False")
-    if isinstance(node, Id):
-        return f"get('{node.name}')"
-    if isinstance(node, NewArray):
-        zero = "0" if node.base == "int" else "False"
-        return f"([{zero}] * int({_cg_expr(node.size)}))"
-    if isinstance(node, ArrayRef):
-        return f"get('{node.id.name}')[int({_cg_expr(node.index)})]"
-    if isinstance(node, Unary):
+    if node.kind == K_ID:
+        return _var(node)
+    raise RuntimeError(f"Expr desconhecida no codegen: {type(node).__name__}")
+
+
+def _cg_node(node, kids, im) -> str:
+    """Código de `node` dado o código das subexpressões (na ordem de `expr_kids`)."""
+    if node.kind == K_NEWARRAY:
+        return f"__ml_new_array({node.base!r}, {kids[0]})"
+    if node.kind == K_ARRAYREF:
+        return f"{_var(node.id)}.data[{kids[0]}]"
+    if node.kind == K_UNARY:
         if node.op == "!":
-            return f"(not bool({_cg_expr(node.expr)}))"
+            return f"(not {kids[0]})"
         if node.op == "-":
-            return f"(-({_cg_expr(node.expr)}))"
+            return _fit(f"(-({kids[0]}))", im)
         raise RuntimeError("unário desconhecido")
-    if isinstance(node, Ari):
+    if node.kind == K_ARI:
         op = "//" if node.op == "/" else node.op
-        return f"({_cg_expr(node.left)} {op} {_cg_expr(node.right)})"
-    if isinstance(node, Rel):
-        op = "<=" if node.op == "<=" else node.op
-        return f"({_cg_expr(node.left)} {op} {_cg_expr(node.right)})"
-    if isinstance(node, Eq):
-        return f"({_cg_expr(node.left)} {node.op} {_cg_expr(node.right)})"
-    if isinstance(node, Lg):
+        return _fit(f"({kids[0]} {op} {kids[1]})", im)
+    if node.kind == K_REL or node.kind == K_EQ:
+        return f"({kids[0]} {node.op} {kids[1]})"
+    if node.kind == K_LG:
         if node.op == "||":
-            return f"(bool({_cg_expr(node.left)}) or bool({_cg_expr(node.right)}))"
+            return f"({kids[0]} or {kids[1]})"
         if node.op == "&&":
-            return f"(bool({_cg_expr(node.left)}) and bool({_cg_expr(node.right)}))"
+            return f"({kids[0]} and {kids[1]})"
         raise RuntimeError("lógico desconhecido")
-    if isinstance(node, Assign):
-        if isinstance(node.left, Id):
-            return f"setvar('{node.left.name}', {_cg_expr(node.right)})"
-        else:
-            name = node.left.id.name
-            idx = _cg_expr(node.left.index)
-            val = _cg_expr(node.right)
-            return (
-                f"(lambda __arr, __idx, __val: "
-                f"[__arr.__setitem__(__idx, __val), __val][1])"
-                f"(get('{name}'), int({idx}), {val})"
-            )
+    if node.kind == K_ASSIGN:
+        if node.left.kind == K_ID:
+            return f"({_var(node.left)} := {kids[0]})"
+        arr = _var(node.left.id)
+        return (
+            f"(lambda __arr, __idx, __val: "
+            f"[__arr.__setitem__(__idx, __val), __val][1])"
+            f"({arr}, {kids[0]}, {kids[1]})"
+        )
     raise RuntimeError(f"Expr desconhecida no codegen: {type(node).__name__}")
 
 
-def exec_generated_python(pycode: str, env: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Executa código Python gerado."""
-    ns: Dict[str, Any] = {}
+def _fit(code: str, im: str) -> str:
+    """Expressão int `code` ajustada ao modelo de inteiro."""
+    if im == BIGINT:
+        return code
+    return f"__ml_wrap{code}" if im == WRAP else f"__ml_trap{code}"
+
+
+def exec_generated_python(pycode: str, env: Optional[Dict[str, Any]] = None,
+                          out: Optional[OutputSink] = None,
+                          limits: Optional[ExecLimits] = None,
+                          srcmap: Optional[SourceMap] = None,
+                          filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Executa código Python gerado; a saída vai para `out` (padrão: stdout).
+    `limits` exige código gerado com `codegen_python(..., budget=True)`.
+    Com o `srcmap` do mesmo codegen, o código roda com as linhas MiniLang,
+    atribuídas ao arquivo `filename` (p.ex. o caminho do .min).
+    """
+    if out is None:
+        out = OutputSink()
+    if limits is not None and "__ml_meter" not in pycode:
+        raise ValueError("Código gerado sem contagem de passos: use codegen_python(..., budget=True).")
+    ns: Dict[str, Any] = {"__ml_new_array": new_array, "__ml_wrap": wrap64, "__ml_trap": trap64,
+                          "__ml_print": out.print, "__ml_meter": Meter(limits)}
+    if srcmap is not None:
+        pycode = _compile_mapped(pycode, srcmap, filename or "<minilang>")
     exec(pycode, ns, ns)
-    return ns["__ml_run"](env if env is not None else {})
+    try:
+        return ns["__ml_run"](env if env is not None else {})
+    finally:
+        out.flush()
+
+
+def _compile_mapped(pycode: str, srcmap: SourceMap, filename: str):
+    """
+    Compila `pycode` com cada nó na linha MiniLang da sua linha Python
+    (linhas sem origem ficam com a última anterior que tem). Sem colunas:
+    o traceback mostra a linha MiniLang inteira. O coletor de ciclos fica
+    parado enquanto a AST do Python existe: ela não tem ciclos, e as coletas
+    disparadas pelos milhões de nós de um programa grande custariam mais
+    que o parse e a compilação juntos.
+    """
+    lines = [1] * (pycode.count("\n") + 2)
+    for n in range(1, len(lines)):
+        pos = srcmap.lines.get(n)
+        lines[n] = pos[0] if pos is not None else lines[n - 1]
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        tree = ast.parse(pycode)
+        for node in ast.walk(tree):
+            if "lineno" in node._attributes:
+                node.lineno = node.end_lineno = lines[node.lineno]
+                node.col_offset = 0
+                node.end_col_offset = _WHOLE_LINE
+        return compile(tree, filename, "exec")
+    finally:
+        if enabled:
+            gc.enable()
+
+
+_WHOLE_LINE = 1 << 16     # coluna final além do fim de qualquer linha
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Framework de análise de fluxo de dados (dataflow) sobre a AST MiniLang.
+
+- `build_cfg`: grafo de fluxo de controle em nível de statement. Cada nó
+  guarda um statement simples (Decl, Eval, Print, Assign) ou a condição de
+  um If/While/Do; há ainda nós sem item (entrada, saída e junções).
+- `Lattice` + `solve`: motor genérico por worklist, para frente ou para
+  trás, que processa os nós em pós-ordem reversa (RPO) e só reagenda os
+  vizinhos de um nó cuja saída mudou.
+- `effects`: usos e definições de variáveis de um nó, na ordem de
+  avaliação, lidos das anotações `sym` de `check_semantics`.
+- `liveness` / `mark_dead_arrays`: variáveis vivas por nó e, a partir
+  delas, os arrays que os backends podem soltar após cada statement.
+
+Os fatos costumam ser bitsets em inteiros Python (bit `Sym.idx`), com
+transferência gen/kill (`gen_kill`). A verificação de atribuição definida
+de `check_semantics` e a liveness são instâncias deste motor.
+"""
+import heapq
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, List, Tuple
+
+from .ast_nodes import *
+
+
+FORWARD = "forward"
+BACKWARD = "backward"
+
+# Eventos de `effects`
+USE = 0      # leitura da variável (o Id lido vem junto)
+DEF = 1      # atribuição incondicional
+UNDEF = 2    # declaração sem inicializador
+
+
+# =========================================================
+# CFG
+# =========================================================
+
+class CFG:
+    """Grafo de fluxo de controle; nós são inteiros em ordem de programa."""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.owners: List[Any] = []     # statement de cada nó (o If/While/Do da condição)
+        self.succ: List[List[int]] = []
+        self.pred: List[List[int]] = []
+        # Listas de statements: [(stmt, primeiro nó, fim)], nós em [primeiro, fim)
+        self.seqs: List[List[Tuple[Any, int, int]]] = []
+        self.entry = self.add_node(None)
+        self.exit = -1
+
+    def __len__(self):
+        return len(self.items)
+
+    def add_node(self, item, owner=None) -> int:
+        self.items.append(item)
+        self.owners.append(item if owner is None else owner)
+        self.succ.append([])
+        self.pred.append([])
+        return len(self.items) - 1
+
+    def add_edge(self, a: int, b: int):
+        self.succ[a].append(b)
+        self.pred[b].append(a)
+
+
+def build_cfg(block) -> CFG:
+    """
+    Constrói o CFG de um bloco (normalmente `prog.block`) ou de uma lista de
+    statements; nesse caso `cfg.seqs[-1]` é a própria lista. Os nós são
+    criados na ordem do texto, então percorrer `range(len(cfg))` visita os
+    statements na ordem em que aparecem no programa.
+    """
+    cfg = CFG()
+
+    def link(preds: List[int], node: int):
+        for p in preds:
+            cfg.add_edge(p, node)
+
+    def stmts(seq, preds: List[int]) -> List[int]:
+        if seq is None:
+            return preds
+        if not isinstance(seq, list):
+            return stmt(seq, preds)
+        spans = []
+        for s in seq:
+            start = len(cfg)
+            preds = stmt(s, preds)
+            spans.append((s, start, len(cfg)))
+        cfg.seqs.append(spans)
+        return preds
+
+    def stmt(node, preds: List[int]) -> List[int]:
+        k = node.kind
+        if k == K_BLOCK:
+            return stmts(node.stmts, preds)
+        if k == K_IF:
+            c = cfg.add_node(node.cond, node)
+            link(preds, c)
+            out = stmt(node.then_stmt, [c])
+            if node.else_stmt is not None:
+                return out + stmt(node.else_stmt, [c])
+            return out + [c]
+        if k == K_WHILE:
+            c = cfg.add_node(node.cond, node)
+            link(preds, c)
+            link(stmt(node.body, [c]), c)
+            return [c]
+        if k == K_DO:
+            head = cfg.add_node(None)
+            link(preds, head)
+            body = stmt(node.body, [head])
+            c = cfg.add_node(node.cond, node)
+            link(body, c)
+            cfg.add_edge(c, head)
+            return [c]
+        n = cfg.add_node(node)
+        link(preds, n)
+        return [n]
+
+    cfg.exit = cfg.add_node(None)
+    link(stmts(block, [cfg.entry]), cfg.exit)
+    return cfg
+
+
+def reverse_postorder(succ: List[List[int]], start: int) -> List[int]:
+    """RPO a partir de `start` (DFS iterativa); nós inalcançáveis ficam fora."""
+    seen = bytearray(len(succ))
+    post: List[int] = []
+    stack = [(start, iter(succ[start]))]
+    seen[start] = 1
+    while stack:
+        node, it = stack[-1]
+        for s in it:
+            if not seen[s]:
+                seen[s] = 1
+                stack.append((s, iter(succ[s])))
+                break
+        else:
+            stack.pop()
+            post.append(node)
+    post.reverse()
+    return post
+
+
+# =========================================================
+# Motor de worklist
+# =========================================================
+
+@dataclass(frozen=True)
+class Lattice:
+    """Reticulado: valor inicial otimista (`top`) e operação de junção (`meet`)."""
+    top: Any
+    meet: Callable[[Any, Any], Any]
+
+
+def must_bits(universe: int) -> Lattice:
+    """Análise "em todos os caminhos" sobre bitsets: interseção, começa cheio."""
+    return Lattice(universe, operator.and_)
+
+
+# Análise "em algum caminho" sobre bitsets: união, começa vazio
+MAY_BITS = Lattice(0, operator.or_)
+
+
+def gen_kill(gen: List[int], kill: List[int]) -> Callable[[int, int], int]:
+    """Transferência clássica sobre bitsets: (x - kill[n]) | gen[n]."""
+    def transfer(n: int, x: int) -> int:
+        return (x & ~kill[n]) | gen[n]
+    return transfer
+
+
+def solve(cfg: CFG, lattice: Lattice, transfer: Callable[[int, Any], Any],
+          direction: str = FORWARD, boundary: Any = None) -> Tuple[List[Any], List[Any]]:
+    """
+    Resolve o sistema de equações até o ponto fixo.
+
+    `transfer(n, x)` devolve o fato após o nó `n` dado o fato `x` antes
+    dele (no sentido da análise). `boundary` é o fato na entrada (FORWARD)
+    ou na saída (BACKWARD) do CFG; por padrão, `lattice.top`.
+
+    Retorna `(entrada, saida)` por nó, no sentido da análise: numa análise
+    BACKWARD, `entrada[n]` é o fato no fim do nó e `saida[n]` no início.
+    """
+    n = len(cfg)
+    if direction == FORWARD:
+        preds, succs, start = cfg.pred, cfg.succ, cfg.entry
+    else:
+        preds, succs, start = cfg.succ, cfg.pred, cfg.exit
+    if boundary is None:
+        boundary = lattice.top
+    top, meet = lattice.top, lattice.meet
+
+    order = reverse_postorder(succs, start)
+    prio = [n] * n
+    for i, node in enumerate(order):
+        prio[node] = i
+
+    inp = [top] * n
+    out = [top] * n
+    heap = [(i, node) for i, node in enumerate(order)]
+    pending = bytearray(n)
+    for node in order:
+        pending[node] = 1
+    while heap:
+        _, node = heapq.heappop(heap)
+        pending[node] = 0
+        x = boundary if node == start else top
+        for p in preds[node]:
+            x = meet(x, out[p])
+        inp[node] = x
+        y = transfer(node, x)
+        if y != out[node]:
+            out[node] = y
+            for s in succs[node]:
+                if not pending[s] and prio[s] < n:
+                    pending[s] = 1
+                    heapq.heappush(heap, (prio[s], s))
+    return inp, out
+
+
+# =========================================================
+# Usos e definições
+# =========================================================
+
+def effects(item) -> List[Tuple[int, Any]]:
+    """
+    Eventos (USE/DEF/UNDEF, Id) de um nó do CFG, na ordem de avaliação.
+    Atribuições à direita de `&&`/`||` podem não executar e não geram DEF;
+    atribuição a elemento de array é um USE do array.
+    Percorre com pilha explícita (expressões podem ter milhares de níveis).
+    """
+    out: List[Tuple[int, Any]] = []
+    if item is None:
+        return out
+    # (nó, definite) a visitar, ou (None, evento) a emitir depois dos filhos;
+    # empilhado em ordem inversa
+    stack: List[Tuple[Any, Any]] = [(item, True)]
+    while stack:
+        node, definite = stack.pop()
+        if node is None:
+            out.append(definite)
+            continue
+        k = node.kind
+        if k == K_NUM or k == K_BOOL:
+            continue
+        if k == K_ID:
+            out.append((USE, node))
+        elif k == K_ARRAYREF:
+            out.append((USE, node.id))
+            stack.append((node.index, definite))
+        elif k == K_NEWARRAY:
+            stack.append((node.size, definite))
+        elif k == K_UNARY:
+            stack.append((node.expr, definite))
+        elif k == K_LG:
+            stack.append((node.right, False))
+            stack.append((node.left, definite))
+        elif k in (K_ARI, K_REL, K_EQ):
+            stack.append((node.right, definite))
+            stack.append((node.left, definite))
+        elif k == K_ASSIGN:
+            if node.left.kind == K_ID:
+                if definite:
+                    stack.append((None, (DEF, node.left)))
+                stack.append((node.right, definite))
+            elif node.left.kind == K_ARRAYREF:
+                stack.append((None, (USE, node.left.id)))
+                stack.append((node.right, definite))
+                stack.append((node.left.index, definite))
+            else:
+                stack.append((node.right, definite))
+                stack.append((node.left, definite))
+        elif k == K_DECL:
+            if node.init is not None:
+                stack.append((None, (DEF, node.id)))
+                stack.append((node.init, definite))
+            else:
+                out.append((UNDEF, node.id))
+        elif k == K_EVAL:
+            stack.append((node.expr, definite))
+        elif k == K_PRINT:
+            for a in reversed(node.args):
+                stack.append((a, definite))
+    return out
+
+
+
+def liveness(cfg: CFG) -> Tuple[List[int], List[int]]:
+    """
+    Variáveis vivas (bitsets por `Sym.idx`) no início e no fim de cada nó.
+    Toda atribuição (DEF/UNDEF) mata a variável; todo uso a torna viva.
+    """
+    n = len(cfg)
+    gen = [0] * n
+    kill = [0] * n
+    for node, item in enumerate(cfg.items):
+        g = k = 0
+        # para trás: o último evento do nó é aplicado primeiro
+        for ev, ident in reversed(effects(item)):
+            bit = ident.sym.bit
+            if ev == USE:
+                g |= bit
+                k &= ~bit
+            else:
+                k |= bit
+                g &= ~bit
+        gen[node] = g
+        kill[node] = k
+    live_out, live_in = solve(cfg, MAY_BITS, gen_kill(gen, kill), BACKWARD)
+    return live_in, live_out
+
+
+def mark_dead_arrays(cfg: CFG):
+    """
+    Anota cada statement de uma lista com `dead`: os Ids (da declaração) dos
+    arrays usados até ele e mortos a partir do statement seguinte, para os
+    backends soltarem a referência ali em vez de no fim do bloco. Escalares
+    não entram: soltar um int/bool não libera memória e custaria uma
+    atribuição a mais por statement.
+    """
+    live_in, _ = liveness(cfg)
+    decl_ids = {}
+    arrays = 0
+    assigned = [0] * len(cfg)
+    declared = [0] * len(cfg)
+    for node, item in enumerate(cfg.items):
+        if item is None:
+            continue
+        if item.kind == K_DECL:
+            sym = item.id.sym
+            decl_ids[sym.idx] = item.id
+            declared[node] = sym.bit
+            if item.is_array:
+                arrays |= sym.bit
+        for ev, ident in effects(item):
+            if ev == DEF:
+                assigned[node] |= ident.sym.bit
+
+    for spans in cfg.seqs:
+        # o último statement da lista não é anotado: depois dele o fluxo
+        # volta à construção que o contém (que é quem solta, ou o bloco fecha)
+        nonempty = [span for span in spans if span[1] < span[2]]
+        for s, _, _ in spans:
+            s.dead = ()
+        for (s, start, end), (_, nxt, _) in zip(nonempty, nonempty[1:]):
+            touched = live_in[start]
+            nested = 0
+            for node in range(start, end):
+                touched |= assigned[node]
+                nested |= declared[node]
+            if s.kind == K_DECL:
+                nested = 0       # a própria declaração continua no escopo
+            dead = touched & arrays & ~nested & ~live_in[nxt]
+            if dead:
+                s.dead = tuple(decl_ids[sym_idx] for sym_idx in _bits(dead))
+
+
+def _bits(x: int):
+    """Índices dos bits ligados de `x`, em ordem crescente."""
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Hash-consing de expressões: a AST vira um DAG.
+
+Com uma `ExprTable`, o `ASTBuilder` devolve o mesmo nó para toda
+ocorrência de uma subexpressão pura estruturalmente igual (p.ex. `i*W + j`
+repetido milhares de vezes por um gerador de código). Memória, verificação
+semântica e otimizações passam a custar por subexpressão distinta.
+
+Um `Id` só é compartilhado entre ocorrências que se referem à mesma
+declaração: a tabela acompanha os escopos durante a construção (mesmas
+regras de `check_semantics`: só blocos abrem escopo e a declaração vale a
+partir dela mesma), então as anotações `sym`/`ty` de um nó compartilhado
+valem para todas as ocorrências. Atribuições nunca são compartilhadas.
+
+Por nó canônico ficam guardadas, calculadas uma vez na criação:
+- `is_pure(node)`: avaliar não muda estado (sem atribuição nem `new`);
+- `const_value(node)`: valor, se a expressão só tem literais (senão NOT_CONST).
+O tipo fica com `check_semantics`, que memoiza por nó quando `prog.exprs`
+aponta para a tabela. O valor constante segue o modelo de inteiro da
+tabela (ver intmodel.py): em int64-trap, um overflow fica para a execução.
+"""
+from typing import Any, Dict, List, Tuple
+
+from .ast_nodes import *
+from .interner import Interner
+from .interp import BINARY_OPS, UNARY_OPS
+from .intmodel import BIGINT, WRAP, check_model, fits64, wrap64
+
+
+class _NotConst:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "NOT_CONST"
+
+
+NOT_CONST = _NotConst()
+
+_BINARY = (K_REL, K_EQ, K_LG, K_ARI)
+
+
+class ExprTable:
+    """Nós de expressão canônicos de uma compilação (use com um Interner)."""
+
+    def __init__(self, interner: Interner, int_model: str = BIGINT):
+        self.interner = interner
+        self.int_model = check_model(int_model)
+        self._nodes: Dict[Tuple, Any] = {}
+        self._pure: Dict[int, bool] = {}
+        self._const: Dict[int, Any] = {}
+        # Escopos da construção: nid -> número da declaração visível
+        self._scopes: List[Dict[int, int]] = [{}]
+        self._n_decls = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+    # ---- Escopos (chamados pelo construtor na ordem do texto) ----
+    def push(self):
+        self._scopes.append({})
+
+    def pop(self):
+        self._scopes.pop()
+
+    def declare(self, nid: int):
+        self._n_decls += 1
+        self._scopes[-1][nid] = self._n_decls
+
+    def _binding(self, nid: int) -> int:
+        for scope in reversed(self._scopes):
+            b = scope.get(nid)
+            if b is not None:
+                return b
+        return 0          # não declarada (check_semantics reporta)
+
+    # ---- Nós canônicos ----
+    def ident(self, name: str) -> Id:
+        """Id de um uso de `name`, compartilhado com os usos da mesma declaração."""
+        nid = self.interner.name_id(name)
+        key = (K_ID, nid, self._binding(nid))
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._add(key, self.interner.ident(name), True, NOT_CONST)
+        else:
+            self.hits += 1
+        return node
+
+    def literal(self, node):
+        """Num/Bool (já compartilhados pelo Interner) entram na tabela como constantes."""
+        key = (node.kind, id(node))
+        if key not in self._nodes:
+            self._add(key, node, True, node.value)
+        return node
+
+    def make(self, cls, *fields):
+        """
+        Nó `cls(*fields)` canônico. Os filhos já devem ser canônicos (vindos
+        desta tabela); atribuições são sempre criadas de novo.
+        """
+        kind = cls.kind
+        if kind == K_ASSIGN:
+            return cls(*fields)
+        key = (kind,) + tuple(f if isinstance(f, str) else id(f) for f in fields)
+        node = self._nodes.get(key)
+        if node is not None:
+            self.hits += 1
+            return node
+        node = cls(*fields)
+        kids = [f for f in fields if not isinstance(f, str)]
+        pure = kind != K_NEWARRAY and all(self.is_pure(k) for k in kids)
+        return self._add(key, node, pure, self._fold(node))
+
+    def _add(self, key, node, pure: bool, const):
+        self.misses += 1
+        self._nodes[key] = node
+        self._pure[id(node)] = pure
+        if const is not NOT_CONST:
+            self._const[id(node)] = const
+        return node
+
+    # ---- Propriedades em cache ----
+    def is_pure(self, node) -> bool:
+        """Avaliar `node` não tem efeitos (nós fora da tabela: False)."""
+        return self._pure.get(id(node), False)
+
+    def const_value(self, node):
+        """Valor constante de `node`, ou NOT_CONST."""
+        return self._const.get(id(node), NOT_CONST)
+
+    def _fold(self, node):
+        k = node.kind
+        if k == K_UNARY:
+            v = self.const_value(node.expr)
+            fn = UNARY_OPS.get(node.op)
+            if v is NOT_CONST or fn is None:
+                return NOT_CONST
+            return self._fit(fn(v)) if node.op == "-" else fn(v)
+        if k in _BINARY:
+            lv = self.const_value(node.left)
+            rv = self.const_value(node.right)
+            if lv is NOT_CONST or rv is NOT_CONST:
+                return NOT_CONST
+            if k == K_LG:
+                return (lv or rv) if node.op == "||" else (lv and rv)
+            fn = BINARY_OPS.get(node.op)
+            if fn is None:
+                return NOT_CONST
+            try:
+                v = fn(lv, rv)
+            except ZeroDivisionError:
+                return NOT_CONST     # o erro fica para a execução
+            return self._fit(v) if k == K_ARI else v
+        return NOT_CONST
+
+    def _fit(self, v):
+        if self.int_model == BIGINT or fits64(v):
+            return v
+        if self.int_model == WRAP:
+            return wrap64(v)
+        return NOT_CONST             # TRAP: o erro fica para a execução
+
+    def stats(self) -> Dict[str, int]:
+        return {"distinct": len(self._nodes), "hits": self.hits, "misses": self.misses}
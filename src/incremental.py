@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Verificação semântica incremental, para integração com editores.
+
+`IncrementalChecker` guarda o texto e a AST (em um `reparse.ParsedSource`)
+e o estado da análise da última versão válida. A cada `update(novo_texto)`:
+
+1. o diff (prefixo e sufixo comuns) vira uma edição; `ParsedSource.edit`
+   reparseia só o menor statement ou trecho de bloco que a contém e emenda
+   o resultado na AST;
+2. os statements do escopo global tocados pela emenda formam a região
+   afetada, que é verificada continuando do estado salvo antes dela
+   (declarações globais e fatos de atribuição definida), reaproveitando os
+   símbolos de declarações que não mudaram;
+3. os statements seguintes só são reverificados se as declarações globais
+   ou os fatos de atribuição definida no fim da região mudaram.
+
+Se a verificação falha, a região fica pendente e entra na região da próxima
+edição, que é verificada contra o último estado válido. A AST acompanha
+sempre o último texto que parseou. As anotações `dead` (liveness, só usadas
+para executar) são recalculadas sob demanda em `program()`, não a cada edição.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ast_nodes import *
+from .dataflow import build_cfg, mark_dead_arrays
+from .reparse import Change, ParsedSource
+from .sema import (SemaState, Sym, SymbolTable, toplevel_checker, check_definite_assignment,
+                   in_program_order)
+
+
+def _common_prefix(x: str, y: str) -> int:
+    """Tamanho do maior prefixo comum (busca binária com comparações de fatias)."""
+    lo, hi = 0, min(len(x), len(y))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if x[:mid] == y[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _top_boundaries(cfg, defs_in: List[int]) -> List[int]:
+    """Fatos de atribuição definida antes de cada statement da lista global e no fim."""
+    out = []
+    for _, start, _ in cfg.seqs[-1] if cfg.seqs else ():
+        out.append(defs_in[start] if start < len(cfg) else defs_in[cfg.exit])
+    out.append(defs_in[cfg.exit])
+    return out
+
+
+class IncrementalChecker:
+    """Mantém a AST verificada de um arquivo sob edição."""
+
+    def __init__(self, source: str):
+        self.parsed: Optional[ParsedSource] = None
+        self.stats: Dict[str, Any] = {}
+        # Estado da última versão válida, um item por statement global
+        self.decls: Optional[List[List[Tuple[Any, Sym]]]] = None
+        self.rows: List[SymbolTable] = []
+        self.defs: List[int] = []
+        self.n_syms = 0
+        # Região ainda não verificada com sucesso: statements [a, fim_valido)
+        # da última versão válida correspondem a [a, fim_atual) da AST atual
+        self._pending: Optional[Tuple[int, int, int]] = None
+        self._dead_stale = True
+        self.update(source)
+
+    # ---- API ----
+    def update(self, source: str) -> SymbolTable:
+        """
+        Aplica a nova versão do texto e devolve o snapshot da tabela de
+        símbolos (como `check_semantics`). Erros de sintaxe e semânticos
+        são propagados; a próxima chamada parte da última versão que
+        parseou, reverificando também o que falhou.
+        """
+        if self.parsed is None:
+            self.parsed = ParsedSource(source)
+            change = Change(None, 0, 0, 0, full=True)
+        else:
+            old = self.parsed.source
+            # sem `decls`, a última verificação completa falhou
+            if source == old and self._pending is None and self.decls is not None:
+                self.stats = {"full": False, "reparsed": 0, "rechecked": 0}
+                return self.symtab()
+            lo = _common_prefix(old, source)
+            hi = len(old) - _common_prefix(old[lo:][::-1], source[lo:][::-1])
+            change = self.parsed.edit(lo, hi - lo, source[lo:hi + len(source) - len(old)])
+        self._dead_stale = True
+
+        # Muitos símbolos abandonados deixam os bitsets longos: recomeça
+        if (change.full or self.decls is None
+                or self.n_syms > 4 * sum(len(d) for d in self.decls) + 4096):
+            self._full()
+        else:
+            self._incremental(change)
+        return self.symtab()
+
+    def symtab(self) -> SymbolTable:
+        table = SymbolTable()
+        for rows in self.rows:
+            table.extend(rows)
+        return table
+
+    def program(self) -> Program:
+        """AST atual, com todas as anotações de `check_semantics`."""
+        prog = self.parsed.prog
+        if self._dead_stale:
+            mark_dead_arrays(build_cfg(prog.block))
+            self._dead_stale = False
+        return prog
+
+    # ---- Caminho completo ----
+    def _full(self):
+        stmts = self.parsed.prog.block.stmts or []
+        self.decls = None
+        state = SemaState(errors=[])
+        decls: List[List[Tuple[Any, Sym]]] = []
+        rows: List[SymbolTable] = []
+        check = toplevel_checker(state)
+        for s in stmts:
+            _check_one(check, s, state, decls, rows)
+        cfg = build_cfg(stmts)
+        defs_in = check_definite_assignment(cfg, state.n_syms, errors=state.errors)
+        _raise_first(state)
+        self.decls, self.rows = decls, rows
+        self.n_syms = state.n_syms
+        self.defs = _top_boundaries(cfg, defs_in)
+        self._pending = None
+        self.stats = {"full": True, "reparsed": len(stmts), "rechecked": len(stmts)}
+
+    # ---- Caminho incremental ----
+    def _region(self, change: Change) -> Tuple[int, int, int]:
+        """
+        Statements globais afetados: [a, b_valido) da última versão válida
+        viraram [a, b_atual) da AST atual (juntando a região pendente).
+        """
+        root = self.parsed.root
+        if change.parent is root:
+            a, removed, added = change.index, change.removed, change.added
+        else:
+            span = change.parent
+            while span.parent is not root:
+                span = span.parent
+            a, removed, added = span.slot, 1, 1
+        if self._pending is None:
+            return a, a + removed, a + added
+        lo, good_hi, cur_hi = self._pending
+        good_hi = max(good_hi, a + removed - (cur_hi - good_hi))
+        cur_hi = max(cur_hi, a + removed) + added - removed
+        return min(lo, a), good_hi, cur_hi
+
+    def _incremental(self, change: Change):
+        """Reverifica só a região afetada pela edição."""
+        a, b_good, b_cur = self._region(change)
+        stmts = self.parsed.prog.block.stmts or []
+        new_stmts = stmts[a:b_cur]
+        tail = stmts[b_cur:]
+        old_decls, old_rows = self.decls, self.rows
+        self._pending = (a, b_good, b_cur)
+
+        # 1. Verificação da região a partir do estado antes dela. Os erros
+        # são coletados até o fim, como em check_semantics, para levantar o
+        # primeiro na ordem do programa
+        state = SemaState(n_syms=self.n_syms, errors=[])
+        for d in old_decls[:a]:
+            state.top.update(d)
+        reuse = {k: v for d in old_decls[a:b_good] for k, v in d}
+        decls = old_decls[:a]
+        rows = old_rows[:a]
+        check = toplevel_checker(state, reuse)
+        for s in new_stmts:
+            _check_one(check, s, state, decls, rows)
+        region_decls = decls[a:]
+        rechecked = len(new_stmts)
+
+        # 2. Os statements seguintes dependem das declarações da região. Se
+        # todas as antigas continuam (mesmo Sym), nenhum uso posterior muda de
+        # símbolo; uma declaração nova só importa se algum statement seguinte
+        # declara o mesmo nome (agora seria redeclaração).
+        kept = {(k, id(v)) for d in region_decls for k, v in d}
+        old_region = [(k, id(v)) for d in old_decls[a:b_good] for k, v in d]
+        added = {k for k, _ in kept.difference(old_region)}
+        same_decls = kept.issuperset(old_region) and not any(
+            k in added for d in old_decls[b_good:] for k, _ in d)
+        if same_decls:
+            decls.extend(old_decls[b_good:])
+            rows.extend(old_rows[b_good:])
+            cfg = build_cfg(new_stmts)
+        else:
+            # as anotações do resto mudam: se falhar, tudo fica pendente
+            self._pending = (a, len(old_decls), len(stmts))
+            reuse.update((k, v) for d in old_decls[b_good:] for k, v in d)
+            for s in tail:
+                _check_one(check, s, state, decls, rows)
+            rechecked += len(tail)
+            cfg = build_cfg(new_stmts + tail)
+
+        # ...e dos fatos de atribuição definida no fim dela
+        defs_in = check_definite_assignment(cfg, state.n_syms, boundary=self.defs[a],
+                                            errors=state.errors)
+        bounds = _top_boundaries(cfg, defs_in)
+        if same_decls:
+            # globais que os statements seguintes podem ler (as novas não)
+            globals_mask = 0
+            for d in decls:
+                for k, sym in d:
+                    if k not in added:
+                        globals_mask |= sym.bit
+            if (bounds[-1] ^ self.defs[b_good]) & globals_mask:
+                cfg_tail = build_cfg(tail)
+                tail_in = check_definite_assignment(cfg_tail, state.n_syms, boundary=bounds[-1],
+                                                    errors=state.errors)
+                bounds = bounds[:-1] + _top_boundaries(cfg_tail, tail_in)
+                rechecked += len(tail)
+            else:
+                bounds = bounds[:-1] + self.defs[b_good:]
+        _raise_first(state)
+
+        self.decls, self.rows = decls, rows
+        self.defs = self.defs[:a] + bounds
+        self.n_syms = state.n_syms
+        self._pending = None
+        self.stats = {"full": False, "reparsed": change.added, "rechecked": rechecked}
+
+
+def _raise_first(state: SemaState):
+    if state.errors:
+        raise in_program_order(state)[0]
+
+
+def _check_one(check, s, state: SemaState, decls: list, rows: list):
+    """Verifica um statement global, registrando o que ele declarou."""
+    n_decls = len(state.declared)
+    n_rows = len(state.rows)
+    check(s)
+    decls.append(state.declared[n_decls:])
+    rows.append(state.rows[n_rows:])
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Internador de símbolos e literais, um por compilação.
+
+Cada nome recebe um id inteiro pequeno (`Id.nid`), e o texto continua
+disponível para diagnósticos. As fases seguintes (sema, intérprete)
+indexam suas tabelas pelo id em vez da string. Literais `Num`/`Bool`
+iguais são compartilhados: o mesmo nó é reutilizado em toda ocorrência.
+"""
+from typing import Dict, List
+
+from .ast_nodes import Id, Num, Bool
+
+
+class Interner:
+    """Mapeia nomes para ids inteiros e deduplica nós literais."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._nums: Dict[object, Num] = {}
+        self._bools = (Bool(False), Bool(True))
+
+    def __len__(self):
+        return len(self.names)
+
+    def name_id(self, name: str) -> int:
+        """Id do nome, criando-o na primeira ocorrência."""
+        nid = self.ids.get(name)
+        if nid is None:
+            nid = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return nid
+
+    def name(self, nid: int) -> str:
+        """Texto do nome (para mensagens de erro)."""
+        return self.names[nid]
+
+    def ident(self, name: str) -> Id:
+        """Novo nó Id com o nome internado e seu id."""
+        nid = self.name_id(name)
+        return Id(self.names[nid], nid)
+
+    def num(self, value: int) -> Num:
+        """Nó Num compartilhado para o valor."""
+        node = self._nums.get(value)
+        if node is None:
+            node = self._nums[value] = Num(value)
+        return node
+
+    def num_text(self, text: str) -> Num:
+        """Nó Num para o texto do token; o texto só é convertido na primeira vez."""
+        node = self._nums.get(text)
+        if node is None:
+            node = self._nums[text] = self.num(int(text))
+        return node
+
+    def boolean(self, value: bool) -> Bool:
+        return self._bools[1 if value else 0]
@@ -1,207 +1,622 @@
 # -*- coding: utf-8 -*-
 """
 Intérprete: executa a AST diretamente.
+
+Com `vectorize=True` (requer numpy) os arrays usam buffers numpy e laços
+contados simples rodam como operações vetoriais (ver vectorize.py).
+`int_model` escolhe a aritmética de int (ver intmodel.py). A saída dos
+`print` vai para um `output.OutputSink` (`out`).
+
+O trace não custa nada quando desligado: os handlers normais não testam
+flag nenhuma. Com `trace=True` (ou um `tracer`), `exec_program` troca
+`push`/`pop` e as entradas de `stmt_table` por versões instrumentadas,
+que mandam eventos estruturados para um `output.TraceSink`. Do mesmo
+jeito, `limits` (ver limits.py) troca `while`/`do` por versões que contam
+as iterações e levantam `LimitExceeded` ao esgotar o orçamento ou o prazo.
+Com um `profiler` (ver profiler.py), cada statement é envolvido por uma
+versão que conta e cronometra, e `if`/`while`/`do` contam desvios e voltas.
+
+Expressões com altura a partir de DEEP_EXPR (cadeias `a + b + c + ...`
+geradas por máquina) são avaliadas com pilha explícita em `eval_deep`, sem
+estourar o limite de recursão; se o programa não tem nenhuma, `eval_expr`
+continua sendo só o despacho pela tabela.
 """
-from typing import List, Dict, Any
+import operator
+from typing import List, Dict, Any, Optional, Set, Tuple
 from .ast_nodes import *
+from .arrays import new_array
+from . import vectorize as _vec
+from .intmodel import BIGINT, WRAP, INT64_MIN, INT64_MAX, check_model, wrap64
+from .limits import ExecLimits, Meter
+from .output import OutputSink, TraceSink
+from .profiler import Profile
 
 
 class RuntimeErrorLang(Exception):
     pass
 
 
-def exec_program(node: Program, *, trace: bool = False) -> Dict[str, Any]:
-    """Executa o programa (AST) e retorna o ambiente global."""
-    frames: List[Dict[str, Any]] = [{}]
+BINARY_OPS = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.floordiv,
+    "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne,
+}
+UNARY_OPS = {"!": operator.not_, "-": operator.neg}
+
+DEEP_EXPR = 64
+
+# Passos da pilha de `eval_deep`
+(_VISIT, _BINARY, _LOGIC, _UNARY, _NEWARRAY, _INDEX, _ASSIGN, _STORE) = range(8)
+
+
+def _deep_exprs(block) -> Set[int]:
+    """`key` das subexpressões do programa com altura >= DEEP_EXPR."""
+    heights: Dict[int, int] = {}
+    stack = [block]
+    while stack:
+        s = stack.pop()
+        if s is None:
+            continue
+        if isinstance(s, list):
+            stack.extend(s)
+            continue
+        k = s.kind
+        if k == K_BLOCK:
+            stack.append(s.stmts)
+            continue
+        if k == K_DECL:
+            roots = (s.init,) if s.init is not None else ()
+        elif k == K_EVAL:
+            roots = (s.expr,)
+        elif k == K_PRINT:
+            roots = s.args
+        else:
+            roots = (s.cond,)
+            if k == K_IF:
+                stack.append(s.then_stmt)
+                stack.append(s.else_stmt)
+            else:
+                stack.append(s.body)
+        for e in roots:
+            if expr_at_least(e, DEEP_EXPR):
+                expr_height(e, heights)
+    return {i for i, h in heights.items() if h >= DEEP_EXPR}
+
+
+def exec_program(node: Program, *, trace: bool = False, vectorize: bool = False,
+                 int_model: str = BIGINT, out: Optional[OutputSink] = None,
+                 tracer: Optional[TraceSink] = None,
+                 limits: Optional[ExecLimits] = None,
+                 profiler: Optional[Profile] = None) -> Dict[str, Any]:
+    """
+    Executa o programa (AST já verificada por check_semantics) e retorna o
+    ambiente global. Sem `out`, a saída vai para o stdout. Com `trace` e
+    sem `tracer`, os eventos vão para o próprio `out`, entre as linhas do
+    programa e na ordem em que acontecem. `profiler` acumula contagens e
+    tempos por statement (não combina com o trace, que distorceria os tempos).
+    """
+    check_model(int_model)
+    if out is None:
+        out = OutputSink()
+    if tracer is None and trace:
+        tracer = TraceSink(out)
+    trace = tracer is not None
+    if trace and profiler is not None:
+        raise ValueError("trace e profiler não podem ser usados juntos.")
+    if vectorize and _vec.numpy is None:
+        raise RuntimeErrorLang("O modo vetorizado requer o pacote numpy (pip install numpy).")
+    # laços com trace rodam iteração a iteração, para o trace mostrar cada uma
+    vectorize = vectorize and not trace
+    alloc = _vec.new_numpy_array if vectorize else new_array
+    plans: Dict[int, Any] = {}        # While.key -> CountedLoop ou None
+    # Frames indexados pelo id internado do nome (Id.nid), ou pelo nome
+    # quando o Id não passou por um Interner.
+    frames: List[Dict[Any, Any]] = [{}]
 
     def push():
         frames.append({})
-        if trace:
-            print(">> push {}")
 
     def pop():
         frames.pop()
-        if trace:
-            print("<< pop {}")
 
-    def declare(name: str, value: Any):
-        frames[-1][name] = value
+    def declare(ident: Id, value: Any):
+        frames[-1][ident.nid if ident.nid >= 0 else ident.name] = value
 
-    def get(name: str):
+    def get(ident: Id):
+        key = ident.nid if ident.nid >= 0 else ident.name
         for d in reversed(frames):
-            if name in d:
-                return d[name]
-        raise RuntimeErrorLang(f"Variável não encontrada: {name}")
+            if key in d:
+                return d[key]
+        raise RuntimeErrorLang(f"Variável não encontrada: {ident.name}")
 
-    def setvar(name: str, value: Any):
+    def setvar(ident: Id, value: Any):
+        key = ident.nid if ident.nid >= 0 else ident.name
         for d in reversed(frames):
-            if name in d:
-                d[name] = value
+            if key in d:
+                d[key] = value
                 return value
-        frames[-1][name] = value
+        frames[-1][key] = value
         return value
 
-    def eval_expr(e):
-        if isinstance(e, Num):
-            return e.value
-        if isinstance(e, Bool):
-            return e.value
-        if isinstance(e, Id):
-            return get(e.name)
-        if isinstance(e, NewArray):
-            n = eval_expr(e.size)
-            if n < 0:
-                raise RuntimeErrorLang("Tamanho de array negativo.")
-            base_zero = 0 if e.base == "int" else False
-            return [base_zero for _ in range(int(n))]
-        if isinstance(e, ArrayRef):
-            arr = get(e.id.name)
-            idx = eval_expr(e.index)
-            if not isinstance(arr, list):
-                raise RuntimeErrorLang(f"'{e.id.name}' não é array em tempo de execução.")
+    # ---- Expressões: uma função por tipo de nó, despachadas pela tag `kind` ----
+    def ev_num(e):
+        return e.value
+
+    def ev_bool(e):
+        return e.value
+
+    def ev_id(e):
+        return get(e)
+
+    # A AST já foi verificada por check_semantics: operandos têm o tipo
+    # certo, então não há coerções (int()/bool()) nem checagens de tipo aqui.
+    def ev_newarray(e):
+        n = eval_expr(e.size)
+        if n < 0:
+            raise RuntimeErrorLang("Tamanho de array negativo.")
+        return alloc(e.base, n)
+
+    def ev_arrayref(e):
+        arr = get(e.id).data
+        idx = eval_expr(e.index)
+        if idx < 0 or idx >= len(arr):
+            raise RuntimeErrorLang(f"Índice fora dos limites: {idx}")
+        return arr[idx]
+
+    def ev_arrayref_numpy(e):
+        v = ev_arrayref(e)
+        # escalares numpy (int64 com overflow silencioso) viram int/bool Python
+        return v if v.__class__ is int else v.item()
+
+    def ev_unary(e):
+        fn = UNARY_OPS.get(e.op)
+        if fn is None:
+            raise RuntimeErrorLang(f"Unário desconhecido: {e.op}")
+        return fn(eval_expr(e.expr))
+
+    def ev_binary(e):
+        fn = BINARY_OPS.get(e.op)
+        if fn is None:
+            raise RuntimeErrorLang(f"Operador desconhecido: {e.op}")
+        return fn(eval_expr(e.left), eval_expr(e.right))
+
+    # Modelos de 64 bits: só `+ - * /` e o `-` unário podem sair do intervalo
+    def fit(op: str, v: int) -> int:
+        if INT64_MIN <= v <= INT64_MAX:
+            return v
+        if int_model == WRAP:
+            return wrap64(v)
+        raise RuntimeErrorLang(f"Overflow de inteiro (64 bits) em '{op}': {v}")
+
+    def ev_ari_64(e):
+        return fit(e.op, ev_binary(e))
+
+    def ev_unary_64(e):
+        v = ev_unary(e)
+        return fit(e.op, v) if e.op == "-" else v
+
+    def ev_lg(e):
+        if e.op == "||":
+            return eval_expr(e.left) or eval_expr(e.right)
+        if e.op == "&&":
+            return eval_expr(e.left) and eval_expr(e.right)
+        raise RuntimeErrorLang(f"Lógico desconhecido: {e.op}")
+
+    def ev_assign(e):
+        val = eval_expr(e.right)
+        if e.left.kind == K_ID:
+            return setvar(e.left, val)
+        elif e.left.kind == K_ARRAYREF:
+            cell = get(e.left.id)
+            arr = cell.data
+            idx = eval_expr(e.left.index)
             if idx < 0 or idx >= len(arr):
                 raise RuntimeErrorLang(f"Índice fora dos limites: {idx}")
-            return arr[int(idx)]
-        if isinstance(e, Unary):
-            v = eval_expr(e.expr)
-            if e.op == "!":
-                return not bool(v)
-            if e.op == "-":
-                return -int(v)
-            raise RuntimeErrorLang(f"Unário desconhecido: {e.op}")
-        if isinstance(e, Ari):
-            a = eval_expr(e.left)
-            b = eval_expr(e.right)
-            if e.op == "+":
-                return int(a) + int(b)
-            if e.op == "-":
-                return int(a) - int(b)
-            if e.op == "*":
-                return int(a) * int(b)
-            if e.op == "/":
-                return int(a) // int(b)
-            raise RuntimeErrorLang(f"Aritmético desconhecido: {e.op}")
-        if isinstance(e, Rel):
-            a = eval_expr(e.left)
-            b = eval_expr(e.right)
-            if e.op == "<":
-                return int(a) < int(b)
-            if e.op == "<=":
-                return int(a) <= int(b)
-            raise RuntimeErrorLang(f"Relacional desconhecido: {e.op}")
-        if isinstance(e, Eq):
-            a = eval_expr(e.left)
-            b = eval_expr(e.right)
-            if e.op == "==":
-                return a == b
-            if e.op == "!=":
-                return a != b
-            raise RuntimeErrorLang(f"Eq desconhecido: {e.op}")
-        if isinstance(e, Lg):
-            if e.op == "||":
-                left = bool(eval_expr(e.left))
-                if left:
-                    return True
-                return bool(eval_expr(e.right))
-            if e.op == "&&":
-                left = bool(eval_expr(e.left))
-                if not left:
-                    return False
-                return bool(eval_expr(e.right))
-            raise RuntimeErrorLang(f"Lógico desconhecido: {e.op}")
-        if isinstance(e, Assign):
-            val = eval_expr(e.right)
-            if isinstance(e.left, Id):
-                return setvar(e.left.name, val)
-            elif isinstance(e.left, ArrayRef):
-                arr = get(e.left.id.name)
-                idx = eval_expr(e.left.index)
-                if not isinstance(arr, list):
-                    raise RuntimeErrorLang(f"'{e.left.id.name}' não é array em tempo de execução.")
+            try:
+                arr[idx] = val
+            except OverflowError:          # não cabe em 64 bits (ver arrays.py)
+                cell.promote()[idx] = val
+            return val
+        else:
+            raise RuntimeErrorLang("Atribuição inválida (lhs).")
+
+    def ev_unsupported(e):
+        raise RuntimeErrorLang(f"Expressão não suportada: {type(e).__name__}")
+
+    expr_table = [ev_unsupported] * N_KINDS
+    expr_table[K_NUM] = ev_num
+    expr_table[K_BOOL] = ev_bool
+    expr_table[K_ID] = ev_id
+    expr_table[K_NEWARRAY] = ev_newarray
+    expr_table[K_ARRAYREF] = ev_arrayref_numpy if vectorize else ev_arrayref
+    expr_table[K_UNARY] = ev_unary if int_model == BIGINT else ev_unary_64
+    expr_table[K_ARI] = ev_binary if int_model == BIGINT else ev_ari_64
+    expr_table[K_REL] = ev_binary
+    expr_table[K_EQ] = ev_binary
+    expr_table[K_LG] = ev_lg
+    expr_table[K_ASSIGN] = ev_assign
+
+    def eval_expr(e):
+        return expr_table[e.kind](e)
+
+    deep = _deep_exprs(node.block)
+    if deep:
+        # só com expressões profundas: os nós delas vão para a pilha explícita
+        def eval_expr(e):
+            if e.key in deep:
+                return eval_deep(e)
+            return expr_table[e.kind](e)
+
+    def eval_deep(e):
+        """
+        Mesma semântica das funções ev_*, com pilha explícita para os nós
+        profundos; subexpressões rasas voltam para a tabela.
+        """
+        vals: List[Any] = []
+        todo: List[Tuple[int, Any]] = [(_VISIT, e)]
+        while todo:
+            op, n = todo.pop()
+            if op == _VISIT:
+                if n.key not in deep:
+                    vals.append(expr_table[n.kind](n))
+                    continue
+                k = n.kind
+                if k in (K_ARI, K_REL, K_EQ):
+                    if n.op not in BINARY_OPS:
+                        raise RuntimeErrorLang(f"Operador desconhecido: {n.op}")
+                    todo += ((_BINARY, n), (_VISIT, n.right), (_VISIT, n.left))
+                elif k == K_LG:
+                    if n.op not in ("||", "&&"):
+                        raise RuntimeErrorLang(f"Lógico desconhecido: {n.op}")
+                    todo += ((_LOGIC, n), (_VISIT, n.left))
+                elif k == K_UNARY:
+                    if n.op not in UNARY_OPS:
+                        raise RuntimeErrorLang(f"Unário desconhecido: {n.op}")
+                    todo += ((_UNARY, n), (_VISIT, n.expr))
+                elif k == K_NEWARRAY:
+                    todo += ((_NEWARRAY, n), (_VISIT, n.size))
+                elif k == K_ARRAYREF:
+                    vals.append(get(n.id).data)
+                    todo += ((_INDEX, n), (_VISIT, n.index))
+                elif k == K_ASSIGN:
+                    todo += ((_ASSIGN, n), (_VISIT, n.right))
+                else:
+                    vals.append(expr_table[k](n))
+            elif op == _BINARY:
+                r = vals.pop()
+                v = BINARY_OPS[n.op](vals.pop(), r)
+                vals.append(fit(n.op, v) if n.kind == K_ARI and int_model != BIGINT else v)
+            elif op == _LOGIC:
+                left = vals[-1]
+                if (not left) if n.op == "||" else left:
+                    vals.pop()
+                    todo.append((_VISIT, n.right))
+            elif op == _UNARY:
+                v = UNARY_OPS[n.op](vals.pop())
+                vals.append(fit(n.op, v) if n.op == "-" and int_model != BIGINT else v)
+            elif op == _NEWARRAY:
+                size = vals.pop()
+                if size < 0:
+                    raise RuntimeErrorLang("Tamanho de array negativo.")
+                vals.append(alloc(n.base, size))
+            elif op == _INDEX:
+                idx = vals.pop()
+                arr = vals.pop()
                 if idx < 0 or idx >= len(arr):
                     raise RuntimeErrorLang(f"Índice fora dos limites: {idx}")
-                arr[int(idx)] = val
-                return val
-            else:
-                raise RuntimeErrorLang("Atribuição inválida (lhs).")
-        raise RuntimeErrorLang(f"Expressão não suportada: {type(e).__name__}")
+                v = arr[idx]
+                vals.append(v.item() if vectorize and v.__class__ is not int else v)
+            elif op == _ASSIGN:
+                if n.left.kind == K_ID:
+                    vals.append(setvar(n.left, vals.pop()))
+                elif n.left.kind == K_ARRAYREF:
+                    vals.append(get(n.left.id))
+                    todo += ((_STORE, n), (_VISIT, n.left.index))
+                else:
+                    raise RuntimeErrorLang("Atribuição inválida (lhs).")
+            else:   # _STORE
+                idx = vals.pop()
+                cell = vals.pop()
+                val = vals[-1]
+                arr = cell.data
+                if idx < 0 or idx >= len(arr):
+                    raise RuntimeErrorLang(f"Índice fora dos limites: {idx}")
+                try:
+                    arr[idx] = val
+                except OverflowError:
+                    cell.promote()[idx] = val
+        return vals[0]
 
-    def exec_stmt(s):
-        if isinstance(s, Block):
-            push()
-            exec_stmts(s.stmts)
-            pop()
-            return
-        if isinstance(s, list):
-            for stmt in s:
-                exec_stmt(stmt)
-            return
-        if isinstance(s, Decl):
-            if s.is_array:
-                default = None
-            else:
-                default = 0 if s.typ == "int" else False
-            declare(s.id.name, default)
-            if s.init is not None:
-                v = eval_expr(s.init)
-                setvar(s.id.name, v)
-            return
-        if isinstance(s, Eval):
-            val = eval_expr(s.expr)
-            if trace:
-                print(f"eval => {val}")
-            return
-        if isinstance(s, Print):
-            vals = [eval_expr(a) for a in s.args]
-            # Converte booleanos para 0/1 para saída
-            vals = [1 if v is True else (0 if v is False else v) for v in vals]
-            print(*vals)
-            if trace:
-                print(f"(printed {vals})")
-            return
-        if isinstance(s, If):
-            cond = bool(eval_expr(s.cond))
-            if trace:
-                print(f"if ({cond}) ...")
-            if cond:
-                exec_stmt(s.then_stmt)
-            elif s.else_stmt is not None:
-                exec_stmt(s.else_stmt)
+    # ---- Statements ----
+    def ex_block(s):
+        push()
+        exec_stmts(s.stmts)
+        pop()
+
+    def ex_decl(s):
+        if s.is_array:
+            default = None
+        else:
+            default = 0 if s.typ == "int" else False
+        declare(s.id, default)
+        if s.init is not None:
+            v = eval_expr(s.init)
+            setvar(s.id, v)
+
+    def ex_eval(s):
+        eval_expr(s.expr)
+
+    def print_values(s) -> List[Any]:
+        vals = []
+        for a in s.args:
+            v = eval_expr(a)
+            # Booleanos saem como 0/1 (tipo estático; sem anotação, olha o valor)
+            if a.ty == "bool" or (a.ty is None and v.__class__ is bool):
+                v = 1 if v else 0
+            vals.append(v)
+        return vals
+
+    def ex_print(s):
+        out.print(*print_values(s))
+
+    def ex_if(s):
+        # cadeias `else if` andam em laço, sem uma chamada por nível
+        while not eval_expr(s.cond):
+            s = s.else_stmt
+            if s is None:
+                return
+            if s.kind != K_IF:
+                exec_stmt(s)
+                return
+        exec_stmt(s.then_stmt)
+
+    def vector_loop(s, max_trips: Optional[int] = None) -> int:
+        """
+        Iterações feitas de uma vez pelo plano de `s` (no máximo `max_trips`),
+        ou -1: rodar o laço escalar.
+        """
+        plan = plans.get(s.key, False)
+        if plan is False:
+            plan = plans[s.key] = _vec.match_counted_loop(s)
+        if plan is None:
+            return -1
+        start = get(plan.var)
+        if not _vec.run_counted_loop(plan, get, setvar, eval_expr, wrap=int_model == WRAP,
+                                     max_trips=max_trips):
+            return -1
+        return get(plan.var) - start
+
+    def ex_while(s):
+        if vectorize and vector_loop(s) >= 0:
             return
-        if isinstance(s, While):
+        while eval_expr(s.cond):
+            exec_stmt(s.body)
+
+    def ex_do(s):
+        while True:
+            exec_stmt(s.body)
+            if not eval_expr(s.cond):
+                break
+
+    def ex_unsupported(s):
+        raise RuntimeErrorLang(f"Stmt não suportado: {type(s).__name__}")
+
+    stmt_table = [ex_unsupported] * N_KINDS
+    stmt_table[K_BLOCK] = ex_block
+    stmt_table[K_DECL] = ex_decl
+    stmt_table[K_EVAL] = ex_eval
+    stmt_table[K_PRINT] = ex_print
+    stmt_table[K_IF] = ex_if
+    stmt_table[K_WHILE] = ex_while
+    stmt_table[K_DO] = ex_do
+
+    meter = Meter(limits) if limits is not None else None
+    if meter is not None:
+        # ---- Laços com orçamento: o Meter só é chamado quando `fuel` zera ----
+        fuel = meter.start()
+
+        def edge(n: int = 1):
+            nonlocal fuel
+            fuel -= n
+            if fuel <= 0:
+                fuel = meter.refill(fuel)
+
+        def lim_while(s):
+            nonlocal fuel
+            if vectorize:
+                # só se cabe no combustível: as `n` voltas seguidas de edge(n)
+                # equivalem ao laço escalar, que não consulta o Meter antes
+                # de o combustível zerar
+                n = vector_loop(s, fuel)
+                if n >= 0:
+                    edge(n)
+                    return
+            while eval_expr(s.cond):
+                exec_stmt(s.body)
+                fuel -= 1
+                if fuel <= 0:
+                    fuel = meter.refill(fuel)
+
+        def lim_do(s):
+            nonlocal fuel
+            while True:
+                exec_stmt(s.body)
+                if not eval_expr(s.cond):
+                    break
+                fuel -= 1
+                if fuel <= 0:
+                    fuel = meter.refill(fuel)
+
+        stmt_table[K_WHILE] = lim_while
+        stmt_table[K_DO] = lim_do
+
+    if trace:
+        # ---- Versões instrumentadas (só existem com trace) ----
+        event = tracer.event
+
+        def push():
+            frames.append({})
+            event("push", depth=len(frames) - 1)
+
+        def pop():
+            frames.pop()
+            event("pop", depth=len(frames))
+
+        def tr_eval(s):
+            event("eval", value=eval_expr(s.expr))
+
+        def tr_print(s):
+            vals = print_values(s)
+            out.print(*vals)
+            event("print", values=vals)
+
+        def tr_if(s):
+            while True:
+                cond = eval_expr(s.cond)
+                event("if", cond=cond)
+                if cond:
+                    exec_stmt(s.then_stmt)
+                    return
+                s = s.else_stmt
+                if s is None:
+                    return
+                if s.kind != K_IF:
+                    exec_stmt(s)
+                    return
+
+        def tr_while(s):
+            # sem vetorização: o trace mostra cada iteração
             while True:
-                cond = bool(eval_expr(s.cond))
-                if trace:
-                    print(f"while ({cond}) ...")
+                cond = eval_expr(s.cond)
+                event("while", cond=cond)
                 if not cond:
                     break
                 exec_stmt(s.body)
-            return
-        if isinstance(s, Do):
+                if meter is not None:
+                    edge()
+
+        def tr_do(s):
             while True:
-                if trace:
-                    print("do { ... }")
+                event("do")
                 exec_stmt(s.body)
-                cond = bool(eval_expr(s.cond))
-                if trace:
-                    print(f"while ({cond});")
+                cond = eval_expr(s.cond)
+                event("do_cond", cond=cond)
                 if not cond:
                     break
+                if meter is not None:
+                    edge()
+
+        stmt_table[K_EVAL] = tr_eval
+        stmt_table[K_PRINT] = tr_print
+        stmt_table[K_IF] = tr_if
+        stmt_table[K_WHILE] = tr_while
+        stmt_table[K_DO] = tr_do
+
+    if profiler is not None:
+        # ---- Versões com profiler (só existem com `profiler`) ----
+        record = profiler.record
+        lookup = profiler.stats.get
+        clock = profiler.clock
+        inner = 0.0       # tempo dos statements de dentro do que está rodando
+
+        def pf_if(s):
+            r = record(s)
+            while True:
+                if eval_expr(s.cond):
+                    r.taken += 1
+                    exec_stmt(s.then_stmt)
+                    return
+                s = s.else_stmt
+                if s is None:
+                    return
+                if s.kind != K_IF:
+                    exec_stmt(s)
+                    return
+                r = record(s)
+                r.count += 1          # o tempo da cadeia fica no primeiro `if`
+
+        def pf_while(s):
+            r = record(s)
+            if vectorize:
+                n = vector_loop(s, fuel if meter is not None else None)
+                if n >= 0:
+                    r.trips += n
+                    if meter is not None:
+                        edge(n)
+                    return
+            while eval_expr(s.cond):
+                exec_stmt(s.body)
+                r.trips += 1
+                if meter is not None:
+                    edge()
+
+        def pf_do(s):
+            r = record(s)
+            while True:
+                exec_stmt(s.body)
+                r.trips += 1
+                if not eval_expr(s.cond):
+                    break
+                if meter is not None:
+                    edge()
+
+        def timed(handler):
+            def run(s):
+                nonlocal inner
+                r = lookup(s.key) or record(s)
+                outer = inner
+                inner = 0.0
+                t0 = clock()
+                try:
+                    handler(s)
+                finally:
+                    dt = clock() - t0
+                    r.count += 1
+                    r.total += dt
+                    r.own += dt - inner
+                    inner = outer + dt
+            return run
+
+        stmt_table[K_IF] = pf_if
+        stmt_table[K_WHILE] = pf_while
+        stmt_table[K_DO] = pf_do
+        for k in (K_DECL, K_EVAL, K_PRINT, K_IF, K_WHILE, K_DO):
+            stmt_table[k] = timed(stmt_table[k])
+
+    def release(s):
+        # Arrays mortos após `s` (liveness de check_semantics): solta a
+        # referência já, em vez de esperar o fim do bloco.
+        for ident in s.dead:
+            setvar(ident, None)
+
+    def exec_stmt(s):
+        if isinstance(s, list):
+            exec_stmts(s)
             return
-        raise RuntimeErrorLang(f"Stmt não suportado: {type(s).__name__}")
+        stmt_table[s.kind](s)
 
     def exec_stmts(node):
         if node is None:
             return
         if isinstance(node, list):
             for stmt in node:
-                exec_stmt(stmt)
+                stmt_table[stmt.kind](stmt)
+                if stmt.dead:
+                    release(stmt)
         else:
             exec_stmt(node)
 
     if trace:
-        print(">> start Program")
-    exec_stmt(node.block)
-    if trace:
-        print(">> end Program")
+        tracer.event("start")
+    if profiler is not None:
+        t_start = profiler.clock()
+    try:
+        exec_stmt(node.block)
+        if trace:
+            tracer.event("end")
+    finally:
+        if profiler is not None:
+            profiler.elapsed += profiler.clock() - t_start
+        if trace:
+            tracer.flush()
+        out.flush()
     return frames[0]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Modelos de inteiro do `int` MiniLang (`--int-model` no CLI).
+
+- BIGINT ("bigint"): inteiros Python sem limite (o padrão);
+- WRAP ("int64-wrap"): 64 bits com sinal, o resultado de `+ - * /` e do
+  `-` unário volta para o intervalo em complemento de dois;
+- TRAP ("int64-trap"): 64 bits com sinal, sair do intervalo é erro de
+  execução.
+
+Nos modelos de 64 bits todo valor int cabe em um `array('q')` ou em um
+`numpy.int64`, e literais fora do intervalo são erro semântico. A divisão
+continua arredondando para baixo (`//`), como no modelo sem limite.
+Comparações não mudam: seus operandos já estão no intervalo.
+"""
+BIGINT = "bigint"
+WRAP = "int64-wrap"
+TRAP = "int64-trap"
+INT_MODELS = (BIGINT, WRAP, TRAP)
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+_MASK = (1 << 64) - 1
+
+
+def fits64(x: int) -> bool:
+    return INT64_MIN <= x <= INT64_MAX
+
+
+def wrap64(x: int) -> int:
+    """`x` reduzido a 64 bits com sinal (complemento de dois)."""
+    if INT64_MIN <= x <= INT64_MAX:
+        return x
+    return ((x - INT64_MIN) & _MASK) + INT64_MIN
+
+
+def trap64(x: int) -> int:
+    """`x`, ou OverflowError se não cabe em 64 bits com sinal."""
+    if INT64_MIN <= x <= INT64_MAX:
+        return x
+    raise OverflowError(f"Overflow de inteiro (64 bits): {x}")
+
+
+def check_model(model: str) -> str:
+    if model not in INT_MODELS:
+        raise ValueError(f"Modelo de inteiro desconhecido: {model!r} (use {', '.join(INT_MODELS)})")
+    return model
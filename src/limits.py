@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Limites de execução para programas MiniLang não confiáveis.
+
+`ExecLimits` define um orçamento de passos (iterações de laço: cada volta
+de um `while` ou `do-while`, em qualquer nível de aninhamento) e um prazo
+em segundos. Programas sem laço terminam em tempo proporcional ao texto,
+então os laços são o único lugar que precisa de verificação.
+
+Os backends contam as iterações em um inteiro local, o "combustível", e
+só chamam `Meter.refill` quando ele chega a zero: a cada `check_every`
+iterações, ou antes se o orçamento acaba antes. O orçamento de passos é
+exato; o relógio só é lido nesses pontos. Esgotar qualquer dos dois
+levanta `LimitExceeded`, com os passos consumidos e o tempo decorrido.
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_CHECK_EVERY = 4096
+
+
+@dataclass(frozen=True)
+class ExecLimits:
+    max_steps: Optional[int] = None       # iterações de laço; None: sem limite
+    timeout: Optional[float] = None       # segundos de relógio; None: sem limite
+    check_every: int = DEFAULT_CHECK_EVERY
+
+    def __post_init__(self):
+        if self.max_steps is not None and self.max_steps < 0:
+            raise ValueError("max_steps negativo.")
+        if self.check_every < 1:
+            raise ValueError("check_every deve ser pelo menos 1.")
+
+
+class LimitExceeded(Exception):
+    """Orçamento de passos (`reason == "steps"`) ou prazo (`"time"`) esgotado."""
+
+    def __init__(self, reason: str, steps: int, elapsed: float, limits: ExecLimits):
+        self.reason = reason
+        self.steps = steps
+        self.elapsed = elapsed
+        self.limits = limits
+        if reason == "steps":
+            msg = f"Limite de passos excedido: {steps} iterações (máximo {limits.max_steps})"
+        else:
+            msg = (f"Tempo limite de {limits.timeout}s excedido: {elapsed:.3f}s, "
+                   f"{steps} iterações")
+        super().__init__(msg)
+
+
+class Meter:
+    """Contador de uma execução. O backend guarda o combustível; `granted` é a última cota."""
+
+    def __init__(self, limits: Optional[ExecLimits] = None):
+        self.limits = limits if limits is not None else ExecLimits()
+        self.steps = 0
+        self.granted = 0
+        self.t0 = time.monotonic()
+        self.deadline = None if self.limits.timeout is None else self.t0 + self.limits.timeout
+
+    def start(self) -> int:
+        """Combustível inicial."""
+        return self._grant()
+
+    def refill(self, fuel: int) -> int:
+        """
+        Chamado com o combustível em zero ou abaixo (um laço vetorizado gasta
+        várias iterações de uma vez): contabiliza a cota, confere os limites
+        e devolve a próxima.
+        """
+        self.steps += self.granted - fuel
+        limits = self.limits
+        if limits.max_steps is not None and self.steps > limits.max_steps:
+            raise LimitExceeded("steps", self.steps, time.monotonic() - self.t0, limits)
+        if self.deadline is not None:
+            now = time.monotonic()
+            if now >= self.deadline:
+                raise LimitExceeded("time", self.steps, now - self.t0, limits)
+        return self._grant()
+
+    def used(self, fuel: int) -> int:
+        """Passos consumidos, dado o combustível atual do backend."""
+        return self.steps + self.granted - fuel
+
+    def _grant(self) -> int:
+        g = self.limits.check_every
+        if self.limits.max_steps is not None:
+            # a cota acaba exatamente no primeiro passo além do orçamento
+            g = min(g, self.limits.max_steps + 1 - self.steps)
+        self.granted = g
+        return g
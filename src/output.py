@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Canal de saída dos `print` MiniLang, comum aos backends.
+
+`exec_program` e o código de `codegen_python` não chamam o `print` do
+Python: escrevem em um `OutputSink`, que junta as linhas em um buffer e
+só escreve no destino quando ele passa de `buffer_size` caracteres, em
+`flush()` ou no fim da execução (os backends fazem o flush final mesmo
+quando a execução termina com erro). Com `buffer_size=0` cada linha é
+escrita na hora.
+
+O destino pode ser um stream de texto (padrão: o `sys.stdout` do momento,
+para funcionar com `contextlib.redirect_stdout`), um `io.StringIO` ou um
+stream binário (`io.BytesIO`, arquivo aberto em "wb"), que recebe UTF-8.
+
+`TraceSink` grava os eventos do trace do intérprete como JSON lines em um
+`OutputSink` (o mesmo da saída do programa, para as linhas ficarem na
+ordem, ou outro, p.ex. um arquivo).
+"""
+import io
+import json
+import sys
+from typing import Any, List, Optional
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+
+class OutputSink:
+    """Buffer de linhas de saída na frente de um stream de texto ou binário."""
+
+    def __init__(self, target=None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 binary: Optional[bool] = None):
+        self.target = target if target is not None else sys.stdout
+        self.buffer_size = buffer_size
+        if binary is None:
+            binary = isinstance(self.target, (io.RawIOBase, io.BufferedIOBase))
+        self.binary = binary
+        self._buf: List[str] = []
+        self._size = 0
+
+    def print(self, *values: Any):
+        """Uma linha com os valores separados por espaço (como o `print` do Python)."""
+        if len(values) == 1:
+            v = values[0]
+            line = (v if v.__class__ is str else str(v)) + "\n"
+        else:
+            line = " ".join(map(str, values)) + "\n"
+        self._buf.append(line)
+        self._size += len(line)
+        if self._size > self.buffer_size:
+            self.flush()
+
+    def write(self, text: str):
+        """Texto cru (sem separadores nem quebra de linha)."""
+        self._buf.append(text)
+        self._size += len(text)
+        if self._size > self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            text = "".join(self._buf)
+            self._buf.clear()
+            self._size = 0
+            self.target.write(text.encode("utf-8") if self.binary else text)
+        if hasattr(self.target, "flush"):
+            self.target.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        return False
+
+
+def _plain(value):
+    # arrays (arrays.Array e buffers) viram listas; o resto, texto
+    if hasattr(value, "__iter__"):
+        return list(value)
+    return str(value)
+
+
+class TraceSink:
+    """Eventos de trace, um objeto JSON por linha: {"ev": tipo, ...campos}."""
+
+    def __init__(self, out: Optional[OutputSink] = None):
+        self.out = out if out is not None else OutputSink()
+        self.events = 0
+
+    def event(self, ev: str, **fields: Any):
+        fields = {"ev": ev, **fields}
+        self.out.write(json.dumps(fields, ensure_ascii=False, default=_plain) + "\n")
+        self.events += 1
+
+    def flush(self):
+        self.out.flush()
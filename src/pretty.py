@@ -2,135 +2,138 @@
 """
 Impressão em ASCII da Árvore Sintática Abstrata (AST).
 """
-from dataclasses import is_dataclass
 from .ast_nodes import *
 
 
 def _children_of(node):
     """Retorna os filhos de um nó AST."""
-    if node is None or not is_dataclass(node):
+    if node is None or getattr(node, "kind", None) is None:
         return []
-    if isinstance(node, Program):
+    if node.kind == K_PROGRAM:
         return [("block", node.block)]
-    if isinstance(node, Block):
+    if node.kind == K_BLOCK:
         if node.stmts is None:
             return [("stmts", None)]
         if isinstance(node.stmts, list):
             return [(f"stmt[{i}]", s) for i, s in enumerate(node.stmts)]
         return [("stmts", node.stmts)]
-    if isinstance(node, Decl):
+    if node.kind == K_DECL:
         return [
             ("type", Id(f"{node.typ}{'[]' if node.is_array else ''}{' const' if node.is_const else ''}")),
             ("id", node.id),
             ("init", node.init)
         ]
-    if isinstance(node, Eval):
+    if node.kind == K_EVAL:
         return [("expr", node.expr)]
-    if isinstance(node, Print):
+    if node.kind == K_PRINT:
         return [(f"arg[{i}]", a) for i, a in enumerate(node.args)]
-    if isinstance(node, If):
+    if node.kind == K_IF:
         kids = [("cond", node.cond), ("then", node.then_stmt)]
         if node.else_stmt is not None:
             kids.append(("else", node.else_stmt))
         return kids
-    if isinstance(node, While):
+    if node.kind == K_WHILE:
         return [("cond", node.cond), ("body", node.body)]
-    if isinstance(node, Do):
+    if node.kind == K_DO:
         return [("body", node.body), ("cond", node.cond)]
-    if isinstance(node, Assign):
+    if node.kind == K_ASSIGN:
         return [("left", node.left), ("right", node.right)]
-    if isinstance(node, Rel):
+    if node.kind == K_REL:
         return [(f"left op='{node.op}'", node.left), ("right", node.right)]
-    if isinstance(node, Eq):
+    if node.kind == K_EQ:
         return [(f"left op='{node.op}'", node.left), ("right", node.right)]
-    if isinstance(node, Lg):
+    if node.kind == K_LG:
         return [(f"left op='{node.op}'", node.left), ("right", node.right)]
-    if isinstance(node, Unary):
+    if node.kind == K_UNARY:
         return [(f"op='{node.op}'", node.expr)]
-    if isinstance(node, Ari):
+    if node.kind == K_ARI:
         return [(f"left op='{node.op}'", node.left), ("right", node.right)]
-    if isinstance(node, NewArray):
+    if node.kind == K_NEWARRAY:
         return [("base", Id(node.base)), ("size", node.size)]
-    if isinstance(node, ArrayRef):
+    if node.kind == K_ARRAYREF:
         return [("id", node.id), ("index", node.index)]
-    if isinstance(node, Num):
+    if node.kind == K_NUM:
         return []
-    if isinstance(node, Bool):
+    if node.kind == K_BOOL:
         return []
-    if isinstance(node, Id):
+    if node.kind == K_ID:
         return []
     return []
 
 
 def _label_of(node):
     """Retorna o rótulo de um nó AST."""
-    if isinstance(node, Program):
+    if node.kind == K_PROGRAM:
         return "Program"
-    if isinstance(node, Block):
+    if node.kind == K_BLOCK:
         return "Block"
-    if isinstance(node, Decl):
+    if node.kind == K_DECL:
         return f"Decl({node.typ}{'[]' if node.is_array else ''}{', const' if node.is_const else ''})"
-    if isinstance(node, Eval):
+    if node.kind == K_EVAL:
         return "Eval"
-    if isinstance(node, Print):
+    if node.kind == K_PRINT:
         return "Print"
-    if isinstance(node, If):
+    if node.kind == K_IF:
         return "If"
-    if isinstance(node, While):
+    if node.kind == K_WHILE:
         return "While"
-    if isinstance(node, Do):
+    if node.kind == K_DO:
         return "Do"
-    if isinstance(node, Assign):
+    if node.kind == K_ASSIGN:
         return "Assign"
-    if isinstance(node, Rel):
+    if node.kind == K_REL:
         return f"Rel(op='{node.op}')"
-    if isinstance(node, Eq):
+    if node.kind == K_EQ:
         return f"Eq(op='{node.op}')"
-    if isinstance(node, Lg):
+    if node.kind == K_LG:
         return f"Lg(op='{node.op}')"
-    if isinstance(node, Unary):
+    if node.kind == K_UNARY:
         return f"Unary(op='{node.op}')"
-    if isinstance(node, Ari):
+    if node.kind == K_ARI:
         return f"Ari(op='{node.op}')"
-    if isinstance(node, NewArray):
+    if node.kind == K_NEWARRAY:
         return "NewArray"
-    if isinstance(node, ArrayRef):
+    if node.kind == K_ARRAYREF:
         return "ArrayRef"
-    if isinstance(node, Num):
+    if node.kind == K_NUM:
         return f"Num({node.value})"
-    if isinstance(node, Bool):
+    if node.kind == K_BOOL:
         return f"Bool({node.value})"
-    if isinstance(node, Id):
+    if node.kind == K_ID:
         return f"Id({node.name})"
     return type(node).__name__
 
 
 def print_ast_ascii(node, *, show_edge_labels=True):
-    """Imprime a AST em formato ASCII."""
-    def rec(n, prefix="", is_last=True, edge_label=None):
-        # Usar apenas caracteres ASCII
-        connector = "`-- " if is_last else "|-- "
-        if edge_label and show_edge_labels:
-            line = f"{prefix}{connector}[{edge_label}] {_label_of(n)}"
-        else:
-            line = f"{prefix}{connector}{_label_of(n)}"
-        print(line)
-        new_prefix = f"{prefix}    " if is_last else f"{prefix}|   "
+    """
+    Imprime a AST em formato ASCII. Usa uma pilha explícita em vez de
+    recursão: expressões geradas com milhares de níveis não estouram o
+    limite de recursão do Python.
+    """
+    # (filho, prefixo, é o último, rótulo da aresta, é filho da raiz), em ordem inversa
+    stack = []
+
+    def push_kids(n, prefix, top):
         kids = _children_of(n)
-        for i, (elabel, child) in enumerate(kids):
-            last = (i == len(kids) - 1)
-            if child is None:
-                none_line = f"{new_prefix}{'`-- ' if last else '|-- '}"
-                none_line += f"[{elabel}] None" if show_edge_labels else "None"
-                print(none_line)
-            else:
-                rec(child, new_prefix, last, elabel)
+        for i in range(len(kids) - 1, -1, -1):
+            elabel, child = kids[i]
+            stack.append((child, prefix, i == len(kids) - 1, elabel, top))
 
     print(_label_of(node))
-    kids = _children_of(node)
-    for i, (elabel, child) in enumerate(kids):
-        last = (i == len(kids) - 1)
-        if child is None:
-            print(f"{'`-- ' if last else '|-- '}[{elabel}] None")
+    push_kids(node, "", True)
+    while stack:
+        n, prefix, is_last, edge_label, top = stack.pop()
+        # Usar apenas caracteres ASCII
+        connector = "`-- " if is_last else "|-- "
+        if n is None:
+            # filhos da raiz sempre mostram o rótulo
+            if show_edge_labels or top:
+                print(f"{prefix}{connector}[{edge_label}] None")
+            else:
+                print(f"{prefix}{connector}None")
+            continue
+        if edge_label and show_edge_labels:
+            print(f"{prefix}{connector}[{edge_label}] {_label_of(n)}")
         else:
-            rec(child, "", last, elabel)
+            print(f"{prefix}{connector}{_label_of(n)}")
+        push_kids(n, f"{prefix}    " if is_last else f"{prefix}|   ", False)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Profiler do intérprete: execuções e tempo por statement.
+
+`exec_program(..., profiler=Profile())` troca as entradas de `stmt_table`
+por versões que contam e cronometram cada statement (como o trace e os
+limites, os handlers normais não mudam). Por statement ficam:
+
+- `count`: execuções;
+- `total`: tempo acumulado, incluindo os statements de dentro;
+- `own`: só o do próprio statement (condições, expressões, push/pop do
+  bloco do corpo), sem os statements de dentro;
+- `trips`: voltas de um `while`/`do` (somando as vetorizadas);
+- `taken`: vezes que o `then` de um `if` rodou.
+
+Os contadores ficam por `key` do statement (ver Node.key), que também
+identifica as visões da arena (arena.py), recriadas a cada acesso; cada
+registro guarda o statement, então a chave não é reaproveitada por outro
+nó enquanto o `Profile` existe.
+
+Os `if` de uma cadeia `else if` são contados um a um, mas o tempo da
+cadeia fica todo no primeiro. Blocos não entram: o custo de abrir e
+fechar o escopo conta para o statement que contém o bloco.
+
+`report` lista os statements com mais tempo próprio, com a linha e a
+coluna de cada um (o `pos` deixado pelo front end) e, se receber o texto
+do programa, o trecho do código.
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .ast_nodes import *
+
+
+class StmtStats:
+    """Contadores de um statement."""
+    __slots__ = ("node", "count", "total", "own", "trips", "taken")
+
+    def __init__(self, node):
+        self.node = node
+        self.count = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.trips = 0
+        self.taken = 0
+
+
+class Profile:
+    """Resultado de uma ou mais execuções com profiler (os contadores somam)."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.stats: Dict[int, StmtStats] = {}     # statement.key -> contadores
+        self.elapsed = 0.0                        # tempo total das execuções
+
+    def record(self, node) -> StmtStats:
+        """Contadores de `node` (criados na primeira vez)."""
+        r = self.stats.get(node.key)
+        if r is None:
+            r = self.stats[node.key] = StmtStats(node)
+        return r
+
+    def get(self, node) -> Optional[StmtStats]:
+        return self.stats.get(node.key)
+
+    def hot(self, top: Optional[int] = None) -> List[StmtStats]:
+        """Statements executados, do maior tempo próprio para o menor."""
+        ranked = sorted(self.stats.values(), key=lambda r: r.own, reverse=True)
+        return ranked if top is None else ranked[:top]
+
+    def report(self, top: int = 10, source: Optional[str] = None) -> str:
+        """Tabela dos `top` statements mais quentes."""
+        lines = [f"{'posição':<10} {'statement':<28} {'execs':>9} {'próprio ms':>11} "
+                 f"{'%':>6} {'total ms':>10}  laço/desvio"]
+        elapsed = self.elapsed or sum(r.own for r in self.stats.values()) or 1.0
+        text_lines = source.split("\n") if source is not None else None
+        for r in self.hot(top):
+            pos = r.node.pos
+            where = f"{pos[0]}:{pos[1]}" if pos is not None else "?"
+            if pos is not None and text_lines is not None and pos[0] <= len(text_lines):
+                text = " ".join(text_lines[pos[0] - 1][pos[1]:].split())
+            else:
+                text = _describe(r.node)
+            lines.append(f"{where:<10} {text:<28.28} {r.count:>9} {r.own * 1e3:>11.3f} "
+                         f"{100 * r.own / elapsed:>5.1f}% {r.total * 1e3:>10.3f}  {_shape(r)}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Contadores de todos os statements, do mais quente para o menos (p.ex. para JSON)."""
+        rows = []
+        for r in self.hot():
+            line, col = r.node.pos or (None, None)
+            row = {"stmt": _describe(r.node), "line": line, "column": col, "count": r.count,
+                   "own": r.own, "total": r.total}
+            if r.node.kind in (K_WHILE, K_DO):
+                row["trips"] = r.trips
+            elif r.node.kind == K_IF:
+                row["taken"] = r.taken
+            rows.append(row)
+        return rows
+
+
+def _shape(r: StmtStats) -> str:
+    k = r.node.kind
+    if k in (K_WHILE, K_DO) and r.count:
+        return f"{r.trips} voltas ({r.trips / r.count:.1f}/entrada)"
+    if k == K_IF and r.count:
+        return f"then {100 * r.taken / r.count:.1f}%"
+    return ""
+
+
+def _describe(node) -> str:
+    """Resumo do statement, para quando não há o texto do programa."""
+    k = node.kind
+    if k == K_DECL:
+        return f"decl {node.id.name}"
+    if k == K_EVAL:
+        e = node.expr
+        if e.kind == K_ASSIGN:
+            target = e.left.name if e.left.kind == K_ID else f"{e.left.id.name}[]"
+            return f"{target} = ..."
+        return "eval"
+    if k == K_PRINT:
+        return "print"
+    if k == K_IF:
+        return "if"
+    if k == K_WHILE:
+        return "while"
+    if k == K_DO:
+        return "do-while"
+    return type(node).__name__
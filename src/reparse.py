@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Reparse incremental para o front end ANTLR.
+
+`ParsedSource` guarda o texto, a AST e uma árvore de `Span`s paralela aos
+statements (blocos, if/while/do e statements simples), com a posição de
+cada um no texto. `edit(offset, removidos, inseridos)` aplica uma edição e
+reparseia só o menor trecho que a contém:
+
+- dentro de um statement simples (ou if/while/do), esse statement;
+- dentro de um bloco, entre statements, só os filhos que encostam na
+  edição, parseados como `{ trecho }` e emendados na lista do bloco;
+- se o trecho não parseia isolado (p.ex. a edição abriu um comentário ou
+  desbalanceou chaves), sobe para o statement/bloco pai, até o programa.
+
+O resto da AST (e suas anotações) é reaproveitado. As posições dos spans
+são relativas ao pai, então uma edição só desloca os irmãos seguintes de
+cada ancestral, não a árvore inteira. Pelo mesmo motivo o `pos` (linha,
+coluna) dos statements não é atualizado a cada edição: depois de `edit`,
+`positions_stale` fica True até `refresh_positions()`.
+
+Só `ParsedSource._parse` depende do front end. `tradutor.py`, que roda
+sem o pacote `src`, tem uma cópia desta lógica de spans e emendas com o
+seu próprio `_parse`; este arquivo é a referência, e mudanças nela
+devem ser levadas para lá.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from .ast_nodes import *
+from .ast_builder import ASTBuilder
+from .interner import Interner
+
+
+class Span:
+    """Posição de um statement: `start` relativo ao início do span pai."""
+    __slots__ = ("node", "start", "length", "parent", "slot", "children")
+
+    def __init__(self, node, start: int, length: int):
+        self.node = node
+        self.start = start
+        self.length = length
+        self.parent: Optional["Span"] = None
+        self.slot: Any = None          # campo no nó pai (if/while/do); em blocos, a posição
+        self.children: List["Span"] = []
+
+    def abs_start(self) -> int:
+        pos = 0
+        span = self
+        while span is not None:
+            pos += span.start
+            span = span.parent
+        return pos
+
+
+@dataclass
+class Change:
+    """
+    Resultado de `ParsedSource.edit`: os filhos [index, index + removed) de
+    `parent` viraram `added` filhos novos. `full`: o programa foi reparseado
+    inteiro (o bloco principal foi trocado).
+    """
+    parent: Optional[Span]
+    index: int
+    removed: int
+    added: int
+    full: bool = False
+
+
+# =========================================================
+# Parse (ANTLR)
+# =========================================================
+
+def parse_antlr(text: str, interner: Interner, rule: str = "program"):
+    """
+    Parseia `text` com a regra `rule` ("program", "block" ou "stmt") e exige
+    que o texto inteiro seja consumido. Devolve (nó da AST, contexto ANTLR);
+    erros de sintaxe viram SyntaxError com `lineno` e `offset` a partir de
+    1, como no Python (a mensagem traz "linha L:C" com a coluna do ANTLR,
+    a partir de 0).
+    """
+    from antlr4 import InputStream, CommonTokenStream, Token
+    from antlr4.error.ErrorListener import ErrorListener
+    from .generated.MiniLangLexer import MiniLangLexer
+    from .generated.MiniLangParser import MiniLangParser
+
+    class _Raise(ErrorListener):
+        def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+            err = SyntaxError(f"linha {line}:{column} {msg}")
+            err.lineno, err.offset = line, column + 1
+            raise err
+
+    lexer = MiniLangLexer(InputStream(text))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(_Raise())
+    stream = CommonTokenStream(lexer)
+    parser = MiniLangParser(stream)
+    parser.removeErrorListeners()
+    parser.addErrorListener(_Raise())
+    ctx = getattr(parser, rule)()
+    if stream.LA(1) != Token.EOF:
+        tok = stream.LT(1)
+        err = SyntaxError(f"linha {tok.line}:{tok.column} entrada extra após o {rule}: '{tok.text}'")
+        err.lineno, err.offset = tok.line, tok.column + 1
+        raise err
+    return ASTBuilder(interner).visit(ctx), ctx
+
+
+def _span_tree(ctx, node, parent_abs: int) -> Span:
+    """Spans do statement `node` (contexto `ctx`) e dos statements dentro dele."""
+    start = ctx.start.start
+    span = Span(node, start - parent_abs, ctx.stop.stop + 1 - start)
+    if not hasattr(ctx, "LBRACE") and ctx.getChildCount() == 1:
+        ctx = ctx.getChild(0)         # stmt: block | decl | ... (sempre um filho só)
+    kind = node.kind
+    if kind == K_BLOCK:
+        kids = ctx.stmts().stmt() if ctx.stmts() is not None else []
+        pairs = [(c, n, i) for i, (c, n) in enumerate(zip(kids, node.stmts or []))]
+    elif kind == K_IF:
+        pairs = [(c, n, slot) for c, n, slot in
+                 zip(ctx.stmt(), (node.then_stmt, node.else_stmt), ("then_stmt", "else_stmt"))]
+    elif kind in (K_WHILE, K_DO):
+        pairs = [(ctx.stmt(), node.body, "body")]
+    else:
+        pairs = []
+    for c, n, slot in pairs:
+        child = _span_tree(c, n, start)
+        child.parent = span
+        child.slot = slot
+        span.children.append(child)
+    return span
+
+
+# =========================================================
+# Fonte com AST e spans
+# =========================================================
+
+class ParsedSource:
+    """Texto + AST + spans, atualizados edição a edição."""
+
+    def __init__(self, source: str, interner: Optional[Interner] = None):
+        self.interner = interner if interner is not None else Interner()
+        self._parse_full(source)
+
+    def _parse(self, text: str, rule: str):
+        """
+        Gancho do front end: parseia `text` inteiro com a regra `rule`
+        ("program", "block" ou "stmt") e devolve (nó, span), com o span
+        relativo ao início de `text`; no programa, o span do bloco principal.
+        Erros de sintaxe viram SyntaxError.
+        """
+        node, ctx = parse_antlr(text, self.interner, rule)
+        if rule == "program":
+            return node, _span_tree(ctx.block(), node.block, 0)
+        return node, _span_tree(ctx, node, 0)
+
+    def _parse_full(self, source: str):
+        prog, root = self._parse(source, "program")
+        self.source = source
+        self.prog = prog
+        self.root = root
+        self.positions_stale = False
+
+    # ---- API ----
+    def edit(self, offset: int, removed: int, inserted: str) -> Change:
+        """
+        Substitui `removed` caracteres a partir de `offset` por `inserted` e
+        atualiza AST e spans. Se o novo texto não parseia, levanta
+        SyntaxError e nada muda.
+        """
+        old = self.source
+        lo, hi = offset, offset + removed
+        if not 0 <= lo <= hi <= len(old):
+            raise ValueError(f"Edição fora do texto: {offset}+{removed}")
+        new = old[:lo] + inserted + old[hi:]
+        delta = len(inserted) - removed
+
+        # Menor span que contém a edição estritamente (sem tocar o primeiro
+        # nem o último caractere, para não mudar os tokens das bordas)
+        span, base = self.root, self.root.start
+        if base < lo and hi < base + span.length:
+            while True:
+                i = _child_at(span, base, lo)
+                if i < 0:
+                    break
+                child = span.children[i]
+                cbase = base + child.start
+                if not (cbase < lo and hi < cbase + child.length):
+                    break
+                span, base = child, cbase
+        else:
+            span = None
+
+        # se o trecho não parseia isolado, tenta o pai
+        while span is not None:
+            parent_base = base - span.start
+            if span.node.kind == K_BLOCK:
+                change = self._reparse_region(span, base, lo, hi, new, delta)
+            else:
+                change = self._reparse_stmt(span, base, new, delta)
+            if change is not None:
+                self.source = new
+                self.positions_stale = True
+                return change
+            span, base = span.parent, parent_base
+
+        self._parse_full(new)
+        return Change(None, 0, 0, 0, full=True)
+
+    def refresh_positions(self):
+        """Recalcula o `pos` de todos os statements a partir dos spans (O(n))."""
+        text = self.source
+        starts = [0]                 # posição de início de cada linha
+        i = text.find("\n")
+        while i >= 0:
+            starts.append(i + 1)
+            i = text.find("\n", i + 1)
+        stack = [(self.root, 0)]
+        while stack:
+            span, base = stack.pop()
+            pos = base + span.start
+            line = bisect_right(starts, pos)
+            span.node.pos = (line, pos - starts[line - 1])
+            stack.extend((child, pos) for child in span.children)
+        self.positions_stale = False
+
+    # ---- Reparse de um statement inteiro ----
+    def _reparse_stmt(self, span: Span, base: int, new: str, delta: int) -> Optional[Change]:
+        parent = span.parent
+        if parent is None:
+            return None           # o bloco principal só é trocado pelo parse completo
+        try:
+            node, fresh = self._parse(new[base:base + span.length + delta], "stmt")
+        except SyntaxError:
+            return None
+        fresh.start, fresh.parent, fresh.slot = span.start, parent, span.slot
+        i = _index_of(parent, span)
+        parent.children[i] = fresh
+        if parent.node.kind == K_BLOCK:
+            parent.node.stmts[i] = node
+        else:
+            setattr(parent.node, span.slot, node)
+        _grow(fresh, delta)
+        return Change(parent, i, 1, 1)
+
+    # ---- Reparse de um trecho entre statements de um bloco ----
+    def _reparse_region(self, span: Span, base: int, lo: int, hi: int,
+                        new: str, delta: int) -> Optional[Change]:
+        # filhos [a, b) que encostam na edição, reparseados como "{ trecho }"
+        kids = span.children
+        a = 0
+        while a < len(kids) and base + kids[a].start + kids[a].length < lo:
+            a += 1
+        b = a
+        while b < len(kids) and base + kids[b].start <= hi:
+            b += 1
+        start = base + kids[a - 1].start + kids[a - 1].length if a > 0 else base + 1
+        end = base + kids[b].start if b < len(kids) else base + span.length - 1
+        if start > lo or end < hi:
+            return None
+        try:
+            block, region = self._parse("{" + new[start:end + delta] + "}", "block")
+        except SyntaxError:
+            return None
+        added = region.children
+        for child in added:
+            child.start += start - 1 - base
+            child.parent = span
+        for child in kids[b:]:
+            child.start += delta
+        kids[a:b] = added
+        stmts = list(span.node.stmts or [])
+        stmts[a:b] = block.stmts or []
+        span.node.stmts = stmts or None
+        for i in range(a, len(kids)):
+            kids[i].slot = i
+        span.length += delta
+        _grow(span, delta)
+        return Change(span, a, b - a, len(added))
+
+
+def _child_at(span: Span, base: int, pos: int) -> int:
+    """Índice do último filho que começa antes de `pos` (busca binária), ou -1."""
+    kids = span.children
+    lo, hi = 0, len(kids)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if base + kids[mid].start < pos:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo - 1
+
+
+def _index_of(parent: Span, span: Span) -> int:
+    if parent.node.kind == K_BLOCK:
+        return span.slot
+    return parent.children.index(span)
+
+
+def _grow(span: Span, delta: int):
+    """O span mudou de tamanho em `delta`: ajusta ancestrais e irmãos seguintes."""
+    if not delta:
+        return
+    node, parent = span, span.parent
+    while parent is not None:
+        for sib in parent.children[_index_of(parent, node) + 1:]:
+            sib.start += delta
+        parent.length += delta
+        node, parent = parent, parent.parent
@@ -2,17 +2,35 @@
 """
 Análise Semântica: verificação de tipos, escopos, def-use e constantes.
 """
-from dataclasses import dataclass
-from typing import List, Dict, Any, Tuple, Set
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from .ast_nodes import *
+from .intmodel import BIGINT, check_model, fits64
+from .dataflow import build_cfg, effects, gen_kill, mark_dead_arrays, must_bits, solve, USE, DEF
 
 
 class SemanticError(Exception):
-    pass
+    """
+    Erro semântico; `node` é o statement onde ocorreu (quando conhecido) e
+    `expr`, nos erros de def-use, o Id do uso.
+    """
+
+    def __init__(self, msg: str = "", node: Any = None, expr: Any = None):
+        super().__init__(msg)
+        self.node = node
+        self.expr = expr
 
 
 INT = "int"
 BOOL = "bool"
+# Tipo de uma expressão cujo erro já foi reportado (só no modo que coleta
+# todos os erros): operações sobre ERR não geram erros em cascata.
+ERR = "<erro>"
+
+
+def _type_name(typ: str, is_array: bool = False) -> str:
+    return typ + ("[]" if is_array else "")
 
 
 @dataclass(frozen=True)
@@ -23,47 +41,276 @@ class Sym:
     is_array: bool
     is_const: bool
     scope_depth: int
+    idx: int = -1          # número denso do símbolo, atribuído na declaração
+    bit: int = 0           # 1 << idx (posição nos bitsets de dataflow)
+
+
+# Códigos de tipo e flags das linhas de SymbolTable
+_TYPES = (INT, BOOL)
+_TYPE_CODE = {t: code for code, t in enumerate(_TYPES)}
+_F_ARRAY = 1
+_F_CONST = 2
+
+
+class SymbolTable:
+    """
+    Snapshot da tabela de símbolos: uma linha por declaração, em ordem, em
+    arrays paralelos (id do nome, código do tipo, flags, profundidade).
+    Indexar ou iterar materializa as linhas como dicts
+    {"name", "type", "const", "scope_depth"}; uma fatia devolve outra
+    SymbolTable. Quem só quer saber se o programa é válido não paga pelos dicts.
+    """
+    __slots__ = ("name_ids", "types", "flags", "depths", "names", "_ids")
+
+    def __init__(self):
+        self.name_ids = array("i")
+        self.types = array("b")
+        self.flags = array("b")
+        self.depths = array("i")
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def _name_id(self, name: str) -> int:
+        nid = self._ids.get(name)
+        if nid is None:
+            nid = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return nid
+
+    def append(self, name: str, typ: str, is_array: bool, is_const: bool, depth: int):
+        self.name_ids.append(self._name_id(name))
+        self.types.append(_TYPE_CODE[typ])
+        self.flags.append((_F_ARRAY if is_array else 0) | (_F_CONST if is_const else 0))
+        self.depths.append(depth)
+
+    def extend(self, other: "SymbolTable"):
+        """Acrescenta as linhas de `other` (que pode ter outros ids de nome)."""
+        if other.names is self.names:
+            self.name_ids.extend(other.name_ids)
+        else:
+            names = other.names
+            for nid in other.name_ids:
+                self.name_ids.append(self._name_id(names[nid]))
+        self.types.extend(other.types)
+        self.flags.extend(other.flags)
+        self.depths.extend(other.depths)
+
+    def __len__(self):
+        return len(self.name_ids)
 
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            out = SymbolTable()
+            out.names, out._ids = self.names, self._ids   # mesmos ids de nome
+            out.name_ids = self.name_ids[i]
+            out.types = self.types[i]
+            out.flags = self.flags[i]
+            out.depths = self.depths[i]
+            return out
+        flags = self.flags[i]
+        return {
+            "name": self.names[self.name_ids[i]],
+            "type": _type_name(_TYPES[self.types[i]], bool(flags & _F_ARRAY)),
+            "const": bool(flags & _F_CONST),
+            "scope_depth": self.depths[i],
+        }
 
-def check_semantics(prog: Program) -> List[Dict[str, Any]]:
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if isinstance(other, SymbolTable):
+            other = list(other)
+        return list(self) == other
+
+    def sorted_indices(self) -> List[int]:
+        """Linhas ordenadas por (profundidade, nome), estável como `sorted`."""
+        names = self.names
+        rank = [0] * len(names)
+        for r, nid in enumerate(sorted(range(len(names)), key=names.__getitem__)):
+            rank[nid] = r
+        width = len(names)
+        depths, name_ids = self.depths, self.name_ids
+        keys = [depths[i] * width + rank[name_ids[i]] for i in range(len(self))]
+        return sorted(range(len(keys)), key=keys.__getitem__)
+
+    @classmethod
+    def from_rows(cls, rows) -> "SymbolTable":
+        table = cls()
+        for row in rows:
+            typ = row["type"]
+            is_array = typ.endswith("[]")
+            table.append(row["name"], typ[:-2] if is_array else typ, is_array,
+                         row["const"], row["scope_depth"])
+        return table
+
+
+@dataclass
+class SemaState:
+    """Estado do escopo global entre chamadas de `check_toplevel`."""
+    top: Dict[Any, Sym] = field(default_factory=dict)
+    n_syms: int = 0
+    rows: SymbolTable = field(default_factory=SymbolTable)
+    errors: Optional[List[SemanticError]] = None    # None: para no primeiro erro
+    declared: List[Tuple[Any, Sym]] = field(default_factory=list)   # globais, em ordem
+    memo: Optional[Dict[int, Tuple[str, bool]]] = None   # id(expr) -> tipo, na AST em DAG
+    int_model: str = BIGINT        # nos modelos de 64 bits, literais precisam caber
+    # Relógio da verificação, para ordenar os erros (ver in_program_order):
+    # o instante de cada erro de `errors` e de cada uso de variável visto.
+    clock: int = 0
+    ticks: List[int] = field(default_factory=list)
+    marks: Dict[Any, int] = field(default_factory=dict)   # (stmt, Id) ou stmt -> instante
+
+
+def check_semantics(prog: Program, errors: Optional[List[SemanticError]] = None,
+                    int_model: str = BIGINT) -> SymbolTable:
     """
     Verifica semântica da AST: tipos, escopos, constantes, def-use.
-    Retorna um snapshot da tabela de símbolos para impressão.
+    Anota cada expressão com o tipo resolvido (`ty`) e cada Id com seu
+    símbolo (`sym`), para os backends dispensarem verificações em runtime,
+    e os statements com os arrays mortos após cada um (`dead`).
+    Retorna o snapshot da tabela de símbolos (`SymbolTable`).
+
+    Sem `errors`, levanta SemanticError no primeiro erro. Com uma lista,
+    acrescenta nela todos os erros (cada um com o statement em `node`) e
+    continua: expressões com erro ganham o tipo ERR, que não gera novos
+    erros, e cada variável não declarada ou usada antes de inicialização é
+    reportada uma vez. Nesse caso os `dead` não são calculados.
+    Os erros seguem a ordem do programa: os de def-use, que saem de uma
+    passada própria sobre o CFG, são intercalados com os de tipo pelo
+    statement onde ocorrem, e "o primeiro erro" é o primeiro dessa ordem.
+
+    Se a AST foi construída em DAG (`prog.exprs`, ver hashcons.py), cada
+    subexpressão compartilhada é verificada uma vez só. Com `int_model`
+    de 64 bits (ver intmodel.py), literais int fora do intervalo são erro.
     """
-    scopes: List[Dict[str, Sym]] = []
-    defs: Set[Sym] = set()
-    symtab_snapshot: List[Dict[str, Any]] = []
+    # Os erros são sempre coletados: um uso antes de inicialização só é
+    # encontrado depois da verificação de tipos do programa inteiro, e pode
+    # vir antes do primeiro erro de tipo.
+    found: List[SemanticError] = []
+    state = SemaState(errors=found, memo={} if getattr(prog, "exprs", None) is not None else None,
+                      int_model=check_model(int_model))
+    check = toplevel_checker(state)
+    stmts = prog.block.stmts
+    if isinstance(stmts, list):
+        for stmt in stmts:
+            check(stmt)
+    elif stmts is not None:
+        check(stmts)
+    cfg = build_cfg(prog.block)
+    check_definite_assignment(cfg, state.n_syms, errors=found)
+    if found:
+        found = in_program_order(state)
+        if errors is None:
+            raise found[0]
+        errors.extend(found)
+    else:
+        mark_dead_arrays(cfg)
+    return state.rows
+
+
+def in_program_order(state: SemaState) -> List[SemanticError]:
+    """
+    Os erros de `state.errors`, coletados por `toplevel_checker` (um instante
+    em `state.ticks` cada) e depois por `check_definite_assignment`, na
+    ordem em que uma única descida pelo programa os encontraria: um uso
+    antes de inicialização no instante em que a verificação de tipos passa
+    pelo Id, ou, se ela não passou (subexpressão compartilhada na AST em
+    DAG), no início do statement.
+    """
+    found = state.errors
+    ticks, marks = state.ticks, state.marks
+    n_typing = len(ticks)
+
+    def rank(i: int):
+        if i < n_typing:
+            return (ticks[i], i)
+        e = found[i]
+        stmt = e.node.key if e.node is not None else None
+        t = marks.get((stmt, e.expr.key)) if e.expr is not None else None
+        if t is None:
+            t = marks.get(stmt, state.clock)
+        return (t, i)
+
+    return [found[i] for i in sorted(range(len(found)), key=rank)]
+
+
+def toplevel_checker(state: SemaState, reuse: Optional[Dict[Any, Sym]] = None):
+    """
+    Devolve uma função que verifica tipos e escopos de um statement do
+    escopo global, continuando de `state`, e anota a AST (o def-use fica
+    com `check_definite_assignment`).
+    `reuse` são símbolos globais de uma verificação anterior: redeclarar um
+    deles com o mesmo tipo reaproveita o Sym, e as anotações dos usos feitas
+    antes continuam válidas (ver incremental.py).
+    """
+    # Escopos indexados pelo id internado do nome (Id.nid); o nome em si
+    # só é usado como chave quando o Id não passou por um Interner.
+    scopes: List[Dict[Any, Sym]] = [state.top]
+    symtab_snapshot = state.rows
+    errors = state.errors
+    poisoned: Dict[Any, Sym] = {}     # não declaradas já reportadas
+    current = None                    # statement em verificação
+    memo = state.memo
+    bounded = state.int_model != BIGINT
+
+    marks = state.marks
+
+    def error(msg: str):
+        err = SemanticError(msg, current)
+        if errors is None:
+            raise err
+        errors.append(err)
+        state.ticks.append(state.clock)
+        state.clock += 1
+
+    def mark(ident: Id):
+        # instante em que um uso seria checado contra o def-use
+        key = (current.key, ident.key)
+        if key not in marks:
+            marks[key] = state.clock
+        state.clock += 1
 
     def push():
         scopes.append({})
 
     def pop():
-        nonlocal defs
-        for s in list(defs):
-            if s.scope_depth == len(scopes) - 1:
-                defs.remove(s)
         scopes.pop()
 
-    def declare(name: str, typ: str, is_array: bool, is_const: bool) -> Sym:
+    def declare(ident: Id, typ: str, is_array: bool, is_const: bool) -> Sym:
         depth = len(scopes) - 1
-        if name in scopes[-1]:
-            raise SemanticError(f"Redeclaração no mesmo escopo: '{name}'.")
-        sym = Sym(name, typ, is_array, is_const, depth)
-        scopes[-1][name] = sym
-        symtab_snapshot.append({
-            "name": name,
-            "type": typ + ("[]" if is_array else ""),
-            "const": is_const,
-            "scope_depth": depth
-        })
+        name = ident.name
+        key = ident.nid if ident.nid >= 0 else name
+        if key in scopes[-1]:
+            error(f"Redeclaração no mesmo escopo: '{name}'.")   # segue com a nova
+        sym = reuse.get(key) if reuse and depth == 0 else None
+        if sym is None or (sym.typ, sym.is_array, sym.is_const) != (typ, is_array, is_const):
+            n = state.n_syms
+            sym = Sym(name, typ, is_array, is_const, depth, n, 1 << n)
+            state.n_syms = n + 1
+        scopes[-1][key] = sym
+        if depth == 0:
+            state.declared.append((key, sym))
+        symtab_snapshot.append(name, typ, is_array, is_const, depth)
         return sym
 
-    def lookup(name: str) -> Sym:
+    def lookup(ident: Id) -> Sym:
+        key = ident.nid if ident.nid >= 0 else ident.name
         for depth in range(len(scopes) - 1, -1, -1):
             tab = scopes[depth]
-            if name in tab:
-                return tab[name]
-        raise SemanticError(f"Variável '{name}' não declarada.")
+            if key in tab:
+                return tab[key]
+        # não declarada: reporta uma vez; os usos seguintes ficam com tipo ERR
+        sym = poisoned.get(key)
+        if sym is None:
+            sym = poisoned[key] = Sym(ident.name, ERR, False, False, -1)
+            error(f"Variável '{ident.name}' não declarada.")
+        return sym
+
+    def _bind(ident: Id, sym: Sym):
+        ident.sym = sym
+        ident.ty = _type_name(sym.typ, sym.is_array)
 
     def _check_block(node: Block):
         push()
@@ -80,237 +327,321 @@ def check_semantics(prog: Program) -> List[Dict[str, Any]]:
             _check_stmt(node)
 
     def _check_stmt(node):
-        nonlocal defs
-        if isinstance(node, Block):
+        nonlocal current
+        if node.kind == K_BLOCK:
             _check_block(node)
             return
+        current = node
+        marks[node.key] = state.clock
 
-        if isinstance(node, Decl):
+        if node.kind == K_DECL:
             if not scopes:
                 push()
-            sym = declare(node.id.name, node.typ, node.is_array, node.is_const)
+            sym = declare(node.id, node.typ, node.is_array, node.is_const)
+            _bind(node.id, sym)
             if node.is_const and node.init is None:
-                raise SemanticError(f"const '{sym.name}' requer inicialização.")
+                error(f"const '{sym.name}' requer inicialização.")
             if node.init is not None:
                 t, arr = _infer_expr_type(node.init)
                 if sym.is_array:
-                    if not isinstance(node.init, NewArray):
-                        raise SemanticError(
-                            f"Inicialização de array '{sym.name}' deve ser 'new {sym.typ}[...]'."
-                        )
-                    if t != sym.typ or not arr:
-                        raise SemanticError(f"Inicialização incompatível em '{sym.name}'.")
-                else:
-                    if arr:
-                        raise SemanticError(
-                            f"Variável escalar '{sym.name}' não pode receber array."
-                        )
-                    if t != sym.typ:
-                        raise SemanticError(
-                            f"Tipo de '{sym.name}' é {sym.typ}, não {t}."
-                        )
-                defs.add(sym)
+                    if not node.init.kind == K_NEWARRAY:
+                        error(f"Inicialização de array '{sym.name}' deve ser 'new {sym.typ}[...]'.")
+                    elif t != ERR and (t != sym.typ or not arr):
+                        error(f"Inicialização incompatível em '{sym.name}'.")
+                elif arr:
+                    error(f"Variável escalar '{sym.name}' não pode receber array.")
+                elif t != ERR and t != sym.typ:
+                    error(f"Tipo de '{sym.name}' é {sym.typ}, não {t}.")
             return
 
-        if isinstance(node, Print):
+        if node.kind == K_PRINT:
             for a in node.args:
                 _infer_expr_type(a)
             return
 
-        if isinstance(node, Eval):
-            expr = node.expr
-            if isinstance(expr, Assign):
-                if isinstance(expr.left, Id):
-                    sym = lookup(expr.left.name)
-                    if sym.is_const:
-                        raise SemanticError(f"Não é permitido reatribuir const '{sym.name}'.")
-                    tR, aR = _infer_expr_type(expr.right)
-                    if sym.is_array:
-                        if not aR:
-                            raise SemanticError(
-                                f"Variável array '{sym.name}' só pode receber array (new {sym.typ}[...])."
-                            )
-                        if tR != sym.typ:
-                            raise SemanticError(
-                                f"Tipo base incompatível em '{sym.name}': esperado {sym.typ}, obtido {tR}."
-                            )
-                    else:
-                        if aR:
-                            raise SemanticError(
-                                f"Variável escalar '{sym.name}' não pode receber array."
-                            )
-                        if tR != sym.typ:
-                            raise SemanticError(
-                                f"Tipo de '{sym.name}' é {sym.typ}, não {tR}."
-                            )
-                    defs.add(sym)
-                    return
-                elif isinstance(expr.left, ArrayRef):
-                    sym = lookup(expr.left.id.name)
-                    if not sym.is_array:
-                        raise SemanticError(f"'{sym.name}' não é array.")
-                    ti, ai = _infer_expr_type(expr.left.index)
-                    if ai or ti != INT:
-                        raise SemanticError("Índice de array deve ser int.")
-                    tR, aR = _infer_expr_type(expr.right)
-                    if aR:
-                        raise SemanticError("Atribuição de elemento não aceita array.")
-                    if tR != sym.typ:
-                        raise SemanticError(f"Elemento de '{sym.name}' é {sym.typ}, não {tR}.")
-                    if sym not in defs:
-                        raise SemanticError(f"Uso de array '{sym.name}' antes de inicialização.")
-                    return
-            _infer_expr_type(expr)
+        if node.kind == K_EVAL:
+            if node.expr.kind == K_ASSIGN:
+                _check_assign(node.expr)
+            else:
+                _infer_expr_type(node.expr)
             return
 
-        if isinstance(node, Assign):
-            if isinstance(node.left, Id):
-                sym = lookup(node.left.name)
-                if sym.is_const:
-                    raise SemanticError(f"Não é permitido reatribuir const '{sym.name}'.")
-                tR, aR = _infer_expr_type(node.right)
-                if sym.is_array:
-                    if not aR:
-                        raise SemanticError(
-                            f"Variável array '{sym.name}' só pode receber array (new {sym.typ}[...])."
-                        )
-                    if tR != sym.typ:
-                        raise SemanticError(
-                            f"Tipo base incompatível em '{sym.name}': esperado {sym.typ}, obtido {tR}."
-                        )
-                else:
-                    if aR:
-                        raise SemanticError(
-                            f"Variável escalar '{sym.name}' não pode receber array."
-                        )
-                    if tR != sym.typ:
-                        raise SemanticError(f"Tipo de '{sym.name}' é {sym.typ}, não {tR}.")
-                defs.add(sym)
-                return
-            elif isinstance(node.left, ArrayRef):
-                sym = lookup(node.left.id.name)
-                if not sym.is_array:
-                    raise SemanticError(f"'{sym.name}' não é array.")
-                ti, ai = _infer_expr_type(node.left.index)
-                if ai or ti != INT:
-                    raise SemanticError("Índice de array deve ser int.")
-                tR, aR = _infer_expr_type(node.right)
-                if aR:
-                    raise SemanticError("Atribuição de elemento não aceita array.")
-                if tR != sym.typ:
-                    raise SemanticError(f"Elemento de '{sym.name}' é {sym.typ}, não {tR}.")
-                if sym not in defs:
-                    raise SemanticError(f"Uso de array '{sym.name}' antes de inicialização.")
-                return
-
-        if isinstance(node, If):
-            ct, ca = _infer_expr_type(node.cond)
-            if ca or ct != BOOL:
-                raise SemanticError("Condição do if deve ser bool.")
-            defs_before = set(defs)
-            defs_then = set(defs)
+        if node.kind == K_ASSIGN:
+            _check_assign(node)
+            return
+
+        if node.kind == K_IF:
+            _check_cond(node.cond, "Condição do if deve ser bool.")
             _check_stmt(node.then_stmt)
-            defs_after_then = set(defs)
-            defs = set(defs_then)
             if node.else_stmt is not None:
                 _check_stmt(node.else_stmt)
-                defs_after_else = set(defs)
-                defs = (defs_after_then & defs_after_else) | (defs_before & defs_after_then & defs_after_else)
-            else:
-                defs = defs_before
             return
 
-        if isinstance(node, While):
-            ct, ca = _infer_expr_type(node.cond)
-            if ca or ct != BOOL:
-                raise SemanticError("Condição do while deve ser bool.")
-            defs_save = set(defs)
+        if node.kind == K_WHILE:
+            _check_cond(node.cond, "Condição do while deve ser bool.")
             _check_stmt(node.body)
-            defs = defs_save
             return
 
-        if isinstance(node, Do):
+        if node.kind == K_DO:
             _check_stmt(node.body)
-            ct, ca = _infer_expr_type(node.cond)
-            if ca or ct != BOOL:
-                raise SemanticError("Condição do do-while deve ser bool.")
+            current = node
+            marks[node.key] = state.clock
+            _check_cond(node.cond, "Condição do do-while deve ser bool.")
             return
 
-        raise SemanticError(f"Stmt não reconhecido: {type(node).__name__}")
+        raise SemanticError(f"Stmt não reconhecido: {type(node).__name__}", node)
+
+    def _check_cond(cond, msg: str):
+        ct, ca = _infer_expr_type(cond)
+        if ct != ERR and (ca or ct != BOOL):
+            error(msg)
+
+    def _check_assign(a):
+        """Atribuição no nível de statement (destino: variável ou elemento)."""
+        left = a.left
+        if left.kind == K_ID:
+            sym = lookup(left)
+            _bind(left, sym)
+            if sym.is_const:
+                error(f"Não é permitido reatribuir const '{sym.name}'.")
+            tR, aR = _infer_expr_type(a.right)
+            if sym.typ == ERR or tR == ERR:
+                pass
+            elif sym.is_array:
+                if not aR:
+                    error(f"Variável array '{sym.name}' só pode receber array (new {sym.typ}[...]).")
+                elif tR != sym.typ:
+                    error(f"Tipo base incompatível em '{sym.name}': esperado {sym.typ}, obtido {tR}.")
+            elif aR:
+                error(f"Variável escalar '{sym.name}' não pode receber array.")
+            elif tR != sym.typ:
+                error(f"Tipo de '{sym.name}' é {sym.typ}, não {tR}.")
+            a.ty = left.ty
+        elif left.kind == K_ARRAYREF:
+            sym = lookup(left.id)
+            _bind(left.id, sym)
+            elem = sym.typ
+            if not sym.is_array and elem != ERR:
+                error(f"'{sym.name}' não é array.")
+                elem = ERR
+            _check_index(left.index)
+            tR, aR = _infer_expr_type(a.right)
+            if aR:
+                error("Atribuição de elemento não aceita array.")
+            elif ERR not in (elem, tR) and tR != elem:
+                error(f"Elemento de '{sym.name}' é {sym.typ}, não {tR}.")
+            mark(left.id)
+            left.ty = a.ty = elem
+        else:
+            _infer_expr_type(a)
+
+    def _check_index(index):
+        _check_index_type(*_infer_expr_type(index))
+
+    def _check_index_type(ti: str, ai: bool):
+        if ti != ERR and (ai or ti != INT):
+            error("Índice de array deve ser int.")
 
     def _infer_expr_type(expr) -> Tuple[str, bool]:
-        if isinstance(expr, Num):
+        """
+        Tipo (base, é array) de `expr`, anotando `ty`/`sym` nos nós. Usa uma
+        pilha explícita em vez de recursão (expressões geradas podem ter
+        milhares de níveis); os erros saem na mesma ordem de uma descida
+        recursiva: o que depende só do nó (destino, array) antes dos filhos.
+        """
+        types: List[Tuple[str, bool]] = []      # tipos dos nós já fechados
+        stack: List[Tuple[Any, Any]] = [(expr, None)]   # (nó, None ou (info, nº de filhos))
+        while stack:
+            node, entry = stack.pop()
+            if entry is None:
+                if memo is not None:
+                    hit = memo.get(id(node))
+                    if hit is not None:
+                        types.append(hit)
+                        continue
+                info, kids = _enter(node)
+                stack.append((node, (info, len(kids))))
+                for kid in reversed(kids):
+                    stack.append((kid, None))
+                continue
+            info, n = entry
+            kid_types = types[len(types) - n:]
+            del types[len(types) - n:]
+            t, a = _leave(node, info, kid_types)
+            node.ty = _type_name(t, a)
+            if memo is not None:
+                memo[id(node)] = (t, a)
+            types.append((t, a))
+        return types[0]
+
+    def _enter(expr):
+        """Parte do nó que vem antes dos filhos: (informação para `_leave`, filhos)."""
+        k = expr.kind
+        if k == K_NUM or k == K_BOOL or k == K_ID:
+            return None, ()
+        if k == K_NEWARRAY:
+            return None, (expr.size,)
+        if k == K_ARRAYREF:
+            sym = lookup(expr.id)
+            _bind(expr.id, sym)
+            elem = sym.typ
+            if not sym.is_array and elem != ERR:
+                error(f"'{sym.name}' não é array.")
+                elem = ERR
+            mark(expr.id)
+            return elem, (expr.index,)
+        if k == K_UNARY:
+            return None, (expr.expr,)
+        if k in (K_ARI, K_REL, K_EQ, K_LG):
+            return None, (expr.left, expr.right)
+        if k == K_ASSIGN:
+            # atribuição aninhada (a = b = ...): resolve o destino para os backends
+            if expr.left.kind == K_ID:
+                _bind(expr.left, lookup(expr.left))
+                return None, (expr.right,)
+            if expr.left.kind == K_ARRAYREF:
+                sym = lookup(expr.left.id)
+                _bind(expr.left.id, sym)
+                return sym.typ, (expr.left.index, expr.right)
+            error("Atribuição inválida (lhs).")
+            return None, (expr.left, expr.right)
+        raise SemanticError(f"Expressão não reconhecida: {type(expr).__name__}", current)
+
+    def _operands(kid_types, want: str, result: str, msg: str) -> Tuple[str, bool]:
+        # operandos com erro já reportado (ERR) não geram erro novo aqui;
+        # um erro neste operador deixa o resultado com tipo ERR
+        (lt, la), (rt, ra) = kid_types
+        if ERR not in (lt, rt) and (la or ra or lt != want or rt != want):
+            error(msg)
+            return (ERR, False)
+        return (result, False)
+
+    def _leave(expr, info, kid_types) -> Tuple[str, bool]:
+        """Tipo do nó, dados os tipos dos filhos."""
+        k = expr.kind
+        if k == K_NUM:
+            if bounded and not fits64(expr.value):
+                error(f"Literal inteiro fora do intervalo de 64 bits ({state.int_model}): {expr.value}.")
             return (INT, False)
-        if isinstance(expr, Bool):
+        if k == K_BOOL:
             return (BOOL, False)
-        if isinstance(expr, Id):
-            sym = lookup(expr.name)
+        if k == K_ID:
+            sym = lookup(expr)
+            expr.sym = sym
             if sym.is_array:
-                raise SemanticError(f"Array '{sym.name}' não é valor escalar; use {sym.name}[i].")
-            if sym not in defs:
-                raise SemanticError(f"Uso de variável '{sym.name}' antes de inicialização.")
+                error(f"Array '{sym.name}' não é valor escalar; use {sym.name}[i].")
+                mark(expr)
+                return (ERR, False)
+            mark(expr)
             return (sym.typ, False)
-        if isinstance(expr, NewArray):
-            t, a = _infer_expr_type(expr.size)
-            if a or t != INT:
-                raise SemanticError("Tamanho do array deve ser int.")
+        if k == K_NEWARRAY:
+            t, a = kid_types[0]
+            if t != ERR and (a or t != INT):
+                error("Tamanho do array deve ser int.")
             return (expr.base, True)
-        if isinstance(expr, ArrayRef):
-            sym = lookup(expr.id.name)
-            if not sym.is_array:
-                raise SemanticError(f"'{sym.name}' não é array.")
-            if sym not in defs:
-                raise SemanticError(f"Uso de array '{sym.name}' antes de inicialização.")
-            ti, ai = _infer_expr_type(expr.index)
-            if ai or ti != INT:
-                raise SemanticError("Índice de array deve ser int.")
-            return (sym.typ, False)
-        if isinstance(expr, Unary):
-            t, a = _infer_expr_type(expr.expr)
+        if k == K_ARRAYREF:
+            _check_index_type(*kid_types[0])
+            return (info, False)
+        if k == K_UNARY:
+            t, a = kid_types[0]
             if expr.op == "!":
-                if a or t != BOOL:
-                    raise SemanticError("Operador '!' requer bool.")
+                if t != ERR and (a or t != BOOL):
+                    error("Operador '!' requer bool.")
+                    return (ERR, False)
                 return (BOOL, False)
             if expr.op == "-":
-                if a or t != INT:
-                    raise SemanticError("Operador unário '-' requer int.")
+                if t != ERR and (a or t != INT):
+                    error("Operador unário '-' requer int.")
+                    return (ERR, False)
                 return (INT, False)
-            raise SemanticError(f"Unário desconhecido: {expr.op}")
-        if isinstance(expr, Ari):
-            lt, la = _infer_expr_type(expr.left)
-            rt, ra = _infer_expr_type(expr.right)
-            if la or ra or lt != INT or rt != INT:
-                raise SemanticError(f"Operação aritmética '{expr.op}' requer inteiros escalares.")
-            return (INT, False)
-        if isinstance(expr, Rel):
-            lt, la = _infer_expr_type(expr.left)
-            rt, ra = _infer_expr_type(expr.right)
-            if la or ra or lt != INT or rt != INT:
-                raise SemanticError(f"Operação relacional '{expr.op}' requer inteiros escalares.")
-            return (BOOL, False)
-        if isinstance(expr, Eq):
-            lt, la = _infer_expr_type(expr.left)
-            rt, ra = _infer_expr_type(expr.right)
-            if la or ra or lt != rt:
-                raise SemanticError("Comparação requer operandos escalares do mesmo tipo.")
+            raise SemanticError(f"Unário desconhecido: {expr.op}", current)
+        if k == K_ARI:
+            return _operands(kid_types, INT, INT,
+                             f"Operação aritmética '{expr.op}' requer inteiros escalares.")
+        if k == K_REL:
+            return _operands(kid_types, INT, BOOL,
+                             f"Operação relacional '{expr.op}' requer inteiros escalares.")
+        if k == K_EQ:
+            (lt, la), (rt, ra) = kid_types
+            if ERR not in (lt, rt) and (la or ra or lt != rt):
+                error("Comparação requer operandos escalares do mesmo tipo.")
+                return (ERR, False)
             return (BOOL, False)
-        if isinstance(expr, Lg):
-            lt, la = _infer_expr_type(expr.left)
-            rt, ra = _infer_expr_type(expr.right)
-            if la or ra or lt != BOOL or rt != BOOL:
-                raise SemanticError(f"Operador lógico '{expr.op}' requer bool.")
-            return (BOOL, False)
-        if isinstance(expr, Assign):
-            return _infer_expr_type(expr.right)
-        raise SemanticError(f"Expressão não reconhecida: {type(expr).__name__}")
+        if k == K_LG:
+            return _operands(kid_types, BOOL, BOOL, f"Operador lógico '{expr.op}' requer bool.")
+        # K_ASSIGN: o tipo é o do valor atribuído
+        if info is not None:
+            expr.left.ty = info
+            mark(expr.left.id)
+        return kid_types[-1]
+
+    return _check_stmt
 
-    _check_block(prog.block)
-    return symtab_snapshot
+
+def check_definite_assignment(cfg, n_syms: int, boundary: int = 0,
+                              errors: Optional[List[SemanticError]] = None) -> List[int]:
+    """
+    Def-use: toda leitura precisa de uma atribuição em todos os caminhos até
+    ela. Análise "must" para frente sobre o CFG (ver dataflow.py), com o
+    símbolo número i no bit i; depois cada nó é revisitado em ordem de
+    programa para reportar o primeiro uso sem atribuição (ou, com `errors`,
+    o primeiro de cada símbolo). `boundary` são os símbolos já atribuídos na
+    entrada do CFG. Retorna os fatos na entrada de cada nó.
+    """
+    events = [effects(item) for item in cfg.items]
+    gen = [0] * len(cfg)
+    kill = [0] * len(cfg)
+    for n, evs in enumerate(events):
+        g = k = 0
+        for ev, ident in evs:
+            if ev == USE:
+                continue
+            bit = ident.sym.bit
+            if ev == DEF:
+                g |= bit
+                k &= ~bit
+            else:
+                k |= bit
+                g &= ~bit
+        gen[n] = g
+        kill[n] = k
+    defs_in, _ = solve(cfg, must_bits((1 << n_syms) - 1), gen_kill(gen, kill), boundary=boundary)
+
+    reported = 0
+    for n, evs in enumerate(events):
+        defs = defs_in[n]
+        for ev, ident in evs:
+            sym = ident.sym
+            if ev == USE:
+                # bit 0: símbolo de uma variável não declarada (já reportada)
+                if not defs & sym.bit and sym.bit and not reported & sym.bit:
+                    what = "array" if sym.is_array else "variável"
+                    err = SemanticError(f"Uso de {what} '{sym.name}' antes de inicialização.",
+                                        cfg.owners[n], ident)
+                    if errors is None:
+                        raise err
+                    errors.append(err)
+                    reported |= sym.bit
+            elif ev == DEF:
+                defs |= sym.bit
+            else:
+                defs &= ~sym.bit
+    return defs_in
 
 
-def print_symtab(symtab_snapshot: List[Dict[str, Any]]):
-    """Imprime a tabela de símbolos."""
+def print_symtab(symtab_snapshot):
+    """
+    Imprime a tabela de símbolos (SymbolTable ou lista de dicts), ordenada
+    por (escopo, nome), linha a linha, sem montar os dicts.
+    """
+    table = symtab_snapshot
+    if not isinstance(table, SymbolTable):
+        table = SymbolTable.from_rows(table)
     print("=== TABELA DE SÍMBOLOS ===")
-    for row in sorted(symtab_snapshot, key=lambda r: (r["scope_depth"], r["name"])):
-        cflag = " const" if row["const"] else ""
-        print(f"[escopo {row['scope_depth']}] {row['name']} : {row['type']}{cflag}")
+    names, name_ids, types, flags, depths = (
+        table.names, table.name_ids, table.types, table.flags, table.depths)
+    for i in table.sorted_indices():
+        f = flags[i]
+        cflag = " const" if f & _F_CONST else ""
+        print(f"[escopo {depths[i]}] {names[name_ids[i]]} : "
+              f"{_type_name(_TYPES[types[i]], bool(f & _F_ARRAY))}{cflag}")
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Modo NumPy do intérprete (`exec_program(..., vectorize=True)`, `--numpy`).
+
+Os arrays passam a ser `numpy.int64`/`numpy.bool_` (dentro do mesmo
+`arrays.Array`) e laços contados simples rodam como operações vetoriais:
+
+    while (i < N) { a[i] = i * i; b[i] = a[i] + c[i]; i = i + 1; }
+
+`match_counted_loop` reconhece o formato (na AST anotada por
+`check_semantics`): condição `i < N` ou `i <= N` com `N` sem arrays nem
+atribuições, corpo com gravações `x[i] = expr` e, por último, `i = i + 1`.
+Toda leitura e gravação de array no corpo usa exatamente o índice `i`, e
+o corpo só grava arrays; então uma iteração não depende de outra e cada
+gravação pode ser feita para todos os `i` de uma vez, na ordem do corpo.
+
+`run_counted_loop` executa o plano, ou devolve False para o intérprete
+rodar o laço escalar normalmente quando não consegue provar que o
+resultado é o mesmo: índices fora de algum array, array já promovido para
+lista, ou algum valor intermediário que poderia sair de 64 bits (os ints
+MiniLang não têm limite; os limites de cada subexpressão são calculados
+por aritmética de intervalos com os valores reais do momento). Nada é
+gravado antes de todas as expressões serem calculadas.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ast_nodes import *
+from .arrays import Array
+from .intmodel import INT64_MIN, INT64_MAX, wrap64
+
+try:
+    import numpy
+except ImportError:       # dependência opcional: só o modo NumPy precisa
+    numpy = None
+
+_ELEMENTWISE_ARI = ("+", "-", "*")    # "/" ficaria com a divisão por zero da numpy
+
+
+def new_numpy_array(base: str, n: int) -> Array:
+    """Array zerado de `n` elementos, com buffer numpy."""
+    if n < 0:
+        raise ValueError("Tamanho de array negativo.")
+    return Array(numpy.zeros(n, dtype=numpy.int64 if base == "int" else numpy.bool_))
+
+
+class CountedLoop:
+    """Plano de um laço vetorizável: `i` de seu valor atual até `bound`."""
+    __slots__ = ("var", "bound", "inclusive", "stores")
+
+    def __init__(self, var, bound, inclusive: bool, stores: List[Tuple[Any, Any]]):
+        self.var = var                # Id do contador
+        self.bound = bound            # expressão do limite
+        self.inclusive = inclusive    # `<=`
+        self.stores = stores          # [(Id do array, expressão)], na ordem do corpo
+
+
+def match_counted_loop(node) -> Optional[CountedLoop]:
+    """Plano do While `node`, ou None se ele não tem o formato vetorizável."""
+    cond = node.cond
+    if cond.kind != K_REL or cond.op not in ("<", "<=") or cond.left.kind != K_ID:
+        return None
+    var = cond.left
+    sym = var.sym
+    if sym is None or sym.is_array or sym.typ != "int" or not _invariant(cond.right, sym):
+        return None
+    body = node.body
+    if body.kind != K_BLOCK or not isinstance(body.stmts, list) or len(body.stmts) < 2:
+        return None
+    *stores, step = body.stmts
+    if not _is_increment(step, sym):
+        return None
+    plan = []
+    for s in stores:
+        if s.kind != K_EVAL or s.dead or s.expr.kind != K_ASSIGN:
+            return None
+        left, right = s.expr.left, s.expr.right
+        if left.kind != K_ARRAYREF or not _is_var(left.index, sym):
+            return None
+        if not _elementwise(right, sym):
+            return None
+        plan.append((left.id, right))
+    return CountedLoop(var, cond.right, cond.op == "<=", plan)
+
+
+def _is_var(e, sym) -> bool:
+    return e.kind == K_ID and e.sym == sym
+
+
+def _is_increment(s, sym) -> bool:
+    """`i = i + 1;`"""
+    if s.kind != K_EVAL or s.dead or s.expr.kind != K_ASSIGN:
+        return False
+    left, right = s.expr.left, s.expr.right
+    return (_is_var(left, sym) and right.kind == K_ARI and right.op == "+"
+            and _is_var(right.left, sym) and right.right.kind == K_NUM and right.right.value == 1)
+
+
+def _invariant(e, sym) -> bool:
+    """Expressão escalar que o corpo não muda (sem arrays, sem o contador)."""
+    k = e.kind
+    if k == K_NUM or k == K_BOOL:
+        return True
+    if k == K_ID:
+        return e.sym is not None and not e.sym.is_array and e.sym != sym
+    if k == K_UNARY:
+        return _invariant(e.expr, sym)
+    if k in (K_ARI, K_REL, K_EQ, K_LG):
+        return _invariant(e.left, sym) and _invariant(e.right, sym)
+    return False
+
+
+def _elementwise(e, sym) -> bool:
+    """Expressão que só lê escalares, o contador e elementos `x[i]`."""
+    k = e.kind
+    if k == K_NUM or k == K_BOOL:
+        return True
+    if k == K_ID:
+        return e.sym is not None and not e.sym.is_array
+    if k == K_ARRAYREF:
+        return _is_var(e.index, sym)
+    if k == K_UNARY:
+        return _elementwise(e.expr, sym)
+    if k == K_ARI:
+        return e.op in _ELEMENTWISE_ARI and _elementwise(e.left, sym) and _elementwise(e.right, sym)
+    if k in (K_REL, K_EQ, K_LG):
+        return _elementwise(e.left, sym) and _elementwise(e.right, sym)
+    return False
+
+
+class _Fallback(Exception):
+    """O laço não pode ser vetorizado agora; roda o escalar."""
+
+
+def run_counted_loop(plan: CountedLoop, get, setvar, eval_expr, wrap: bool = False,
+                     max_trips: Optional[int] = None) -> bool:
+    """
+    Executa o laço de uma vez. Devolve False, sem ter mudado nada, quando
+    o intérprete deve rodá-lo iteração a iteração. Com `wrap` (modelo
+    int64-wrap) o overflow do int64 da numpy já é a semântica pedida e os
+    limites não são verificados. Laços com mais de `max_trips` iterações
+    também ficam para o escalar (ver limits.py: o combustível restante).
+    """
+    start = get(plan.var)
+    end = eval_expr(plan.bound) + (1 if plan.inclusive else 0)
+    if end <= start or (max_trips is not None and end - start > max_trips):
+        return False
+    sl = slice(start, end)
+    idx = None
+    pending: Dict[int, Any] = {}     # id(Array) -> valores novos de [start, end)
+
+    def array_slice(ident):
+        cell = get(ident)
+        data = cell.data
+        if numpy is None or not isinstance(data, numpy.ndarray) or start < 0 or end > len(data):
+            raise _Fallback
+        new = pending.get(id(cell))
+        return data[sl] if new is None else new
+
+    def fit(v):
+        # entre dois escalares o resultado é int Python: o wraparound é explícito
+        return wrap64(v) if wrap and v.__class__ is int else v
+
+    def vec(e):
+        """(valor: escalar ou ndarray, menor, maior); limites None para bool."""
+        nonlocal idx
+        k = e.kind
+        if k == K_NUM:
+            _check_range(e.value, e.value)
+            return e.value, e.value, e.value
+        if k == K_BOOL:
+            return e.value, None, None
+        if k == K_ID:
+            if e.sym == plan.var.sym:
+                if idx is None:
+                    idx = numpy.arange(start, end, dtype=numpy.int64)
+                return idx, start, end - 1
+            v = get(e)
+            if v.__class__ is bool:
+                return v, None, None
+            _check_range(v, v)
+            return v, v, v
+        if k == K_ARRAYREF:
+            data = array_slice(e.id)
+            if data.dtype == numpy.bool_:
+                return data, None, None
+            return data, int(data.min()), int(data.max())
+        if k == K_UNARY:
+            v, lo, hi = vec(e.expr)
+            if e.op == "!":
+                return (numpy.logical_not(v) if hasattr(v, "dtype") else not v), None, None
+            if not wrap:
+                _check_range(-hi, -lo)
+            return fit(-v), -hi, -lo
+        l, llo, lhi = vec(e.left)
+        r, rlo, rhi = vec(e.right)
+        op = e.op
+        if k == K_ARI:
+            if op == "+":
+                lo, hi = llo + rlo, lhi + rhi
+            elif op == "-":
+                lo, hi = llo - rhi, lhi - rlo
+            else:
+                corners = (llo * rlo, llo * rhi, lhi * rlo, lhi * rhi)
+                lo, hi = min(corners), max(corners)
+            if not wrap:
+                _check_range(lo, hi)
+            if op == "+":
+                return fit(l + r), lo, hi
+            if op == "-":
+                return fit(l - r), lo, hi
+            return fit(l * r), lo, hi
+        if k == K_REL:
+            return (l < r) if op == "<" else (l <= r), None, None
+        if k == K_EQ:
+            return (l == r) if op == "==" else (l != r), None, None
+        if op == "&&":
+            return numpy.logical_and(l, r), None, None
+        return numpy.logical_or(l, r), None, None
+
+    try:
+        results = []
+        for ident, expr in plan.stores:
+            array_slice(ident)                           # confere limites antes de calcular
+            v = vec(expr)[0]
+            cell = get(ident)
+            if not hasattr(v, "shape") or v.shape != (end - start,):
+                v = numpy.full(end - start, v, dtype=cell.data.dtype)    # escalar: espalha
+            pending[id(cell)] = v
+            results.append((cell, v))
+    except _Fallback:
+        return False
+    for cell, v in results:
+        cell.data[sl] = v
+    setvar(plan.var, end)
+    return True
+
+
+def _check_range(lo: int, hi: int):
+    if lo < INT64_MIN or hi > INT64_MAX:
+        raise _Fallback
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de regressão do compilador MiniLang.
+
+Uso:
+    python tools/bench.py                 # roda todos
+    python tools/bench.py long_block      # roda só um
+"""
+import io
+import os
+import sys
+import time
+from array import array
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import tradutor
+from src.arrays import new_array
+
+
+def _timed(label, fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"  {label:<14} {time.perf_counter() - t0:8.3f}s")
+    return result
+
+
+def _quiet(fn, *args, **kwargs):
+    """Executa `fn` capturando o stdout; devolve o texto impresso."""
+    with redirect_stdout(io.StringIO()) as out:
+        fn(*args, **kwargs)
+    return out.getvalue()
+
+
+def bench_long_block(n: int = 100_000):
+    """Bloco com `n` statements: nenhuma fase pode recursar por statement."""
+    print(f"long_block (n={n})")
+    src = "{ int x = 0;\n" + "x = x + 1;\n" * n + "print(x); }"
+    prog = _timed("parse", tradutor.parse, src)
+    _timed("semantics", tradutor.check_semantics, prog)
+    out = _timed("interp", _quiet, tradutor.exec_program, prog)
+    assert out.split() == [str(n)], out
+    py = _timed("codegen", tradutor.codegen_python, prog)
+    out = _timed("exec codegen", _quiet, tradutor.exec_generated_python, py)
+    assert out.split() == [str(n)], out
+    _timed("print ast", _quiet, tradutor.print_ast_ascii, prog)
+
+
+def _ast_size(prog):
+    """(nós distintos, bytes deles) da AST; nós compartilhados contam uma vez."""
+    seen = {}
+    stack = [prog]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen[id(node)] = sys.getsizeof(node)
+        stack.extend(child for _, child in tradutor._children_of(node) if child is not None)
+    return len(seen), sum(seen.values())
+
+
+def bench_dag(n: int = 20_000):
+    """Código gerado com a mesma expressão repetida: árvore vs DAG (hash-consing)."""
+    print(f"dag (n={n})")
+    src = ("{ const int W = 8; int i = 1; int j = 2; int s = 0; int[] a = new int[64];\n"
+           + "s = s + a[i * W + j] * (i * W + j) - (2 * W + 1);\n" * n + "print(s); }")
+    for dag in (False, True):
+        label = "dag" if dag else "tree"
+        prog = _timed(f"parse {label}", tradutor.parse, src, dag=dag)
+        nodes, size = _ast_size(prog)
+        print(f"  {'nodes ' + label:<14} {nodes:8d}  ({size / 1e6:.2f} MB)")
+        out = _timed(f"interp {label}", _quiet, tradutor.exec_program, prog)
+        assert out.split() == [str(-17 * n)], out
+
+
+def bench_arrays(n: int = 1_000_000):
+    """Arrays dos backends (src/arrays.py) vs listas Python, preenchidos com 0..n-1."""
+    print(f"arrays (n={n})")
+    lst = _timed("alloc list", lambda: [0] * n)
+    arr = _timed("alloc int[]", new_array, "int", n)
+    _timed("alloc bool[]", new_array, "bool", n)
+    lst[:] = range(n)
+    arr.data[:] = array("q", range(n))
+    size_list = sys.getsizeof(lst) + sum(map(sys.getsizeof, lst))
+    size_arr = sys.getsizeof(arr.data)
+    print(f"  {'int list':<14} {size_list / 1e6:8.2f} MB")
+    print(f"  {'int array':<14} {size_arr / 1e6:8.2f} MB")
+    print(f"  {'bool list':<14} {sys.getsizeof([False] * n) / 1e6:8.2f} MB")
+    print(f"  {'bool array':<14} {sys.getsizeof(new_array('bool', n).data) / 1e6:8.2f} MB")
+
+
+def bench_numpy(n: int = 200_000):
+    """Laços de inicialização/varredura: intérprete escalar vs modo numpy (--numpy)."""
+    from src import vectorize
+    from src.interner import Interner
+    from src.interp import exec_program
+    from src.reparse import parse_antlr
+    from src.sema import check_semantics
+
+    print(f"numpy (n={n})")
+    if vectorize.numpy is None:
+        print("  numpy não instalado; pulando")
+        return
+    src = (f"{{ int N = {n}; int[] a = new int[N]; int[] b = new int[N]; bool[] f = new bool[N];\n"
+           "int i = 0; while (i < N) { a[i] = i * i; i = i + 1; }\n"
+           "i = 0; while (i < N) { b[i] = a[i] - 3 * i; f[i] = b[i] < a[i]; i = i + 1; }\n"
+           "print(b[N - 1], f[N - 1]); }")
+    prog, _ = parse_antlr(src, Interner())
+    check_semantics(prog)
+    scalar = _timed("interp", _quiet, exec_program, prog)
+    vector = _timed("interp numpy", _quiet, exec_program, prog, vectorize=True)
+    assert scalar == vector, (scalar, vector)
+
+
+def bench_output(n: int = 200_000):
+    """Programa que só imprime: saída linha a linha vs buffer do OutputSink."""
+    from src.codegen import codegen_python, exec_generated_python
+    from src.interner import Interner
+    from src.interp import exec_program
+    from src.output import OutputSink
+    from src.reparse import parse_antlr
+    from src.sema import check_semantics
+
+    print(f"output (n={n})")
+    src = (f"{{ int N = {n}; int i = 0; bool b = true;\n"
+           "while (i < N) { print(i, i * 2, b); b = !b; i = i + 1; } }")
+    prog, _ = parse_antlr(src, Interner())
+    check_semantics(prog)
+    py = codegen_python(prog)
+    with open(os.devnull, "w") as devnull:
+        for size in (0, 1 << 16):
+            label = "unbuf" if size == 0 else "buf"
+            _timed(f"interp {label}", exec_program, prog, out=OutputSink(devnull, buffer_size=size))
+            _timed(f"codegen {label}", exec_generated_python, py,
+                   out=OutputSink(devnull, buffer_size=size))
+
+
+def bench_trace(n: int = 200_000):
+    """Laço com if/while/eval: intérprete sem trace vs com eventos de trace."""
+    from src.interner import Interner
+    from src.interp import exec_program
+    from src.output import OutputSink, TraceSink
+    from src.reparse import parse_antlr
+    from src.sema import check_semantics
+
+    print(f"trace (n={n})")
+    src = (f"{{ int N = {n}; int i = 0; int s = 0;\n"
+           "while (i < N) { if (i < s) { s = s - i; } else { s = s + i; } i = i + 1; } print(s); }")
+    prog, _ = parse_antlr(src, Interner())
+    check_semantics(prog)
+    with open(os.devnull, "w") as devnull:
+        plain = _timed("untraced", exec_program, prog, out=OutputSink(devnull))
+        traced = _timed("traced", exec_program, prog, out=OutputSink(devnull),
+                        tracer=TraceSink(OutputSink(devnull)))
+    assert plain == traced
+
+
+def bench_profile(n: int = 200_000):
+    """Laço com if/while/eval: intérprete sem e com profiler por statement."""
+    from src.interner import Interner
+    from src.interp import exec_program
+    from src.output import OutputSink
+    from src.profiler import Profile
+    from src.reparse import parse_antlr
+    from src.sema import check_semantics
+
+    print(f"profile (n={n})")
+    src = (f"{{ int N = {n}; int i = 0; int s = 0;\n"
+           "while (i < N) { if (i < s) { s = s - i; } else { s = s + i; } i = i + 1; } print(s); }")
+    prog, _ = parse_antlr(src, Interner())
+    check_semantics(prog)
+    profiler = Profile()
+    with open(os.devnull, "w") as devnull:
+        plain = _timed("plain", exec_program, prog, out=OutputSink(devnull))
+        profiled = _timed("profiled", exec_program, prog, out=OutputSink(devnull), profiler=profiler)
+    assert plain == profiled
+    print(profiler.report(5, src))
+
+
+def bench_limits(n: int = 200_000):
+    """Laço apertado com e sem orçamento de passos (intérprete e código gerado)."""
+    from src.codegen import codegen_python, exec_generated_python
+    from src.interner import Interner
+    from src.interp import exec_program
+    from src.limits import ExecLimits
+    from src.reparse import parse_antlr
+    from src.sema import check_semantics
+
+    print(f"limits (n={n})")
+    src = (f"{{ int N = {n}; int i = 0; int s = 0;\n"
+           "while (i < N) { s = s + i; i = i + 1; } print(s); }")
+    prog, _ = parse_antlr(src, Interner())
+    check_semantics(prog)
+    limits = ExecLimits(max_steps=n, timeout=600.0)
+    _timed("interp", _quiet, exec_program, prog)
+    _timed("interp limits", _quiet, exec_program, prog, limits=limits)
+    _timed("codegen", _quiet, exec_generated_python, codegen_python(prog))
+    _timed("codegen limits", _quiet, exec_generated_python, codegen_python(prog, budget=True),
+           limits=limits)
+
+
+def bench_srcmap(n: int = 20_000):
+    """Bloco longo: codegen e execução do código gerado sem e com mapa de linhas."""
+    from src.codegen import SourceMap, codegen_python, exec_generated_python
+    from src.interner import Interner
+    from src.reparse import parse_antlr
+    from src.sema import check_semantics
+
+    print(f"srcmap (n={n})")
+    body = "".join(f"  int v{i} = {i};\n  if (v{i} < 3) {{ print(v{i}); }}\n" for i in range(n))
+    prog, _ = parse_antlr("{\n" + body + "}", Interner())
+    check_semantics(prog)
+    code = _timed("codegen", codegen_python, prog)
+    srcmap = SourceMap()
+    mapped = _timed("codegen map", codegen_python, prog, srcmap=srcmap)
+    assert code == mapped
+    _timed("exec", _quiet, exec_generated_python, code)
+    _timed("exec map", _quiet, exec_generated_python, code, srcmap=srcmap, filename="bench.min")
+    print(f"  {len(srcmap)} linhas mapeadas")
+
+
+def bench_deep(n: int = 5_000):
+    """
+    Expressões com milhares de níveis (cadeias geradas): cada fase sem
+    recursão, na AST de objetos e na arena.
+    """
+    from src.arena import build_arena
+    from src.codegen import codegen_python, exec_generated_python
+    from src.interner import Interner
+    from src.interp import exec_program
+    from src.pretty import print_ast_ascii
+    from src.reparse import parse_antlr
+    from src.sema import check_semantics
+
+    print(f"deep (n={n})")
+    chain = " + ".join(f"a * {i % 7}" for i in range(n))
+    conj = " && ".join(f"a < {i + 2}" for i in range(n))
+    src = f"{{ int a = 1; int x = {chain}; bool b = {conj}; print(x, b); }}"
+    prog, _ = _timed("parse", parse_antlr, src, Interner())
+    arena = _timed("arena build", build_arena, prog)
+    outputs = []
+    for prefix, root in (("", prog), ("arena ", arena.root())):
+        _timed(prefix + "sema", check_semantics, root)
+        outputs.append(_timed(prefix + "interp", _quiet, exec_program, root))
+        py = _timed(prefix + "codegen", codegen_python, root)
+        outputs.append(_timed(prefix + "cg exec", _quiet, exec_generated_python, py))
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            t0 = time.perf_counter()
+            print_ast_ascii(root)
+        print(f"  {prefix + 'pretty':<14} {time.perf_counter() - t0:8.3f}s")
+    assert len(set(outputs)) == 1, outputs
+
+
+BENCHMARKS = {
+    "long_block": bench_long_block,
+    "dag": bench_dag,
+    "arrays": bench_arrays,
+    "numpy": bench_numpy,
+    "output": bench_output,
+    "trace": bench_trace,
+    "profile": bench_profile,
+    "limits": bench_limits,
+    "srcmap": bench_srcmap,
+    "deep": bench_deep,
+}
+
+
+def main(argv):
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Roda os programas de tests/ no intérprete e no código gerado e compara.
+
+Uso:
+    python tools/run_tests.py                  # todos os tests/*.min
+    python tools/run_tests.py tests/ok_x.min   # só os arquivos dados
+
+Cada arquivo roda em cada modelo de inteiro da diretiva `// modelos:`
+(padrão: bigint). Os dois backends precisam imprimir a mesma saída e
+falhar (ou não) juntos. Diretivas opcionais, em comentários, fixam o
+resultado esperado; com `[modelo]` valem só para aquele modelo (as linhas
+de saída de um modelo são as sem `[modelo]` e as dele, na ordem do arquivo):
+
+    // modelos: bigint int64-wrap int64-trap
+    // espera: 1 true          uma linha da saída, em ordem
+    // espera[int64-trap] erro: Overflow de inteiro
+                               o erro (de sintaxe, semântico ou de
+                               execução) começa com esse texto
+
+Sem nenhuma diretiva de erro, arquivos `err_*` precisam falhar antes da
+execução; fora isso, um modelo sem erro esperado precisa rodar sem erro. A verificação incremental (ver
+incremental.py) precisa dar o mesmo erro semântico que a completa.
+"""
+import io
+import os
+import re
+import sys
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.codegen import codegen_python, exec_generated_python
+from src.incremental import IncrementalChecker
+from src.interner import Interner
+from src.interp import exec_program
+from src.intmodel import BIGINT, INT_MODELS
+from src.output import OutputSink
+from src.reparse import parse_antlr
+from src.sema import SemanticError, check_semantics
+
+_TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests")
+_DIRECTIVE = re.compile(r"^\s*//\s*(modelos|espera)(?:\[([\w-]+)\])?( erro)?:\s?(.*?)\s*$")
+
+
+def _directives(text: str):
+    """(modelos, [(modelo ou None, linha esperada)], {modelo ou None: erro esperado})."""
+    models = [BIGINT]
+    outputs, errors = [], {}
+    for line in text.splitlines():
+        m = _DIRECTIVE.match(line)
+        if m is None:
+            continue
+        what, model, is_error, value = m.groups()
+        if model is not None and model not in INT_MODELS:
+            raise ValueError(f"modelo desconhecido: {model}")
+        if what == "modelos":
+            models = value.split()
+            for model in models:
+                if model not in INT_MODELS:
+                    raise ValueError(f"modelo desconhecido: {model}")
+        elif is_error:
+            errors[model] = value
+        else:
+            outputs.append((model, value))
+    return models, outputs, errors
+
+
+def _run(fn) -> Tuple[List[str], Optional[BaseException]]:
+    """Saída (linhas) e exceção de `fn(sink)`."""
+    target = io.StringIO()
+    sink = OutputSink(target)
+    err = None
+    try:
+        fn(sink)
+    except Exception as e:
+        err = e
+    finally:
+        sink.flush()
+    return target.getvalue().splitlines(), err
+
+
+def _semantic_error(fn) -> Optional[str]:
+    try:
+        fn()
+    except SemanticError as e:
+        return str(e)
+    return None
+
+
+def _check_incremental(text: str) -> List[str]:
+    """
+    O erro semântico da verificação completa, comparado com o do
+    IncrementalChecker no texto inteiro, numa edição que chega ao texto a
+    partir do bloco externo vazio (caminho incremental) e na reverificação
+    seguinte, com a região ainda pendente.
+    """
+    want = _semantic_error(lambda: check_semantics(parse_antlr(text, Interner())[0]))
+    lo, hi = text.index("{") + 1, text.rindex("}")
+    chk = IncrementalChecker(text[:lo] + "\n" + text[hi:])
+    got = {
+        "completa": _semantic_error(lambda: IncrementalChecker(text)),
+        "após edição": _semantic_error(lambda: chk.update(text)),
+        "pendente": _semantic_error(lambda: chk.update(text)),
+    }
+    return [f"[incremental, {how}] erro {err!r}, a verificação completa dá {want!r}"
+            for how, err in got.items() if err != want]
+
+
+def check_file(path: str) -> List[str]:
+    """Falhas de um arquivo de teste (vazia se passou)."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    models, outputs, errors = _directives(text)
+    must_reject = os.path.basename(path).startswith("err_") and not errors
+    try:
+        failures = _check_incremental(text)
+    except SyntaxError:
+        failures = []
+    for model in models:
+        want_out = [line for m, line in outputs if m is None or m == model] if outputs else None
+        want_err = errors.get(model, errors.get(None))
+        tag = f"[{model}]"
+        try:
+            prog, _ = parse_antlr(text, Interner())
+            check_semantics(prog, int_model=model)
+        except Exception as e:
+            if must_reject:
+                continue
+            if want_err is None or not str(e).startswith(want_err):
+                failures.append(f"{tag} erro antes da execução: {e}")
+            continue
+        if must_reject:
+            failures.append(f"{tag} esperava erro antes da execução")
+            continue
+
+        runs = {
+            "intérprete": _run(lambda sink: exec_program(prog, int_model=model, out=sink)),
+            "código gerado": _run(lambda sink: exec_generated_python(
+                codegen_python(prog, model), out=sink)),
+        }
+        (out_i, _), (out_c, _) = runs.values()
+        if out_i != out_c:
+            failures.append(f"{tag} saídas diferentes: intérprete {out_i} / código gerado {out_c}")
+        for backend, (out, err) in runs.items():
+            if want_out is not None and out != want_out:
+                failures.append(f"{tag} {backend}: saída {out}, esperada {want_out}")
+            if want_err is None and err is not None:
+                failures.append(f"{tag} {backend}: erro {err}")
+            elif want_err is not None and (err is None or not str(err).startswith(want_err)):
+                failures.append(f"{tag} {backend}: erro {err}, esperado '{want_err}'")
+    return failures
+
+
+def main(argv) -> int:
+    paths = argv or sorted(os.path.join(_TESTS, name) for name in os.listdir(_TESTS)
+                           if name.endswith(".min"))
+    failed = 0
+    for path in paths:
+        failures = check_file(path)
+        print(f"{'FALHOU' if failures else 'ok':<6} {os.path.basename(path)}")
+        for msg in failures:
+            print(f"       {msg}")
+        failed += bool(failures)
+    print(f"{len(paths) - failed}/{len(paths)} arquivos ok")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -15,113 +15,262 @@ Original file is located at
 # operadores: + - * /, < <=, == !=, || && !, unário - e !, true/false,
 # declarações: int/bool, const, arrays int[]/bool[] com new int[n]/new bool[n] e bounds check.
 
+from bisect import bisect_right
+import codecs
+import io
+from array import array
+import mmap
 import re
-from dataclasses import dataclass, is_dataclass
-from typing import Optional, List, Dict, Any, Tuple
+from collections import deque
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Iterator, ClassVar
 
 # =========================================================
-# AST
+# AST — nós com __slots__, base comum Node e tag inteira `kind`
 # =========================================================
-@dataclass
-class Program:
+(K_PROGRAM, K_BLOCK, K_DECL, K_EVAL, K_PRINT, K_IF, K_WHILE, K_DO, K_ASSIGN,
+ K_REL, K_EQ, K_LG, K_UNARY, K_ARI, K_NEWARRAY, K_ARRAYREF, K_NUM, K_BOOL,
+ K_ID) = range(19)
+N_KINDS = 19
+
+class Node:
+    __slots__ = ()
+    kind: ClassVar[int] = -1
+
+# Statements guardam (linha, coluna) do primeiro token em `pos` (linha a partir
+# de 1, coluna a partir de 0); fora da comparação e do repr, para a igualdade de
+# ASTs não depender do layout. Expressões não têm posição (podem ser compartilhadas).
+def _pos():
+    return field(default=None, compare=False, repr=False)
+
+def _node(kind: int):
+    # dataclass com __slots__ (dataclass(slots=True) só existe no Python 3.10+)
+    def wrap(cls):
+        cls = dataclass(cls)
+        names = tuple(f.name for f in fields(cls))
+        ns = {k: v for k, v in cls.__dict__.items()
+              if k not in names and k not in ("__dict__", "__weakref__")}
+        ns["__slots__"] = names
+        ns["kind"] = kind
+        new_cls = type(cls)(cls.__name__, cls.__bases__, ns)
+        new_cls.__qualname__ = cls.__qualname__
+        return new_cls
+    return wrap
+
+@_node(K_PROGRAM)
+class Program(Node):
     block: "Block"
 
-@dataclass
-class Block:
-    stmts: Optional[object]  # Seq encadeado ou None
-
-@dataclass
-class Seq:
-    first: Optional[object]
-    second: object
+@_node(K_BLOCK)
+class Block(Node):
+    stmts: Optional[List[object]]  # lista plana de stmts ou None
+    pos: Optional[Tuple[int, int]] = _pos()
 
-@dataclass
-class Decl:
+@_node(K_DECL)
+class Decl(Node):
     typ: str               # "int" | "bool"
     is_array: bool
     is_const: bool
     id: "Id"
     init: Optional[object] = None  # expr ou NewArray
+    pos: Optional[Tuple[int, int]] = _pos()
 
-@dataclass
-class Eval:
+@_node(K_EVAL)
+class Eval(Node):
     expr: object
+    pos: Optional[Tuple[int, int]] = _pos()
 
-@dataclass
-class Print:
+@_node(K_PRINT)
+class Print(Node):
     args: List[object]     # print(expr, expr, ...)
+    pos: Optional[Tuple[int, int]] = _pos()
 
-@dataclass
-class If:
+@_node(K_IF)
+class If(Node):
     cond: object
     then_stmt: object
     else_stmt: Optional[object] = None
+    pos: Optional[Tuple[int, int]] = _pos()
 
-@dataclass
-class While:
+@_node(K_WHILE)
+class While(Node):
     cond: object
     body: object
+    pos: Optional[Tuple[int, int]] = _pos()
 
-@dataclass
-class Do:
+@_node(K_DO)
+class Do(Node):
     body: object
     cond: object
+    pos: Optional[Tuple[int, int]] = _pos()
 
-@dataclass
-class Assign:
+@_node(K_ASSIGN)
+class Assign(Node):
     left: object           # Id | ArrayRef
     right: object
 
-@dataclass
-class Rel:
+@_node(K_REL)
+class Rel(Node):
     op: str                # '<' | '≤'
     left: object
     right: object
 
-@dataclass
-class Eq:
+@_node(K_EQ)
+class Eq(Node):
     op: str                # '==' | '!='
     left: object
     right: object
 
-@dataclass
-class Lg:
+@_node(K_LG)
+class Lg(Node):
     op: str                # '||' | '&&'
     left: object
     right: object
 
-@dataclass
-class Unary:
+@_node(K_UNARY)
+class Unary(Node):
     op: str                # '-' | '!'
     expr: object
 
-@dataclass
-class Ari:
+@_node(K_ARI)
+class Ari(Node):
     op: str                # '+', '-', '*', '/'
     left: object
     right: object
 
-@dataclass
-class NewArray:
+@_node(K_NEWARRAY)
+class NewArray(Node):
     base: str              # 'int' | 'bool'
     size: object           # expr (int)
 
-@dataclass
-class ArrayRef:
+@_node(K_ARRAYREF)
+class ArrayRef(Node):
     id: "Id"
     index: object          # expr (int)
 
-@dataclass
-class Num:
+@_node(K_NUM)
+class Num(Node):
     value: int
 
-@dataclass
-class Bool:
+@_node(K_BOOL)
+class Bool(Node):
     value: bool
 
-@dataclass
-class Id:
+@_node(K_ID)
+class Id(Node):
     name: str
+    nid: int = -1          # id do nome no Interner (-1: não internado)
+
+# Internador por compilação: nomes -> ids inteiros e literais compartilhados
+class Interner:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._nums: Dict[object, Num] = {}
+        self._bools = (Bool(False), Bool(True))
+
+    def name_id(self, name: str) -> int:
+        nid = self.ids.get(name)
+        if nid is None:
+            nid = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return nid
+
+    def ident(self, name: str) -> Id:
+        nid = self.name_id(name)
+        return Id(self.names[nid], nid)
+
+    def num(self, value: int) -> Num:
+        node = self._nums.get(value)
+        if node is None:
+            node = self._nums[value] = Num(value)
+        return node
+
+    def num_text(self, text: str) -> Num:
+        node = self._nums.get(text)
+        if node is None:
+            node = self._nums[text] = self.num(int(text))
+        return node
+
+    def boolean(self, value: bool) -> Bool:
+        return self._bools[1 if value else 0]
+
+
+# Hash-consing de expressões (Parser(..., dag=True)): subexpressões puras
+# iguais viram o mesmo nó e a AST é um DAG. Aqui os Ids são compartilhados
+# por nome: nenhuma fase anota nós, e intérprete/codegen resolvem pelo nome
+# no ambiente da vez. Atribuições nunca são compartilhadas.
+NOT_CONST = object()
+
+_FOLD = {
+    "+": lambda a, b: a + b, "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b, "/": lambda a, b: a // b,
+    "<": lambda a, b: a < b, "≤": lambda a, b: a <= b,
+    "==": lambda a, b: a == b, "!=": lambda a, b: a != b,
+    "&&": lambda a, b: a and b, "||": lambda a, b: a or b,
+}
+
+class ExprTable:
+    def __init__(self, interner: Interner):
+        self.interner = interner
+        self._nodes: Dict[Tuple, Any] = {}
+        self._pure: Dict[int, bool] = {}     # id(nó) -> sem efeitos (sem atribuição nem new)
+        self._const: Dict[int, Any] = {}     # id(nó) -> valor, se só tem literais
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def ident(self, name: str) -> Id:
+        key = (K_ID, self.interner.name_id(name))
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._add(key, self.interner.ident(name), True, NOT_CONST)
+        else:
+            self.hits += 1
+        return node
+
+    def literal(self, node):
+        key = (node.kind, id(node))
+        if key not in self._nodes:
+            self._add(key, node, True, node.value)
+        return node
+
+    def make(self, cls, *fields):
+        if cls is Assign:
+            return cls(*fields)
+        key = (cls.kind,) + tuple(f if isinstance(f, str) else id(f) for f in fields)
+        node = self._nodes.get(key)
+        if node is not None:
+            self.hits += 1
+            return node
+        node = cls(*fields)
+        kids = [f for f in fields if not isinstance(f, str)]
+        pure = cls is not NewArray and all(self.is_pure(k) for k in kids)
+        const = NOT_CONST
+        vals = [self.const_value(k) for k in kids]
+        if kids and cls is not NewArray and NOT_CONST not in vals:
+            try:
+                if cls is Unary:
+                    const = (not vals[0]) if node.op == "!" else -vals[0]
+                else:
+                    const = _FOLD[node.op](*vals)
+            except ZeroDivisionError:
+                pass                        # o erro fica para a execução
+        return self._add(key, node, pure, const)
+
+    def _add(self, key, node, pure: bool, const):
+        self._nodes[key] = node
+        self._pure[id(node)] = pure
+        if const is not NOT_CONST:
+            self._const[id(node)] = const
+        return node
+
+    def is_pure(self, node) -> bool:
+        return self._pure.get(id(node), False)
+
+    def const_value(self, node):
+        return self._const.get(id(node), NOT_CONST)
 
 
 # =========================================================
@@ -170,28 +319,98 @@ class Tok:
     type: str
     value: str
     pos: int
+    line: int = 1     # a partir de 1
+    col: int = 0      # a partir de 0
 
-def tokenize(src: str) -> List[Tok]:
-    out: List[Tok] = []
-    for m in MASTER_RE.finditer(src):
-        kind = m.lastgroup
-        text = m.group()
-        pos  = m.start()
-
-        # ignore espaços e comentários
-        if kind in ("WS", "LINECOMMENT", "BLOCKCOMMENT"):
-            continue
+_SKIP = ("WS", "LINECOMMENT", "BLOCKCOMMENT")
+
+def _make_tok(kind: str, text: str, pos: int, line: int = 1, col: int = 0) -> Optional[Tok]:
+    # ignore espaços e comentários
+    if kind in _SKIP:
+        return None
+    if kind == "ID" and text in KEYWORDS:
+        return Tok(KEYWORDS[text], text, pos, line, col)
+    if kind == "MISMATCH":
+        raise SyntaxError(f"Caractere ilegal '{text}' na posição {pos}")
+    return Tok(kind, text, pos, line, col)
 
-        if kind == "ID" and text in KEYWORDS:
-            out.append(Tok(KEYWORDS[text], text, pos))
-        elif kind == "NUM":
-            out.append(Tok("NUM", text, pos))
-        elif kind == "MISMATCH":
-            raise SyntaxError(f"Caractere ilegal '{text}' na posição {pos}")
+def tokenize(src: str) -> List[Tok]:
+    return list(iter_tokens(src))
+
+# ---------------------------------------------------------
+# Léxico incremental: lê a fonte em pedaços (str, arquivo texto/binário
+# ou mmap) e produz os tokens sob demanda, sem materializar a lista.
+# ---------------------------------------------------------
+CHUNK_SIZE = 1 << 16
+
+def _iter_chunks(source, chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        yield source
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        if isinstance(data, str):
+            yield data
         else:
-            out.append(Tok(kind, text, pos))
-    out.append(Tok("EOF", "", len(src)))
-    return out
+            text = decoder.decode(data)
+            if text:
+                yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def iter_tokens(source, *, chunk_size: int = CHUNK_SIZE) -> Iterator[Tok]:
+    """
+    Gera os tokens de `source` (str, arquivo ou mmap) um a um, terminando em EOF.
+    Só o trecho ainda não consumido da fonte fica em memória. Só espaços e
+    comentários têm quebras de linha, então a linha só é recontada neles.
+    """
+    chunks = _iter_chunks(source, chunk_size)
+    buf = ""      # trecho ainda não tokenizado
+    base = 0      # posição absoluta de buf[0]
+    eof = False
+    line = 1
+    line_start = 0  # posição absoluta do início da linha atual
+
+    def fill() -> bool:
+        nonlocal buf, eof
+        for chunk in chunks:
+            buf += chunk
+            return True
+        eof = True
+        return False
+
+    fill()
+    i = 0
+    while True:
+        if i >= len(buf):
+            base += len(buf); buf = ""; i = 0
+            if eof or not fill():
+                break
+        m = MASTER_RE.match(buf, i)
+        # um token que encosta no fim do buffer (ou um /* sem */) pode continuar
+        # no próximo pedaço: descarta o prefixo consumido e lê mais antes de aceitar
+        if not eof and (m.end() == len(buf) or (buf.startswith("/*", i) and buf.find("*/", i + 2) < 0)):
+            base += i; buf = buf[i:]; i = 0
+            fill()
+            continue
+        kind, text = m.lastgroup, m.group()
+        if kind in _SKIP:
+            nl = text.count("\n")
+            if nl:
+                line += nl
+                line_start = base + i + text.rfind("\n") + 1
+            i = m.end()
+            continue
+        tok = _make_tok(kind, text, base + i, line, base + i - line_start)
+        i = m.end()
+        yield tok
+    yield Tok("EOF", "", base, line, base - line_start)
 
 
 # =========================================================
@@ -199,26 +418,47 @@ def tokenize(src: str) -> List[Tok]:
 #   = (dir) < || < && < == != < < <= < + - < * / < unário ! -
 # =========================================================
 class Parser:
-    def __init__(self, tokens: List[Tok]):
-        self.toks = tokens
-        self.i = 0
-
-    def look(self) -> Tok:
-        return self.toks[self.i]
+    # A gramática é LL(1): basta uma janela de lookahead sobre o fluxo de tokens,
+    # que pode ser uma lista (tokenize) ou um gerador (iter_tokens).
+    def __init__(self, tokens: Iterable[Tok], interner: Optional[Interner] = None,
+                 *, spans: bool = False, dag: bool = False):
+        self.interner = interner if interner is not None else Interner()
+        # dag=True: expressões hash-consed (ver ExprTable)
+        self.exprs: Optional[ExprTable] = ExprTable(self.interner) if dag else None
+        self._toks = iter(tokens)
+        self._window: deque = deque()
+        self.i = 0  # quantidade de tokens consumidos
+        self.last: Optional[Tok] = None  # último token consumido
+        # spans=True: registra um Span por statement (ver ParsedSource);
+        # os de nível mais externo ficam em self.spans
+        self.spans: Optional[List["Span"]] = [] if spans else None
+
+    def look(self, k: int = 0) -> Tok:
+        w = self._window
+        while len(w) <= k:
+            tok = next(self._toks, None)
+            if tok is None:  # após o EOF o fluxo repete o último token
+                tok = w[-1] if w else Tok("EOF", "", 0)
+            w.append(tok)
+        return w[k]
+
+    def advance(self) -> Tok:
+        tok = self.look()
+        self._window.popleft()
+        self.i += 1
+        self.last = tok
+        return tok
 
     def accept(self, ttype: str) -> Optional[Tok]:
         if self.look().type == ttype:
-            tok = self.look()
-            self.i += 1
-            return tok
+            return self.advance()
         return None
 
     def expect(self, ttype: str) -> Tok:
         tok = self.look()
         if tok.type != ttype:
             raise SyntaxError(f"Esperado  {ttype}, encontrado {tok.type} ('{tok.value}') na posição {tok.pos}")
-        self.i += 1
-        return tok
+        return self.advance()
 
     # program → block
     def parse_program(self) -> Program:
@@ -226,20 +466,41 @@ class Parser:
         self.expect("EOF")
         return Program(blk)
 
+    def _spanned(self, parse):
+        # roda `parse` registrando o Span do nó e dos statements dentro dele
+        outer = self.spans
+        self.spans = kids = []
+        start = self.look().pos
+        node = parse()
+        self.spans = outer
+        span = Span(node, start, self.last.pos + len(self.last.value) - start)
+        slots = _span_slots(node)
+        for k, kid in enumerate(kids):
+            kid.start -= start
+            kid.parent = span
+            kid.slot = slots[k] if slots is not None else k
+        span.children = kids
+        outer.append(span)
+        return node
+
     # block → { stmts }
     def parse_block(self) -> Block:
-        self.expect("LBRACE")
+        if self.spans is not None:
+            return self._spanned(self._parse_block)
+        return self._parse_block()
+
+    def _parse_block(self) -> Block:
+        tok = self.expect("LBRACE")
         s = self.parse_stmts()
         self.expect("RBRACE")
-        return Block(s)
+        return Block(s, (tok.line, tok.col))
 
-    # stmts → (stmt)* | ε
+    # stmts → (stmt)* | ε   (lista plana, None se vazia)
     def parse_stmts(self):
-        seq = None
+        stmts = []
         while self._starts_stmt():
-            st = self.parse_stmt()
-            seq = Seq(seq, st)
-        return seq
+            stmts.append(self.parse_stmt())
+        return stmts or None
 
     def _starts_stmt(self) -> bool:
         t = self.look().type
@@ -247,10 +508,21 @@ class Parser:
                      "INTKW","BOOLKW","TRUE","FALSE","NOT","MINUS","CONSTKW","NEW")
 
     def parse_stmt(self):
-        t = self.look().type
+        if self.spans is not None and self.look().type != "LBRACE":
+            return self._spanned(self._parse_stmt)  # blocos registram o próprio span
+        return self._parse_stmt()
+
+    def _parse_stmt(self):
+        tok = self.look()
+        t = tok.type
         if t == "LBRACE":
             return self.parse_block()
+        node = self._parse_simple(t)
+        node.pos = (tok.line, tok.col)
+        return node
 
+    def _parse_simple(self, t: str):
+        # statement que não é bloco; `t` é o tipo do primeiro token
         if t in ("INTKW","BOOLKW","CONSTKW"):
             return self.parse_decl()
 
@@ -310,7 +582,17 @@ class Parser:
         if self.accept("EQUALS"):
             init = self.parse_expr()
         self.expect("SEMI")
-        return Decl(base, is_array, is_const, Id(name), init)
+        return Decl(base, is_array, is_const, self.interner.ident(name), init)
+
+    def _mk(self, cls, *fields):
+        if self.exprs is None:
+            return cls(*fields)
+        return self.exprs.make(cls, *fields)
+
+    def _lit(self, node):
+        if self.exprs is not None:
+            self.exprs.literal(node)
+        return node
 
     # expr → or = expr | or
     def parse_expr(self):
@@ -324,14 +606,14 @@ class Parser:
     def parse_or(self):
         node = self.parse_and()
         while self.accept("OROR"):
-            node = Lg("||", node, self.parse_and())
+            node = self._mk(Lg, "||", node, self.parse_and())
         return node
 
     # and → eq ( '&&' eq )*
     def parse_and(self):
         node = self.parse_eq()
         while self.accept("ANDAND"):
-            node = Lg("&&", node, self.parse_eq())
+            node = self._mk(Lg, "&&", node, self.parse_eq())
         return node
 
     # eq → rel ((==|!=) rel)*
@@ -339,9 +621,9 @@ class Parser:
         node = self.parse_rel()
         while True:
             if self.accept("EQEQ"):
-                node = Eq("==", node, self.parse_rel())
+                node = self._mk(Eq, "==", node, self.parse_rel())
             elif self.accept("NE"):
-                node = Eq("!=", node, self.parse_rel())
+                node = self._mk(Eq, "!=", node, self.parse_rel())
             else:
                 break
         return node
@@ -351,9 +633,9 @@ class Parser:
         node = self.parse_ari()
         while True:
             if self.accept("LT"):
-                node = Rel("<", node, self.parse_ari())
+                node = self._mk(Rel, "<", node, self.parse_ari())
             elif self.accept("LE"):
-                node = Rel("≤", node, self.parse_ari())
+                node = self._mk(Rel, "≤", node, self.parse_ari())
             else:
                 break
         return node
@@ -363,9 +645,9 @@ class Parser:
         node = self.parse_term()
         while True:
             if self.accept("PLUS"):
-                node = Ari("+", node, self.parse_term())
+                node = self._mk(Ari, "+", node, self.parse_term())
             elif self.accept("MINUS"):
-                node = Ari("-", node, self.parse_term())
+                node = self._mk(Ari, "-", node, self.parse_term())
             else:
                 break
         return node
@@ -375,9 +657,9 @@ class Parser:
         node = self.parse_unary()
         while True:
             if self.accept("TIMES"):
-                node = Ari("*", node, self.parse_unary())
+                node = self._mk(Ari, "*", node, self.parse_unary())
             elif self.accept("DIV"):
-                node = Ari("/", node, self.parse_unary())
+                node = self._mk(Ari, "/", node, self.parse_unary())
             else:
                 break
         return node
@@ -385,13 +667,13 @@ class Parser:
     # unary → '!' unary | '-' unary | factor
     def parse_unary(self):
         if self.accept("NOT"):
-            return Unary("!", self.parse_unary())
+            return self._mk(Unary, "!", self.parse_unary())
         if self.accept("MINUS"):
             # fold -NUM -> Num(-n) para AST mais limpa
             if self.look().type == "NUM":
-                tok = self.look(); self.i += 1
-                return Num(-int(tok.value))
-            return Unary("-", self.parse_unary())
+                tok = self.advance()
+                return self._lit(self.interner.num(-int(tok.value)))
+            return self._mk(Unary, "-", self.parse_unary())
         return self.parse_factor()
 
     # factor → (expr) | NUM | TRUE | FALSE | NEW base [expr] | ID | ID[expr]
@@ -402,34 +684,258 @@ class Parser:
             return e
         tok = self.look()
         if tok.type == "NUM":
-            self.i += 1
-            return Num(int(tok.value))
+            self.advance()
+            return self._lit(self.interner.num_text(tok.value))
         if tok.type == "TRUE":
-            self.i += 1
-            return Bool(True)
+            self.advance()
+            return self._lit(self.interner.boolean(True))
         if tok.type == "FALSE":
-            self.i += 1
-            return Bool(False)
+            self.advance()
+            return self._lit(self.interner.boolean(False))
         if tok.type == "NEW":
-            self.i += 1
+            self.advance()
             if self.accept("INTKW"): base = "int"
             else:
                 self.expect("BOOLKW"); base = "bool"
             self.expect("LBRACK")
             size = self.parse_expr()
             self.expect("RBRACK")
-            return NewArray(base, size)
+            return self._mk(NewArray, base, size)
         if tok.type == "ID":
-            self.i += 1
-            ident = Id(tok.value)
+            self.advance()
+            if self.exprs is not None:
+                ident = self.exprs.ident(tok.value)
+            else:
+                ident = self.interner.ident(tok.value)
             if self.accept("LBRACK"):
                 idx = self.parse_expr()
                 self.expect("RBRACK")
-                return ArrayRef(ident, idx)
+                return self._mk(ArrayRef, ident, idx)
             return ident
         raise SyntaxError(f"Esperado fator, encontrado {tok.type} ('{tok.value}') na posição {tok.pos}")
 
 
+# =========================================================
+# Reparse incremental: posições dos statements (Span) e edições que
+# reparseiam só o menor statement / trecho de bloco que as contém.
+# Cópia de src/reparse.py, que é a referência (o tradutor roda sem o
+# pacote src): só `_span_slots`, usado pelo Parser, e o gancho
+# `ParsedSource._parse` são deste front end. Mudanças vão primeiro lá.
+# =========================================================
+class Span:
+    """Posição de um statement: `start` relativo ao início do span pai."""
+    __slots__ = ("node", "start", "length", "parent", "slot", "children")
+
+    def __init__(self, node, start: int, length: int):
+        self.node = node
+        self.start = start
+        self.length = length
+        self.parent: Optional["Span"] = None
+        self.slot: Any = None          # campo no nó pai (if/while/do); em blocos, a posição
+        self.children: List["Span"] = []
+
+    def abs_start(self) -> int:
+        pos = 0
+        span = self
+        while span is not None:
+            pos += span.start
+            span = span.parent
+        return pos
+
+def _span_slots(node):
+    # campos dos statements filhos, na ordem do texto (None: posição em Block.stmts)
+    k = node.kind
+    if k == K_IF:
+        return ("then_stmt", "else_stmt")
+    if k in (K_WHILE, K_DO):
+        return ("body",)
+    return None
+
+@dataclass
+class Change:
+    """
+    Resultado de `ParsedSource.edit`: os filhos [index, index + removed) de
+    `parent` viraram `added` filhos novos. `full`: o programa foi reparseado
+    inteiro (o bloco principal foi trocado).
+    """
+    parent: Optional[Span]
+    index: int
+    removed: int
+    added: int
+    full: bool = False
+
+class ParsedSource:
+    """Texto + AST + spans, atualizados edição a edição."""
+
+    def __init__(self, source: str, interner: Optional[Interner] = None):
+        self.interner = interner if interner is not None else Interner()
+        self._parse_full(source)
+
+    def _parse(self, text: str, rule: str):
+        """
+        Gancho do front end: parseia `text` inteiro com a regra `rule`
+        ("program", "block" ou "stmt") e devolve (nó, span), com o span
+        relativo ao início de `text`; no programa, o span do bloco principal.
+        Erros de sintaxe viram SyntaxError.
+        """
+        p = Parser(iter_tokens(text), self.interner, spans=True)
+        node = getattr(p, "parse_" + rule)()
+        p.expect("EOF")
+        return node, p.spans[0]
+
+    def _parse_full(self, source: str):
+        prog, root = self._parse(source, "program")
+        self.source = source
+        self.prog = prog
+        self.root = root
+        self.positions_stale = False
+
+    # ---- API ----
+    def edit(self, offset: int, removed: int, inserted: str) -> Change:
+        """
+        Substitui `removed` caracteres a partir de `offset` por `inserted` e
+        atualiza AST e spans. Se o novo texto não parseia, levanta
+        SyntaxError e nada muda.
+        """
+        old = self.source
+        lo, hi = offset, offset + removed
+        if not 0 <= lo <= hi <= len(old):
+            raise ValueError(f"Edição fora do texto: {offset}+{removed}")
+        new = old[:lo] + inserted + old[hi:]
+        delta = len(inserted) - removed
+
+        # Menor span que contém a edição estritamente (sem tocar o primeiro
+        # nem o último caractere, para não mudar os tokens das bordas)
+        span, base = self.root, self.root.start
+        if base < lo and hi < base + span.length:
+            while True:
+                i = _child_at(span, base, lo)
+                if i < 0:
+                    break
+                child = span.children[i]
+                cbase = base + child.start
+                if not (cbase < lo and hi < cbase + child.length):
+                    break
+                span, base = child, cbase
+        else:
+            span = None
+
+        # se o trecho não parseia isolado, tenta o pai
+        while span is not None:
+            parent_base = base - span.start
+            if span.node.kind == K_BLOCK:
+                change = self._reparse_region(span, base, lo, hi, new, delta)
+            else:
+                change = self._reparse_stmt(span, base, new, delta)
+            if change is not None:
+                self.source = new
+                self.positions_stale = True
+                return change
+            span, base = span.parent, parent_base
+
+        self._parse_full(new)
+        return Change(None, 0, 0, 0, full=True)
+
+    def refresh_positions(self):
+        """Recalcula o `pos` de todos os statements a partir dos spans (O(n))."""
+        text = self.source
+        starts = [0]                 # posição de início de cada linha
+        i = text.find("\n")
+        while i >= 0:
+            starts.append(i + 1)
+            i = text.find("\n", i + 1)
+        stack = [(self.root, 0)]
+        while stack:
+            span, base = stack.pop()
+            pos = base + span.start
+            line = bisect_right(starts, pos)
+            span.node.pos = (line, pos - starts[line - 1])
+            stack.extend((child, pos) for child in span.children)
+        self.positions_stale = False
+
+    # ---- Reparse de um statement inteiro ----
+    def _reparse_stmt(self, span: Span, base: int, new: str, delta: int) -> Optional[Change]:
+        parent = span.parent
+        if parent is None:
+            return None           # o bloco principal só é trocado pelo parse completo
+        try:
+            node, fresh = self._parse(new[base:base + span.length + delta], "stmt")
+        except SyntaxError:
+            return None
+        fresh.start, fresh.parent, fresh.slot = span.start, parent, span.slot
+        i = _index_of(parent, span)
+        parent.children[i] = fresh
+        if parent.node.kind == K_BLOCK:
+            parent.node.stmts[i] = node
+        else:
+            setattr(parent.node, span.slot, node)
+        _grow(fresh, delta)
+        return Change(parent, i, 1, 1)
+
+    # ---- Reparse de um trecho entre statements de um bloco ----
+    def _reparse_region(self, span: Span, base: int, lo: int, hi: int,
+                        new: str, delta: int) -> Optional[Change]:
+        # filhos [a, b) que encostam na edição, reparseados como "{ trecho }"
+        kids = span.children
+        a = 0
+        while a < len(kids) and base + kids[a].start + kids[a].length < lo:
+            a += 1
+        b = a
+        while b < len(kids) and base + kids[b].start <= hi:
+            b += 1
+        start = base + kids[a - 1].start + kids[a - 1].length if a > 0 else base + 1
+        end = base + kids[b].start if b < len(kids) else base + span.length - 1
+        if start > lo or end < hi:
+            return None
+        try:
+            block, region = self._parse("{" + new[start:end + delta] + "}", "block")
+        except SyntaxError:
+            return None
+        added = region.children
+        for child in added:
+            child.start += start - 1 - base
+            child.parent = span
+        for child in kids[b:]:
+            child.start += delta
+        kids[a:b] = added
+        stmts = list(span.node.stmts or [])
+        stmts[a:b] = block.stmts or []
+        span.node.stmts = stmts or None
+        for i in range(a, len(kids)):
+            kids[i].slot = i
+        span.length += delta
+        _grow(span, delta)
+        return Change(span, a, b - a, len(added))
+
+def _child_at(span: Span, base: int, pos: int) -> int:
+    """Índice do último filho que começa antes de `pos` (busca binária), ou -1."""
+    kids = span.children
+    lo, hi = 0, len(kids)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if base + kids[mid].start < pos:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo - 1
+
+def _index_of(parent: Span, span: Span) -> int:
+    if parent.node.kind == K_BLOCK:
+        return span.slot
+    return parent.children.index(span)
+
+def _grow(span: Span, delta: int):
+    """O span mudou de tamanho em `delta`: ajusta ancestrais e irmãos seguintes."""
+    if not delta:
+        return
+    node, parent = span, span.parent
+    while parent is not None:
+        for sib in parent.children[_index_of(parent, node) + 1:]:
+            sib.start += delta
+        parent.length += delta
+        node, parent = parent, parent.parent
+
+
 # =========================================================
 # Pretty-print da AST (árvore ASCII)
 # =========================================================
@@ -437,8 +943,9 @@ def _children_of(node):
     if node is None or not is_dataclass(node):
         return []
     if isinstance(node, Program):  return [("block", node.block)]
-    if isinstance(node, Block):    return [("stmts", node.stmts)]
-    if isinstance(node, Seq):      return [("first", node.first), ("second", node.second)]
+    if isinstance(node, Block):
+        if node.stmts is None:     return [("stmts", None)]
+        return [(f"stmt[{i}]", s) for i, s in enumerate(node.stmts)]
     if isinstance(node, Decl):     return [("type", Id(f"{node.typ}{'[]' if node.is_array else ''}{' const' if node.is_const else ''}")), ("id", node.id), ("init", node.init)]
     if isinstance(node, Eval):     return [("expr", node.expr)]
     if isinstance(node, Print):    return [(f"arg[{i}]", a) for i,a in enumerate(node.args)]
@@ -464,7 +971,6 @@ def _children_of(node):
 def _label_of(node):
     if isinstance(node, Program):  return "Program"
     if isinstance(node, Block):    return "Block"
-    if isinstance(node, Seq):      return "Seq"
     if isinstance(node, Decl):     return f"Decl({node.typ}{'[]' if node.is_array else ''}{', const' if node.is_const else ''})"
     if isinstance(node, Eval):     return "Eval"
     if isinstance(node, Print):    return "Print"
@@ -533,14 +1039,70 @@ class Sym:
 def _type_name(typ, is_array=False):
     return f"{typ}{'[]' if is_array else ''}"
 
+# Tabela de símbolos compacta: uma linha por declaração em arrays paralelos
+# (id do nome, código do tipo, flags, profundidade); as linhas só viram
+# dicts {"name","type","const","scope_depth"} ao indexar/iterar.
+_TYPES = (INT, BOOL)
+_TYPE_CODE = {t: code for code, t in enumerate(_TYPES)}
+_F_ARRAY = 1
+_F_CONST = 2
+
+class SymbolTable:
+    __slots__ = ("name_ids", "types", "flags", "depths", "names", "_ids")
+
+    def __init__(self):
+        self.name_ids = array("i")
+        self.types = array("b")
+        self.flags = array("b")
+        self.depths = array("i")
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def append(self, name: str, typ: str, is_array: bool, is_const: bool, depth: int):
+        nid = self._ids.get(name)
+        if nid is None:
+            nid = self._ids[name] = len(self.names)
+            self.names.append(name)
+        self.name_ids.append(nid)
+        self.types.append(_TYPE_CODE[typ])
+        self.flags.append((_F_ARRAY if is_array else 0) | (_F_CONST if is_const else 0))
+        self.depths.append(depth)
+
+    def __len__(self):
+        return len(self.name_ids)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        flags = self.flags[i]
+        return {
+            "name": self.names[self.name_ids[i]],
+            "type": _type_name(_TYPES[self.types[i]], bool(flags & _F_ARRAY)),
+            "const": bool(flags & _F_CONST),
+            "scope_depth": self.depths[i],
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def sorted_indices(self) -> List[int]:
+        # ordem (profundidade, nome), estável: chave inteira com o posto do nome
+        names = self.names
+        rank = [0] * len(names)
+        for r, nid in enumerate(sorted(range(len(names)), key=names.__getitem__)):
+            rank[nid] = r
+        width = len(names)
+        depths, name_ids = self.depths, self.name_ids
+        keys = [depths[i] * width + rank[name_ids[i]] for i in range(len(self))]
+        return sorted(range(len(keys)), key=keys.__getitem__)
+
 def check_semantics(prog: Program):
     """
     Percorre a AST, valida tipos/uso/escopos e
-    retorna um snapshot da TABELA DE SÍMBOLOS (lista de dicts).
+    retorna um snapshot da TABELA DE SÍMBOLOS (SymbolTable).
     """
-    scopes: List[Dict[str, Sym]] = []   # pilha de dicionários (um por escopo)
+    scopes: List[Dict[Any, Sym]] = []   # pilha de dicionários (um por escopo)
     defs: set[Sym] = set()              # símbolos definitivamente inicializados
-    symtab_snapshot: List[Dict[str, Any]] = []
+    symtab_snapshot = SymbolTable()
 
     def push() -> None:
         scopes.append({})
@@ -553,39 +1115,35 @@ def check_semantics(prog: Program):
                 defs.remove(s)
         scopes.pop()
 
-    def declare(name: str, typ: str, is_array: bool, is_const: bool) -> Sym:
+    # escopos indexados por Id.nid (ou pelo nome, se o Id não foi internado)
+    def declare(ident: Id, typ: str, is_array: bool, is_const: bool) -> Sym:
         depth = len(scopes)-1
-        if name in scopes[-1]:
+        name = ident.name
+        key = ident.nid if ident.nid >= 0 else name
+        if key in scopes[-1]:
             raise SemanticError(f"Redeclaração no mesmo escopo: '{name}'.")
         sym = Sym(name, typ, is_array, is_const, depth)
-        scopes[-1][name] = sym
+        scopes[-1][key] = sym
         # snapshot para impressão
-        symtab_snapshot.append({
-            "name": name,
-            "type": typ + ("[]" if is_array else ""),
-            "const": is_const,
-            "scope_depth": depth
-        })
+        symtab_snapshot.append(name, typ, is_array, is_const, depth)
         return sym
 
-    def lookup(name: str) -> Sym:
+    def lookup(ident: Id) -> Sym:
+        key = ident.nid if ident.nid >= 0 else ident.name
         for depth in range(len(scopes)-1, -1, -1):
             tab = scopes[depth]
-            if name in tab: return tab[name]
-        raise SemanticError(f"Variável '{name}' não declarada.")
+            if key in tab: return tab[key]
+        raise SemanticError(f"Variável '{ident.name}' não declarada.")
 
     def _check_block(node: Block):
         push()
         _check_stmts(node.stmts)
         pop()
 
-    def _check_stmts(node):
-        if node is None: return
-        if isinstance(node, Seq):
-            _check_stmts(node.first)
-            _check_stmt(node.second)
-        else:
-            _check_stmt(node)
+    def _check_stmts(stmts):
+        if stmts is None: return
+        for st in stmts:
+            _check_stmt(st)
 
     def _check_stmt(node):
         nonlocal defs
@@ -594,7 +1152,7 @@ def check_semantics(prog: Program):
 
         if isinstance(node, Decl):
             if not scopes: push()  # garantia (em caso de bloco "nu")
-            sym = declare(node.id.name, node.typ, node.is_array, node.is_const)
+            sym = declare(node.id, node.typ, node.is_array, node.is_const)
             if node.is_const and node.init is None:
                 raise SemanticError(f"const '{sym.name}' requer inicialização.")
             if node.init is not None:
@@ -621,7 +1179,7 @@ def check_semantics(prog: Program):
             expr = node.expr
             if isinstance(expr, Assign):
                 if isinstance(expr.left, Id):
-                    sym = lookup(expr.left.name)
+                    sym = lookup(expr.left)
                     if sym.is_const:
                         raise SemanticError(f"Não é permitido reatribuir const '{sym.name}'.")
                     tR, aR = _infer_expr_type(expr.right)
@@ -638,7 +1196,7 @@ def check_semantics(prog: Program):
                     defs.add(sym)
                     return
                 elif isinstance(expr.left, ArrayRef):
-                    sym = lookup(expr.left.id.name)
+                    sym = lookup(expr.left.id)
                     if not sym.is_array:
                         raise SemanticError(f"'{sym.name}' não é array.")
                     ti, ai = _infer_expr_type(expr.left.index)
@@ -660,7 +1218,7 @@ def check_semantics(prog: Program):
 
         if isinstance(node, Assign):
             if isinstance(node.left, Id):
-                sym = lookup(node.left.name)
+                sym = lookup(node.left)
                 if sym.is_const:
                     raise SemanticError(f"Não é permitido reatribuir const '{sym.name}'.")
                 tR, aR = _infer_expr_type(node.right)
@@ -677,7 +1235,7 @@ def check_semantics(prog: Program):
                 defs.add(sym)
                 return
             elif isinstance(node.left, ArrayRef):
-                sym = lookup(node.left.id.name)
+                sym = lookup(node.left.id)
                 if not sym.is_array:
                     raise SemanticError(f"'{sym.name}' não é array.")
                 ti, ai = _infer_expr_type(node.left.index)
@@ -736,7 +1294,7 @@ def check_semantics(prog: Program):
         if isinstance(expr, Num):  return (INT, False)
         if isinstance(expr, Bool): return (BOOL, False)
         if isinstance(expr, Id):
-            sym = lookup(expr.name)
+            sym = lookup(expr)
             if sym.is_array:
                 raise SemanticError(f"Array '{sym.name}' não é valor escalar; use {sym.name}[i].")
             if sym not in defs:
@@ -748,7 +1306,7 @@ def check_semantics(prog: Program):
                 raise SemanticError("Tamanho do array deve ser int.")
             return (expr.base, True)
         if isinstance(expr, ArrayRef):
-            sym = lookup(expr.id.name)
+            sym = lookup(expr.id)
             if not sym.is_array:
                 raise SemanticError(f"'{sym.name}' não é array.")
             if sym not in defs:
@@ -801,11 +1359,20 @@ def check_semantics(prog: Program):
 # =========================================================
 # Impressor da TABELA DE SÍMBOLOS
 # =========================================================
-def print_symtab(symtab_snapshot: List[Dict[str, Any]]):
+def print_symtab(symtab_snapshot):
     print("=== TABELA DE SÍMBOLOS ===")
-    for row in sorted(symtab_snapshot, key=lambda r: (r["scope_depth"], r["name"])):
-        cflag = " const" if row["const"] else ""
-        print(f"[escopo {row['scope_depth']}] {row['name']} : {row['type']}{cflag}")
+    if not isinstance(symtab_snapshot, SymbolTable):  # lista de dicts
+        for row in sorted(symtab_snapshot, key=lambda r: (r["scope_depth"], r["name"])):
+            cflag = " const" if row["const"] else ""
+            print(f"[escopo {row['scope_depth']}] {row['name']} : {row['type']}{cflag}")
+        return
+    t = symtab_snapshot
+    # linha a linha, direto dos arrays (sem montar os dicts)
+    for i in t.sorted_indices():
+        f = t.flags[i]
+        cflag = " const" if f & _F_CONST else ""
+        print(f"[escopo {t.depths[i]}] {t.names[t.name_ids[i]]} : "
+              f"{_type_name(_TYPES[t.types[i]], bool(f & _F_ARRAY))}{cflag}")
 
 
 # =========================================================
@@ -815,7 +1382,7 @@ class RuntimeErrorLang(Exception):
     pass
 
 def exec_program(node: Program, *, trace: bool=False) -> Dict[str, Any]:
-    frames: List[Dict[str, Any]] = [{}]
+    frames: List[Dict[Any, Any]] = [{}]
 
     def push():
         frames.append({})
@@ -824,33 +1391,36 @@ def exec_program(node: Program, *, trace: bool=False) -> Dict[str, Any]:
         frames.pop()
         if trace: print("<< pop {}")
 
-    def declare(name: str, value: Any):
-        frames[-1][name] = value
+    # frames indexados por Id.nid (ou pelo nome, se o Id não foi internado)
+    def declare(ident: Id, value: Any):
+        frames[-1][ident.nid if ident.nid >= 0 else ident.name] = value
 
-    def get(name: str):
+    def get(ident: Id):
+        key = ident.nid if ident.nid >= 0 else ident.name
         for d in reversed(frames):
-            if name in d: return d[name]
-        raise RuntimeErrorLang(f"Variável não encontrada: {name}")
+            if key in d: return d[key]
+        raise RuntimeErrorLang(f"Variável não encontrada: {ident.name}")
 
-    def setvar(name: str, value: Any):
+    def setvar(ident: Id, value: Any):
+        key = ident.nid if ident.nid >= 0 else ident.name
         for d in reversed(frames):
-            if name in d:
-                d[name] = value
+            if key in d:
+                d[key] = value
                 return value
-        frames[-1][name] = value
+        frames[-1][key] = value
         return value
 
     def eval_expr(e):
         if isinstance(e, Num):  return e.value
         if isinstance(e, Bool): return e.value
-        if isinstance(e, Id):   return get(e.name)
+        if isinstance(e, Id):   return get(e)
         if isinstance(e, NewArray):
             n = eval_expr(e.size)
             if n < 0: raise RuntimeErrorLang("Tamanho de array negativo.")
             base_zero = 0 if e.base == "int" else False
             return [base_zero for _ in range(int(n))]
         if isinstance(e, ArrayRef):
-            arr = get(e.id.name)
+            arr = get(e.id)
             idx = eval_expr(e.index)
             if not isinstance(arr, list):
                 raise RuntimeErrorLang(f"'{e.id.name}' não é array em tempo de execução.")
@@ -892,9 +1462,9 @@ def exec_program(node: Program, *, trace: bool=False) -> Dict[str, Any]:
         if isinstance(e, Assign):
             val = eval_expr(e.right)
             if isinstance(e.left, Id):
-                return setvar(e.left.name, val)
+                return setvar(e.left, val)
             elif isinstance(e.left, ArrayRef):
-                arr = get(e.left.id.name)
+                arr = get(e.left.id)
                 idx = eval_expr(e.left.index)
                 if not isinstance(arr, list):
                     raise RuntimeErrorLang(f"'{e.left.id.name}' não é array em tempo de execução.")
@@ -912,17 +1482,15 @@ def exec_program(node: Program, *, trace: bool=False) -> Dict[str, Any]:
             exec_stmts(s.stmts)
             pop()
             return
-        if isinstance(s, Seq):
-            exec_stmts(s.first); exec_stmt(s.second); return
         if isinstance(s, Decl):
             if s.is_array:
                 default = None
             else:
                 default = 0 if s.typ == "int" else False
-            declare(s.id.name, default)
+            declare(s.id, default)
             if s.init is not None:
                 v = eval_expr(s.init)
-                setvar(s.id.name, v)
+                setvar(s.id, v)
             return
         if isinstance(s, Eval):
             val = eval_expr(s.expr)
@@ -960,12 +1528,10 @@ def exec_program(node: Program, *, trace: bool=False) -> Dict[str, Any]:
             exec_stmt(s.block); return
         raise RuntimeErrorLang(f"Stmt não suportado: {type(s).__name__}")
 
-    def exec_stmts(node):
-        if node is None: return
-        if isinstance(node, Seq):
-            exec_stmts(node.first); exec_stmt(node.second)
-        else:
-            exec_stmt(node)
+    def exec_stmts(stmts):
+        if stmts is None: return
+        for st in stmts:
+            exec_stmt(st)
 
     if trace: print(">> start Program")
     exec_stmt(node.block)
@@ -1005,8 +1571,6 @@ def _cg_stmt(node, indent=""):
         out.extend(_cg_stmts(node.stmts, indent))
         emit("pop()")
         return out
-    if isinstance(node, Seq):
-        out.extend(_cg_stmts(node, indent)); return out
     if isinstance(node, Decl):
         default = "None" if node.is_array else ("0" if node.typ=="int" else "False")
         emit(f"declare('{node.id.name}', {default})")
@@ -1050,14 +1614,11 @@ def _cg_stmt(node, indent=""):
         return out
     raise RuntimeError(f"Stmt desconhecido no codegen: {type(node).__name__}")
 
-def _cg_stmts(node, indent=""):
+def _cg_stmts(stmts, indent=""):
     out = []
-    if node is None: return out
-    if isinstance(node, Seq):
-        out.extend(_cg_stmts(node.first, indent))
-        out.extend(_cg_stmt(node.second, indent))
-        return out
-    out.extend(_cg_stmt(node, indent))
+    if stmts is None: return out
+    for st in stmts:
+        out.extend(_cg_stmt(st, indent))
     return out
 
 def _cg_expr(node):
@@ -1106,9 +1667,21 @@ def exec_generated_python(pycode: str, env: Optional[Dict[str, Any]] = None) ->
 # =========================================================
 # Conveniências
 # =========================================================
-def parse(src: str) -> Program:
+def parse(src: str, *, dag: bool = False) -> Program:
     toks = tokenize(src)
-    return Parser(toks).parse_program()
+    return Parser(toks, dag=dag).parse_program()
+
+def parse_stream(source, *, chunk_size: int = CHUNK_SIZE) -> Program:
+    """Analisa `source` (str, arquivo ou mmap) puxando os tokens sob demanda."""
+    return Parser(iter_tokens(source, chunk_size=chunk_size)).parse_program()
+
+def parse_file(path: str) -> Program:
+    """Analisa um arquivo .min mapeado em memória, sem lê-lo inteiro para uma str."""
+    with open(path, "rb") as f:
+        if f.seek(0, io.SEEK_END) == 0:  # mmap não aceita arquivo vazio
+            return parse_stream("")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_stream(mm)
 
 def run(src: str, *, trace: bool=False) -> Dict[str, Any]:
     prog = parse(src)